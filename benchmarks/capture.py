@@ -0,0 +1,97 @@
+# Custo de gravar cada frame: sem gravacao, leitura sincrona (glReadPixels +
+# PNG no proprio laco, como headless.save_png) e captura assincrona de
+# capture.py (anel de PBOs + thread de gravacao) em PNG e em video bruto.
+# A cena gira um pouco a cada frame (modo headless, scene.render_frame()).
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.capture [--frames 120] [--width 1280 --height 720]
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+
+def run(frames: int, backend: str, width: int, height: int, obj: str, shading_mode: str) -> None:
+    import headless
+    renderer = headless.HeadlessRenderer(width, height, backend)
+
+    from OpenGL.GL import glFinish
+    import capture
+    import images
+    import scene
+
+    renderer.set_view(obj, shading_mode)
+    renderer.framebuffer.bind()
+    directory = tempfile.mkdtemp(prefix="tg3d_capture_")
+
+    def draw(i: int) -> None:
+        scene.angle_y = (scene.angle_y + 1.0) % 360.0
+        scene.render_frame()
+
+    # Cada modo devolve (fim do laco de desenho, resumo da gravacao)
+    def no_capture():
+        for i in range(frames):
+            draw(i)
+        glFinish()
+        return time.perf_counter(), {}
+
+    def synchronous():
+        os.makedirs(os.path.join(directory, "sync"), exist_ok=True)
+        for i in range(frames):
+            draw(i)
+            pixels = renderer.framebuffer.read_pixels()[:, :, :3]
+            images.write_png(os.path.join(directory, "sync", f"frame_{i:06d}.png"), pixels, 1)
+        return time.perf_counter(), {"written": frames}
+
+    def asynchronous(fmt: str):
+        def loop():
+            path = os.path.join(directory, "async_" + fmt + (".rgb" if fmt == "raw" else ""))
+            recorder = capture.FrameCapture(capture.open_sink(path, fmt))
+            for i in range(frames):
+                draw(i)
+                recorder.capture(width, height)
+            # o laco de desenho termina aqui; close() espera a gravacao acabar
+            end = time.perf_counter()
+            return end, recorder.close()
+        return loop
+
+    print(f"{obj}/{shading_mode} {width}x{height}, {frames} frames")
+    print(f"{'modo':<16}{'FPS laco':>10}{'gravados':>10}{'perdidos':>10}{'esperas':>9}"
+          f"{'readback p50':>14}{'total p50/p95 (ms)':>20}")
+    modes = [("sem captura", no_capture), ("sincrona png", synchronous),
+             ("PBO + png", asynchronous("png")), ("PBO + raw", asynchronous("raw"))]
+    for label, loop in modes:
+        draw(0)
+        glFinish()
+        start = time.perf_counter()
+        end, result = loop()
+        fps = frames / (end - start)
+
+        written = result.get("written", "-")
+        dropped = result.get("dropped", "-")
+        stalls = result.get("stalls", "-")
+        readback = result.get("readback")
+        total = result.get("total")
+        readback_text = f"{readback['p50_ms']:.1f}" if readback else "-"
+        total_text = f"{total['p50_ms']:.1f}/{total['p95_ms']:.1f}" if total else "-"
+        print(f"{label:<16}{fps:>10.1f}{written:>10}{dropped:>10}{stalls:>9}{readback_text:>14}{total_text:>20}")
+
+    shutil.rmtree(directory)
+    renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gravacao de frames sincrona x assincrona (PBO)")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--object", default="sphere")
+    parser.add_argument("--shading", default="phong")
+    args = parser.parse_args()
+    run(args.frames, args.backend, args.width, args.height, args.object, args.shading)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Compara o Phong forward com o modo deferred (deferred.py) na grade
+# instanciada de scene_graph.demo_grid(), aumentando o numero de objetos e de
+# luzes pontuais. No forward cada fragmento desenhado (inclusive os cobertos
+# depois por outros, overdraw) calcula a iluminacao; no deferred o passo de
+# geometria so grava o G-buffer e a iluminacao roda uma vez por pixel.
+# As luzes pontuais usam os mesmos clusters (clustered_shading.py) nos dois modos.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.deferred [--frames 5] [--backend egl]
+import argparse
+import os
+import time
+
+INSTANCES = (500, 2000, 8000)
+LIGHTS = (0, 64, 256)
+
+
+def _time_frames(draw, frames: int) -> float:
+    from OpenGL.GL import glFinish
+
+    draw()
+    glFinish()
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    glFinish()
+    return (time.perf_counter() - start) / frames
+
+
+def run(frames: int, backend: str, width: int, height: int) -> None:
+    import headless
+    renderer = headless.HeadlessRenderer(width, height, backend)
+
+    import images
+    import scene
+    import scene_graph
+    import shading
+
+    # sem LOD: todos os objetos com a malha completa, para carregar a geometria
+    scene.lod_enabled = False
+    print(f"{width}x{height}, frame em ms")
+    print(f"{'objetos':>8}{'luzes':>7}{'forward':>10}{'deferred':>10}{'ganho':>8}{'dif. max':>10}")
+    for instances in INSTANCES:
+        scene.instanced_scene = scene_graph.demo_grid(instances)
+        for count in LIGHTS:
+            scene.set_point_light_count(count)
+            times = []
+            pictures = []
+            for mode in ("phong", "deferred"):
+                scene.current_shading = mode
+                shading.set_shading_mode(mode)
+                times.append(_time_frames(scene.render_frame, frames))
+                pictures.append(renderer.render())
+            diff = images.image_diff(pictures[0], pictures[1])["max"]
+            print(f"{instances:>8}{count:>7}{times[0] * 1e3:>10.1f}{times[1] * 1e3:>10.1f}"
+                  f"{times[0] / times[1]:>7.2f}x{diff:>10}")
+
+    renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Phong forward x deferred (G-buffer)")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    args = parser.parse_args()
+    run(args.frames, args.backend, args.width, args.height)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Compara os perfis de execucao do PyOpenGL (gl_runtime.py): tempo de import
+# dos modulos da cena, de inicializacao (contexto + scene.init_gl), custo por
+# chamada de algumas funcoes GL e tempo de frame. Cada perfil roda num
+# processo novo, ja que as flags do PyOpenGL so valem antes do primeiro import.
+# "debug" tem a mesma checagem por chamada do PyOpenGL sem configuracao
+# (glGetError depois de cada funcao) mais o callback de GL_KHR_debug.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.gl_profile [--calls 20000] [--backend egl]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def _best(function, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _child(profile: str, backend: str, calls: int, frames: int) -> None:
+    # Processo filho: mede tudo num unico perfil e imprime JSON
+    start = time.perf_counter()
+    import gl_runtime
+    import headless
+    headless.select_backend(backend)
+    gl_runtime.select_profile(profile)
+    import scene
+    import_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    renderer = headless.HeadlessRenderer(320, 240, backend)
+    init_ms = (time.perf_counter() - start) * 1e3
+
+    from OpenGL.GL import (GL_ARRAY_BUFFER, GL_VIEWPORT, glBindBuffer, glColor3f, glFinish,
+                           glGetIntegerv, glUniform1f, glUseProgram)
+    import shading
+
+    program = shading.phong_program
+    location = program.uniforms["uShininess"][0]
+    glUseProgram(program.handle)
+    tests = {
+        "glColor3f": lambda: glColor3f(1.0, 1.0, 1.0),
+        "glBindBuffer": lambda: glBindBuffer(GL_ARRAY_BUFFER, 0),
+        "glUniform1f": lambda: glUniform1f(location, 32.0),
+        "glGetIntegerv": lambda: glGetIntegerv(GL_VIEWPORT),
+    }
+    per_call = {}
+    for name, call in tests.items():
+        def loop():
+            for _ in range(calls):
+                call()
+        per_call[name] = _best(loop) / calls * 1e9
+    glUseProgram(0)
+
+    frame_ms = {}
+    for obj, shading_mode in (("cube", "flat"), ("sphere", "phong"), ("cylinder", "gouraud")):
+        renderer.set_view(obj, shading_mode)
+        renderer.render()
+
+        def draw():
+            for _ in range(frames):
+                scene.render_frame()
+            glFinish()
+        frame_ms[f"{obj}/{shading_mode}"] = _best(draw, 3) / frames * 1e3
+
+    result = {
+        "import_ms": import_ms, "init_ms": init_ms, "per_call_ns": per_call, "frame_ms": frame_ms,
+        "glut_loaded": "OpenGL.GLUT" in sys.modules, "accelerate": gl_runtime.accelerated(),
+    }
+    renderer.close()
+    print(json.dumps(result))
+
+
+def _measure(profile: str, backend: str, calls: int, frames: int) -> dict:
+    output = subprocess.run([sys.executable, "-m", "benchmarks.gl_profile", "--child", profile,
+                             "--backend", backend, "--calls", str(calls), "--frames", str(frames)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(backend: str, calls: int, frames: int, runs: int) -> None:
+    # Melhor de varias execucoes de cada perfil, intercaladas
+    results = {"release": [], "debug": []}
+    for _ in range(runs):
+        for profile in results:
+            results[profile].append(_measure(profile, backend, calls, frames))
+
+    def best(profile, *keys):
+        values = []
+        for result in results[profile]:
+            for key in keys:
+                result = result[key]
+            values.append(result)
+        return min(values)
+
+    release = results["release"][0]
+    print(f"OpenGL_accelerate: {'sim' if release['accelerate'] else 'nao instalado'}; "
+          f"GLUT carregado no modo headless: {'sim' if release['glut_loaded'] else 'nao'}")
+    print(f"{'medida':<28}{'debug':>10}{'release':>10}{'ganho':>8}")
+    rows = [("import (ms)", ("import_ms",)), ("inicializacao (ms)", ("init_ms",))]
+    rows += [(f"{name} (ns)", ("per_call_ns", name)) for name in release["per_call_ns"]]
+    rows += [(f"frame {name} (ms)", ("frame_ms", name)) for name in release["frame_ms"]]
+    for label, keys in rows:
+        debug_value, release_value = best("debug", *keys), best("release", *keys)
+        print(f"{label:<28}{debug_value:>10.2f}{release_value:>10.2f}{debug_value / release_value:>7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Perfis release x debug do PyOpenGL")
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--calls", type=int, default=20000, help="chamadas por medida de custo por chamada")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5, help="processos por perfil (vale o melhor)")
+    parser.add_argument("--child", choices=("release", "debug"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.backend, args.calls, args.frames)
+    else:
+        run(args.backend, args.calls, args.frames, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Mede o uso de CPU com a cena parada nos dois modos do scheduler
+# ("on_demand" e "continuous"). Cada modo roda em um processo separado,
+# com uma janela GLUT de verdade, durante --seconds segundos.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.idle_cpu [--seconds 5]
+import argparse
+import json
+import subprocess
+import sys
+
+WARMUP_MS = 1000
+
+
+def _child(mode: str, seconds: float) -> None:
+    from OpenGL.GLUT import (
+        glutInit, glutInitDisplayMode, glutInitWindowSize, glutCreateWindow,
+        glutDisplayFunc, glutReshapeFunc, glutTimerFunc, glutMainLoop,
+        glutLeaveMainLoop, glutSetOption, GLUT_DOUBLE, GLUT_RGBA, GLUT_DEPTH,
+        GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_CONTINUE_EXECUTION,
+    )
+    import scene
+    import scheduler
+
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_DEPTH)
+    glutInitWindowSize(scene.width, scene.height)
+    glutCreateWindow(b"idle cpu")
+    glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_CONTINUE_EXECUTION)
+
+    scene.init_gl(scene.width, scene.height)
+    glutDisplayFunc(scene.display)
+    glutReshapeFunc(scene.reshape)
+    scheduler.start(mode)
+
+    result = {}
+
+    def begin(value: int) -> None:
+        # Depois do aquecimento (primeiros frames, compilacao de shader...)
+        scheduler.reset_cpu_meter()
+        result["frames_before"] = scheduler.frames_drawn
+
+    def finish(value: int) -> None:
+        result["cpu"] = scheduler.cpu_usage()
+        result["frames"] = scheduler.frames_drawn - result["frames_before"]
+        glutLeaveMainLoop()
+
+    glutTimerFunc(WARMUP_MS, begin, 0)
+    glutTimerFunc(WARMUP_MS + int(seconds * 1000), finish, 0)
+    glutMainLoop()
+
+    print(json.dumps({"mode": mode, "cpu": result["cpu"], "frames": result["frames"]}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Uso de CPU com a cena parada")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--child", choices=("on_demand", "continuous"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.seconds)
+        return
+
+    print(f"{'modo':<12}{'CPU (% de 1 nucleo)':>22}{'frames':>9}")
+    for mode in ("continuous", "on_demand"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.idle_cpu", "--child", mode, "--seconds", str(args.seconds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        data = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<12}{data['cpu'] * 100:>21.1f}%{data['frames']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Compara o desenho de N cubos com uma chamada por no (glMultMatrix +
+# glDrawArrays em laco Python) com o desenho instanciado do grafo de cena
+# (uma chamada por tipo de primitiva). Usa um contexto headless pequeno para
+# que o custo medido seja o de submissao, nao o de rasterizacao.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.instancing [--frames 20] [--backend egl]
+import argparse
+import time
+
+import numpy as np
+
+COUNTS = (100, 1000, 4000, 16000)
+
+
+def _time_frames(draw, frames: int) -> float:
+    from OpenGL.GL import glFinish
+
+    draw()
+    glFinish()
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    glFinish()
+    return (time.perf_counter() - start) / frames
+
+
+def run(frames: int, backend: str) -> None:
+    import headless
+    renderer = headless.HeadlessRenderer(64, 64, backend)
+
+    from OpenGL.GL import glColor3f, glMultMatrixf, glPopMatrix, glPushMatrix
+    import instancing
+    import meshes
+    import scene
+    import scene_graph
+
+    print(f"{'instancias':>11}{'por no (ms)':>14}{'instanciado (ms)':>19}{'ganho':>9}")
+    for count in COUNTS:
+        rng = np.random.default_rng(count)
+        models = np.tile(np.eye(4, dtype=np.float32), (count, 1, 1))
+        models[:, :3, 3] = rng.uniform(-3.0, 3.0, size=(count, 3))
+        models[:, :3, :3] *= 0.05
+        colors = rng.uniform(0.2, 1.0, size=(count, 3)).astype(np.float32)
+
+        graph = scene_graph.SceneGraph(capacity=count)
+        graph.add_many("cube", models, colors)
+        uploads = models.transpose(0, 2, 1).copy()
+
+        def per_node() -> None:
+            for matrix, color in zip(uploads, colors):
+                glPushMatrix()
+                glMultMatrixf(matrix)
+                glColor3f(*color)
+                meshes.draw_mesh("cube")
+                glPopMatrix()
+
+        def instanced() -> None:
+            instancing.draw_graph(graph, scene.current_shading, scene.light_pos)
+
+        t_node = _time_frames(per_node, frames)
+        t_inst = _time_frames(instanced, frames)
+        print(f"{count:>11}{t_node * 1e3:>14.2f}{t_inst * 1e3:>19.2f}{t_node / t_inst:>8.1f}x")
+
+    renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark desenho por no x instanciado")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--backend", choices=("egl", "osmesa"), default="egl")
+    args = parser.parse_args()
+    run(args.frames, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Tempo de frame do modo phong em funcao do numero de luzes pontuais
+# (clustered_shading.py), comparando a grade de clusters padrao com uma grade
+# 1x1x1, em que todo fragmento avalia todas as luzes (forca bruta). Tambem
+# mede a distribuicao das luzes em clusters na CPU (light_clusters.py).
+# A cena e a grade instanciada de scene_graph.demo_grid() em modo headless.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.many_lights [--frames 10] [--backend egl]
+import argparse
+import os
+import time
+
+COUNTS = (0, 16, 64, 128, 256, 512)
+
+
+def _time_frames(draw, frames: int) -> float:
+    from OpenGL.GL import glFinish
+
+    draw()
+    glFinish()
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    glFinish()
+    return (time.perf_counter() - start) / frames
+
+
+def run(frames: int, backend: str, width: int, height: int, instances: int) -> None:
+    import headless
+    renderer = headless.HeadlessRenderer(width, height, backend)
+
+    import clustered_shading
+    import light_clusters
+    import scene
+    import scene_graph
+    import shading
+    import transforms
+
+    scene.instanced_scene = scene_graph.demo_grid(instances)
+    scene.current_shading = "phong"
+    shading.set_shading_mode("phong")
+    clustered = clustered_shading.ClusteredLighting()
+    brute_force = clustered_shading.ClusteredLighting((1, 1, 1))
+
+    print(f"{instances} instancias, {width}x{height}")
+    print(f"{'luzes':>6}{'clusters (ms)':>15}{'forca bruta (ms)':>18}{'ganho':>8}"
+          f"{'luzes/cluster':>15}{'distribuicao (ms)':>19}")
+    for count in COUNTS:
+        scene.set_point_light_count(count)
+        times = []
+        for lighting in (clustered, brute_force):
+            scene._clustered = lighting
+            times.append(_time_frames(scene.render_frame, frames))
+
+        stats = clustered.stats if count else {"pairs": 0, "occupied": 0}
+        per_cluster = stats["pairs"] / max(stats["occupied"], 1)
+        binning = 0.0
+        if count:
+            lights = scene.point_lights
+            positions = transforms.transform_points(scene.view_matrix(), lights.positions)[:, :3]
+            bounds = light_clusters.cluster_bounds(scene.projection_matrix(), clustered.dims,
+                                                   scene.NEAR, scene.FAR)
+            start = time.perf_counter()
+            for _ in range(frames):
+                light_clusters.assign_lights(positions, lights.radii, scene.projection_matrix(),
+                                             clustered.dims, scene.NEAR, scene.FAR, bounds)
+            binning = (time.perf_counter() - start) / frames
+        print(f"{count:>6}{times[0] * 1e3:>15.2f}{times[1] * 1e3:>18.2f}{times[1] / times[0]:>7.1f}x"
+              f"{per_cluster:>15.1f}{binning * 1e3:>19.2f}")
+
+    scene._clustered = None
+    clustered.delete()
+    brute_force.delete()
+    renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tempo de frame x numero de luzes pontuais")
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--instances", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.frames, args.backend, args.width, args.height, args.instances)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Compara o desenho em modo imediato (objects3d.draw_cube/draw_pyramid e as
+# quadricas GLU/GLUT de draw_cylinder/draw_sphere) com o desenho em modo
+# retido (VBO/VAO do registro em meshes.py).
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.mesh_cache [--frames 2000]
+import argparse
+import time
+
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+
+import meshes
+import objects3d
+
+
+def _time_draws(draw, frames: int) -> float:
+    # Aquece o driver antes de medir
+    for _ in range(10):
+        draw()
+    glFinish()
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    glFinish()
+    return time.perf_counter() - start
+
+
+def run(frames: int) -> None:
+    objects3d.init_meshes()
+
+    cases = [
+        ("cube", objects3d.draw_cube, lambda: meshes.draw_mesh("cube")),
+        ("pyramid", objects3d.draw_pyramid, lambda: meshes.draw_mesh("pyramid")),
+        ("cylinder", objects3d.draw_cylinder, lambda: meshes.draw_mesh("cylinder")),
+        ("sphere", objects3d.draw_sphere, lambda: meshes.draw_mesh("sphere")),
+    ]
+
+    print(f"{'objeto':<10}{'imediato (us)':>16}{'VBO (us)':>12}{'ganho':>9}")
+    for name, immediate, retained in cases:
+        t_imm = _time_draws(immediate, frames) / frames * 1e6
+        t_vbo = _time_draws(retained, frames) / frames * 1e6
+        print(f"{name:<10}{t_imm:>16.1f}{t_vbo:>12.1f}{t_imm / t_vbo:>8.1f}x")
+
+    meshes.delete_all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark modo imediato x VBO")
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Janela GLUT escondida apenas para obter um contexto OpenGL
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_DEPTH)
+    glutInitWindowSize(64, 64)
+    glutCreateWindow(b"benchmark")
+    glutHideWindow()
+
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_LIGHTING)
+    glEnable(GL_LIGHT0)
+    glEnable(GL_COLOR_MATERIAL)
+
+    run(args.frames)
+
+
+if __name__ == "__main__":
+    main()
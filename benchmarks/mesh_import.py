@@ -0,0 +1,72 @@
+# Mede a importacao de malhas (mesh_io.py): parsing de OBJ e PLY binario com
+# gravacao do cache, e a abertura seguinte direto do cache por np.memmap.
+# As malhas sao esferas geradas por tessellation.py e gravadas num diretorio
+# temporario, entao o benchmark nao depende de arquivos externos.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.mesh_import [--triangles 2000000]
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import mesh_io
+import tessellation
+
+
+def _write_obj(path: str, positions: np.ndarray, indices: np.ndarray) -> None:
+    with open(path, "w") as f:
+        np.savetxt(f, positions, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, indices + 1, fmt="f %d %d %d")
+
+
+def _write_ply(path: str, positions: np.ndarray, indices: np.ndarray) -> None:
+    header = (f"ply\nformat binary_little_endian 1.0\nelement vertex {len(positions)}\n"
+              "property float x\nproperty float y\nproperty float z\n"
+              f"element face {len(indices)}\nproperty list uchar int vertex_indices\nend_header\n")
+    faces = np.zeros(len(indices), dtype=[("n", "u1"), ("i", "<i4", (3,))])
+    faces["n"] = 3
+    faces["i"] = indices
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(positions.astype("<f4").tobytes())
+        f.write(faces.tobytes())
+
+
+def run(triangles: int) -> None:
+    side = max(4, int(math.sqrt(triangles / 2)))
+    mesh = tessellation.sphere(1.0, side, side)
+    print(f"esfera {side}x{side}: {len(mesh.positions)} vertices, {len(mesh.indices)} triangulos")
+    print(f"{'formato':<8}{'MB':>7}{'parse+cache (ms)':>19}{'cache (ms)':>13}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        for extension, writer in ((".obj", _write_obj), (".ply", _write_ply)):
+            path = os.path.join(folder, "mesh" + extension)
+            writer(path, mesh.positions, mesh.indices)
+
+            start = time.perf_counter()
+            mesh_io.load_mesh(path)
+            parsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            vertices, indices = mesh_io.load_mesh(path)
+            # toca todas as paginas, como glBufferData faria
+            float(vertices[:, 0].sum()) + int(indices[:, 0].sum())
+            cached = time.perf_counter() - start
+
+            size = os.path.getsize(path) / (1024 * 1024)
+            print(f"{extension[1:]:<8}{size:>7.1f}{parsed * 1e3:>19.1f}{cached * 1e3:>13.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de importacao OBJ/PLY e cache de malhas")
+    parser.add_argument("--triangles", type=int, default=2_000_000)
+    args = parser.parse_args()
+    run(args.triangles)
+
+
+if __name__ == "__main__":
+    main()
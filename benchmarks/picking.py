@@ -0,0 +1,77 @@
+# Picking por raio (picking.py) numa malha de milhoes de triangulos: tempo de
+# construcao do BVH dos triangulos e tempo por raio, comparado ao teste
+# vetorizado contra todos os triangulos (forca bruta). Os raios saem de pontos
+# aleatorios em volta da esfera e miram pontos aleatorios dentro dela; os
+# acertos das duas versoes sao conferidos.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.picking [--triangles 2000000] [--rays 200]
+import argparse
+import math
+import time
+
+import numpy as np
+
+import picking
+import tessellation
+
+
+def run(triangles: int, rays: int, brute_rays: int) -> None:
+    side = max(4, int(math.sqrt(triangles / 2)))
+    mesh = tessellation.sphere(1.0, side, side)
+    positions = mesh.positions.astype(np.float64)
+    indices = mesh.indices.reshape(-1, 3)
+    print(f"esfera {side}x{side}: {len(indices)} triangulos")
+
+    start = time.perf_counter()
+    tree = picking.MeshBVH(positions, indices)
+    print(f"construcao do BVH: {(time.perf_counter() - start) * 1e3:.0f} ms "
+          f"(profundidade {tree.bvh.depth}, folhas de {tree.bvh.leaf_size})")
+
+    rng = np.random.default_rng(0)
+    origins = rng.normal(size=(rays, 3))
+    origins *= 3.0 / np.linalg.norm(origins, axis=1, keepdims=True)
+    targets = rng.uniform(-0.5, 0.5, size=(rays, 3))
+    directions = targets - origins
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+
+    times = []
+    hits = []
+    for origin, direction in zip(origins, directions):
+        start = time.perf_counter()
+        hits.append(tree.intersect(origin, direction))
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e3
+    p50, p95 = np.percentile(times, (50, 95))
+    print(f"BVH: {rays} raios, p50 {p50:.3f} ms, p95 {p95:.3f} ms, max {times.max():.3f} ms")
+
+    corners = positions[indices]
+    brute = []
+    mismatches = 0
+    for i in range(min(brute_rays, rays)):
+        start = time.perf_counter()
+        t, _, _ = picking.intersect_triangles(origins[i], directions[i], corners[:, 0], corners[:, 1], corners[:, 2])
+        best = int(np.argmin(t))
+        brute.append(time.perf_counter() - start)
+        hit = hits[i]
+        if not np.isfinite(t[best]):
+            mismatches += hit is not None
+        elif hit is None or not np.isclose(hit[1], t[best], rtol=0.0, atol=1e-9):
+            mismatches += 1
+    if not brute:
+        return
+    print(f"forca bruta: {np.median(brute) * 1e3:.1f} ms por raio "
+          f"({np.median(brute) * 1e3 / p50:.0f}x); divergencias em {mismatches}/{len(brute)} raios")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Picking por raio com BVH de triangulos")
+    parser.add_argument("--triangles", type=int, default=2_000_000)
+    parser.add_argument("--rays", type=int, default=200)
+    parser.add_argument("--brute-rays", type=int, default=5, help="raios conferidos por forca bruta")
+    args = parser.parse_args()
+    run(args.triangles, args.rays, args.brute_rays)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Escalabilidade do render_farm.py: a mesma grade renderizada com 1, 2, 4...
+# processos, cada vez num diretorio vazio (sem retomada). Mostra imagens por
+# segundo e a eficiencia em relacao a um processo (1.0 = linear). O tempo
+# inclui criar os processos e os contextos, como numa execucao real.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.render_farm [--workers 1,2,4] [--angles 24]
+import argparse
+import os
+import shutil
+import tempfile
+
+
+def run(worker_counts, angles: int, width: int, height: int, backend: str) -> None:
+    import render_farm
+
+    step = 360.0 / angles
+    jobs = render_farm.expand_grid(["cube", "sphere"], ["gouraud", "phong"], ["perspective"],
+                                   [20.0], [i * step for i in range(angles)], [8.0])
+    print(f"{len(jobs)} imagens {width}x{height}, {os.cpu_count()} nucleos")
+    print(f"{'processos':>10}{'tempo (s)':>12}{'imagens/s':>12}{'eficiencia':>12}")
+    base = None
+    for workers in worker_counts:
+        directory = tempfile.mkdtemp(prefix="tg3d_farm_")
+        try:
+            summary = render_farm.run(jobs, directory, workers, width, height, backend, verbose=False)
+        finally:
+            shutil.rmtree(directory)
+        rate = summary["images_per_s"]
+        base = base or rate
+        print(f"{workers:>10}{summary['elapsed_s']:>12.2f}{rate:>12.1f}{rate / (base * workers):>12.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escalabilidade da renderizacao em lote com processos")
+    parser.add_argument("--workers", default="1,2,4", help="quantidades de processos, separadas por virgulas")
+    parser.add_argument("--angles", type=int, default=24, help="valores de angle_y por (objeto, shading)")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    args = parser.parse_args()
+    run([int(n) for n in args.workers.split(",")], args.angles, args.width, args.height, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Reproduz uma sessao gravada com main.py --record-trace (input_trace.py) no
+# modo headless e mede cada frame. Em "max" os frames saem um atras do outro,
+# sem esperar o timer do scheduler; em "realtime" com o ritmo da gravacao.
+# Para comparar builds: grave o resultado de uma com --json e passe-o como
+# --baseline na outra (a mesma sessao gera os mesmos frames nas duas; o hash
+# do ultimo frame confirma).
+#
+# Uso (a partir da raiz do projeto):
+#     python main.py --record-trace sessao.trace          (interage e sai com ESC)
+#     python -m benchmarks.replay sessao.trace [--mode max] [--json antes.json]
+#     python -m benchmarks.replay sessao.trace --baseline antes.json
+import argparse
+import json
+import os
+
+
+def _print_comparison(result: dict, baseline: dict) -> None:
+    print(f"{'medida':<22}{'base':>10}{'atual':>10}{'razao':>8}")
+    rows = [("FPS", baseline["fps"], result["fps"])]
+    for key, label in (("frame", "frame"), ("cpu", "cpu")):
+        for stat in ("p50_ms", "p95_ms", "p99_ms", "mean_ms"):
+            if result[key] and baseline[key]:
+                rows.append((f"{label} {stat[:-3]} (ms)", baseline[key][stat], result[key][stat]))
+    for label, before, after in rows:
+        ratio = after / before if before else float("nan")
+        print(f"{label:<22}{before:>10.2f}{after:>10.2f}{ratio:>7.2f}x")
+    if baseline["frames"] != result["frames"]:
+        print(f"aviso: {baseline['frames']} frames na base e {result['frames']} agora")
+    same = baseline["final_frame_digest"] == result["final_frame_digest"]
+    print(f"ultimo frame: {'identico' if same else 'diferente'} ao da base")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reproducao deterministica de uma sessao gravada")
+    parser.add_argument("trace", help="arquivo gravado com main.py --record-trace")
+    parser.add_argument("--mode", choices=("max", "realtime"), default="max")
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--model", metavar="ARQUIVO", help="modelo importado usado na sessao (--model)")
+    parser.add_argument("--profile", action="store_true", help="inclui os tempos por etapa do profiler")
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava o resultado (com os tempos de cada frame)")
+    parser.add_argument("--baseline", metavar="ARQUIVO", help="resultado de outra build para comparar")
+    args = parser.parse_args()
+
+    import input_trace
+    result = input_trace.replay(args.trace, args.mode, args.backend, args.profile, args.model)
+
+    events = ", ".join(f"{count} {name}" for name, count in result["events"].items() if count)
+    print(f"{args.trace}: {events}")
+    print(f"{result['frames']} frames em {result['elapsed_s']:.2f} s ({result['fps']:.1f} FPS, modo {args.mode})")
+    if result["frame"]:
+        frame, cpu = result["frame"], result["cpu"]
+        print(f"frame p50/p95/p99 {frame['p50_ms']:.2f}/{frame['p95_ms']:.2f}/{frame['p99_ms']:.2f} ms"
+              f"  (cpu {cpu['p50_ms']:.2f}/{cpu['p95_ms']:.2f}/{cpu['p99_ms']:.2f} ms)")
+    if args.profile:
+        for name, stats in result["stages"].items():
+            print(f"  {name:<8} cpu p50 {stats['cpu']['p50_ms']:.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        _print_comparison(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Tempo de preparo dos shaders na inicializacao (shading.precompile_variants()):
+# compilando tudo das fontes, sem cache; na primeira execucao com o cache de
+# binarios (shader_cache.py), que compila e grava; e nas seguintes, que so
+# carregam os binarios. Cada medida roda num processo novo (contexto OpenGL
+# novo) com um diretorio de cache temporario. O cache de shaders do proprio
+# Mesa fica num diretorio vazio a cada processo, para que "das fontes" seja de
+# fato uma compilacao completa (desliga-lo com MESA_SHADER_CACHE_DISABLE tambem
+# desliga glGetProgramBinary no Mesa).
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.shader_startup [--runs 3] [--backend egl]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _child(backend: str) -> None:
+    # Processo filho: cria o contexto e inicializa a cena, imprime as medidas
+    import headless
+    start = time.perf_counter()
+    renderer = headless.HeadlessRenderer(64, 64, backend)
+    total = time.perf_counter() - start
+
+    import shader_cache
+    result = dict(shader_cache.stats, init_ms=total * 1e3, parallel=shader_cache.parallel_compile())
+    renderer.close()
+    print(json.dumps(result))
+
+
+def _measure(backend: str, cache_dir: str) -> dict:
+    with tempfile.TemporaryDirectory() as driver_cache:
+        env = dict(os.environ, TG3D_SHADER_CACHE=cache_dir, MESA_SHADER_CACHE_DIR=driver_cache)
+        output = subprocess.run([sys.executable, "-m", "benchmarks.shader_startup", "--child",
+                                 "--backend", backend],
+                                env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(runs: int, backend: str) -> None:
+    print(f"{'execucao':<22}{'shaders (ms)':>14}{'init (ms)':>11}{'compilados':>12}{'do disco':>10}")
+    for i in range(runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            rows = [("sem cache", _measure(backend, "")),
+                    ("cache frio", _measure(backend, cache_dir)),
+                    ("cache quente", _measure(backend, cache_dir))]
+
+            # binarios recusados: o arquivo e descartado e o programa recompilado
+            for name in os.listdir(cache_dir):
+                with open(os.path.join(cache_dir, name), "r+b") as f:
+                    f.seek(8)
+                    f.write(b"\xff" * 64)
+            rows.append(("binarios corrompidos", _measure(backend, cache_dir)))
+
+        for label, result in rows:
+            print(f"{label:<22}{result['precompile_ms']:>14.1f}{result['init_ms']:>11.1f}"
+                  f"{result['compiled']:>12}{result['binary_hits']:>10}")
+        if i == 0:
+            print(f"(GL_KHR_parallel_shader_compile: {'sim' if rows[0][1]['parallel'] else 'nao'}; "
+                  f"recusados na ultima linha: {rows[-1][1]['binary_rejected']})")
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inicializacao dos shaders com e sem cache de binarios")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.backend)
+    else:
+        run(args.runs, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Mede a vazao (triangulos/segundo) do renderizador em software conforme a
+# malha cresce: esferas de tesselacao crescente em cada modelo de iluminacao.
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.software_raster [--repeat 3]
+import argparse
+import time
+
+import geometry
+import software_renderer as sr
+import tessellation
+
+DETAILS = (8, 16, 32, 64, 128, 256)
+
+
+def run(width: int, height: int, repeat: int) -> None:
+    renderer = sr.SoftwareRenderer(width, height)
+
+    print(f"{'slices':>7}{'triangulos':>12}{'shading':>10}{'ms/frame':>10}{'tri/s':>12}")
+    for detail in DETAILS:
+        mesh = tessellation.get("sphere", geometry.SPHERE_RADIUS, detail, detail)
+        vertices = geometry.interleave(mesh.positions, mesh.normals, geometry.SPHERE_COLOR)
+
+        for shading_mode in ("flat", "gouraud", "phong"):
+            view = sr.SceneView(width=width, height=height, object="sphere", shading=shading_mode)
+
+            best = float("inf")
+            for _ in range(repeat):
+                renderer.clear()
+                start = time.perf_counter()
+                sr.render_mesh(renderer, view, vertices, mesh.indices)
+                best = min(best, time.perf_counter() - start)
+
+            tris = len(mesh.indices)
+            print(f"{detail:>7}{tris:>12}{shading_mode:>10}{best * 1e3:>10.1f}{tris / best:>12.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vazao do renderizador em software")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.width, args.height, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Relatorio dos formatos compactos de vertice (vertex_formats.py): bytes por
+# vertice economizados, erro geometrico (posicao, normal, cor) e erro visual,
+# medido comparando a imagem de cada formato com a do layout float32 no modo
+# headless (gouraud e phong).
+#
+# Uso (a partir da raiz do projeto):
+#     python -m benchmarks.vertex_formats [--model ARQUIVO] [--backend egl]
+# Sem --model usa uma esfera fina gerada por tessellation.py.
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+SHADINGS = ("gouraud", "phong")
+
+
+def _sphere_obj(path: str) -> None:
+    import tessellation
+
+    mesh = tessellation.sphere(1.0, 256, 256)
+    with open(path, "w") as f:
+        np.savetxt(f, mesh.positions, fmt="v %.7f %.7f %.7f")
+        np.savetxt(f, mesh.normals, fmt="vn %.7f %.7f %.7f")
+        faces = np.repeat(mesh.indices + 1, 2, axis=1)
+        np.savetxt(f, faces, fmt="f %d//%d %d//%d %d//%d")
+
+
+def run(model: str, backend: str, width: int, height: int) -> None:
+    import headless
+    renderer = headless.HeadlessRenderer(width, height, backend)
+
+    import images
+    import mesh_io
+    import meshes
+    import objects3d
+    import scene
+    import vertex_formats
+
+    vertices, _ = mesh_io.load_mesh(model)
+    print(f"{os.path.basename(model)}: {len(vertices)} vertices")
+    print(f"{'formato':<10}{'B/vert':>7}{'economia':>10}{'pos (rel)':>11}{'normal (graus)':>16}"
+          f"{'cor':>6}" + "".join(f"{'img ' + s + ' max/media':>22}" for s in SHADINGS))
+
+    reference = {}
+    for name, fmt in vertex_formats.PRESETS.items():
+        objects3d.load_model(model, scene.MODEL_NAME, vertex_format=fmt)
+        mesh = meshes.get_mesh(scene.MODEL_NAME)
+        r = vertex_formats.report(vertices, fmt)
+        columns = []
+        for shading_mode in SHADINGS:
+            image = renderer.render(scene.MODEL_NAME, shading_mode)
+            if name == "float32":
+                reference[shading_mode] = image
+            diff = images.image_diff(reference[shading_mode], image)
+            columns.append(f"{diff['max']:>12}/{diff['mean']:<9.4f}")
+        saved = f"{r['saved_ratio'] * 100:.0f}%"
+        print(f"{name:<10}{mesh.vertex_bytes // len(vertices):>7}{saved:>10}"
+              f"{r['position_error_relative']:>11.1e}{r['normal_error_max_deg']:>16.4f}"
+              f"{r['color_error_max']:>6.1f}" + "".join(columns))
+
+    renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes e erro dos formatos compactos de vertice")
+    parser.add_argument("--model", help="malha OBJ/PLY (padrao: esfera gerada)")
+    parser.add_argument("--backend", default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--height", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.model:
+        run(args.model, args.backend, args.width, args.height)
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "sphere.obj")
+        _sphere_obj(path)
+        run(path, args.backend, args.width, args.height)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scene_graph import KINDS, SceneGraph
+
+# Hierarquia de volumes envolventes (BVH) para culling por frustum.
+# - Construcao em lote (estilo LBVH): os centros das caixas sao ordenados por
+#   codigo de Morton e agrupados em folhas de LEAF_SIZE objetos consecutivos;
+#   a arvore e binaria e implicita sobre as folhas, e as caixas de cada nivel
+#   saem de np.minimum/np.maximum entre pares de filhos. Nao ha laco por no.
+# - refit() recalcula as caixas mantendo a ordem (objetos que se moveram);
+#   quando a arvore piora demais (REBUILD_RATIO) ela e reconstruida.
+# - cull() desce a arvore nivel a nivel testando todos os nos ativos de uma vez
+#   contra os 6 planos. Nos totalmente dentro aceitam a subarvore inteira sem
+#   testar os objetos; so as folhas que cruzam um plano testam objeto a objeto.
+# - intersect_ray() desce do mesmo jeito com o teste de slabs de um raio
+#   (picking.py): em cada nivel so seguem os nos que o raio atravessa.
+# Sem dependencia de OpenGL: as matrizes seguem a convencao de transforms.py.
+
+LEAF_SIZE = 8
+
+# Reconstroi quando a soma das areas das folhas passa deste multiplo da
+# soma medida na ultima construcao
+REBUILD_RATIO = 2.0
+
+_MORTON_BITS = 10
+
+# intersect_ray(): nivel em que a descida comeca (todos os nos dele sao
+# testados de uma vez) e quantos niveis desce por passo
+RAY_START_LEVEL = 4
+RAY_LEVEL_STEP = 3
+
+
+def transform_aabbs(mins: np.ndarray, maxs: np.ndarray, matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Caixas (min, max) locais -> caixas de mundo sob as matrizes (N, 4, 4).
+    # mins/maxs podem ser (3,) (mesma caixa para todos) ou (N, 3).
+    center = (np.asarray(mins) + np.asarray(maxs)) * 0.5
+    extent = (np.asarray(maxs) - np.asarray(mins)) * 0.5
+    linear = matrices[:, :3, :3]
+    world_center = np.einsum("nij,nj->ni", linear, np.broadcast_to(center, (len(matrices), 3))) + matrices[:, :3, 3]
+    world_extent = np.einsum("nij,nj->ni", np.abs(linear), np.broadcast_to(extent, (len(matrices), 3)))
+    return world_center - world_extent, world_center + world_extent
+
+
+def _part1by2(values: np.ndarray) -> np.ndarray:
+    # Espalha 10 bits com dois zeros entre eles (intercalacao de Morton)
+    x = values.astype(np.uint32) & 0x3FF
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    lo = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - lo, 1e-12)
+    cells = ((points - lo) / span * ((1 << _MORTON_BITS) - 1)).astype(np.uint32)
+    return (_part1by2(cells[:, 0]) << 2) | (_part1by2(cells[:, 1]) << 1) | _part1by2(cells[:, 2])
+
+
+class Frustum:
+    # Seis planos (a, b, c, d) com normais para dentro: ax + by + cz + d >= 0
+
+    def __init__(self, planes: np.ndarray) -> None:
+        planes = np.asarray(planes, dtype=np.float64)
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+    @classmethod
+    def from_matrix(cls, view_projection: np.ndarray) -> "Frustum":
+        # Planos extraidos de projecao @ modelo-visualizacao (Gribb/Hartmann)
+        m = np.asarray(view_projection, dtype=np.float64)
+        r0, r1, r2, r3 = m
+        return cls(np.array([r3 + r0, r3 - r0, r3 + r1, r3 - r1, r3 + r2, r3 - r2]))
+
+    def classify(self, mins: np.ndarray, maxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Para cada caixa: (fora de algum plano, totalmente dentro de todos)
+        center = (mins + maxs) * 0.5
+        extent = (maxs - mins) * 0.5
+        normals = self.planes[:, :3]
+        dist = center @ normals.T + self.planes[:, 3]
+        radius = extent @ np.abs(normals).T
+        outside = (dist < -radius).any(axis=1)
+        inside = (dist >= radius).all(axis=1)
+        return outside, inside
+
+
+def ray_boxes(origin: np.ndarray, inv_direction: np.ndarray, mins: np.ndarray, maxs: np.ndarray,
+              t_max: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+    # Teste de slabs do raio contra N caixas: (atravessa, t de entrada).
+    # inv_direction = 1 / direcao (inf nos eixos em que a direcao e zero); o
+    # nan de 0 * inf e ignorado por fmin/fmax.
+    with np.errstate(invalid="ignore"):
+        t1 = (mins - origin) * inv_direction
+        t2 = (maxs - origin) * inv_direction
+    t_enter = np.fmax.reduce(np.fmin(t1, t2), axis=1)
+    t_exit = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+    hit = (t_exit >= np.maximum(t_enter, 0.0)) & (t_enter <= t_max)
+    return hit, t_enter
+
+
+def inverse_direction(direction: np.ndarray) -> np.ndarray:
+    direction = np.asarray(direction, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        return 1.0 / direction
+
+
+class BVH:
+
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray, leaf_size: int = LEAF_SIZE) -> None:
+        self.leaf_size = leaf_size
+        self.builds = 0
+        self.refits = 0
+        self.stats: Dict[str, int] = {}
+        self.build(mins, maxs)
+
+    # -- construcao -----------------------------------------------------------
+
+    def build(self, mins: np.ndarray, maxs: np.ndarray) -> None:
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+        self.count = len(mins)
+        leaves = max(1, -(-self.count // self.leaf_size))
+        self.depth = int(np.ceil(np.log2(leaves))) if leaves > 1 else 0
+
+        if self.count:
+            self.order = np.argsort(morton_codes((mins + maxs) * 0.5), kind="stable")
+        else:
+            self.order = np.zeros(0, dtype=np.int64)
+
+        # objetos cobertos por um no: contagem e inicio (na ordem de Morton)
+        leaf_starts = np.arange(1 << self.depth) * self.leaf_size
+        leaf_counts = np.clip(self.count - leaf_starts, 0, self.leaf_size)
+        self.counts: List[np.ndarray] = [leaf_counts]
+        for _ in range(self.depth):
+            self.counts.insert(0, self.counts[0][0::2] + self.counts[0][1::2])
+
+        self._refit_levels(mins, maxs)
+        self._built_area = self._leaf_area()
+        self.builds += 1
+
+    def _refit_levels(self, mins: np.ndarray, maxs: np.ndarray) -> None:
+        sorted_mins = mins[self.order]
+        sorted_maxs = maxs[self.order]
+        self.object_mins = sorted_mins
+        self.object_maxs = sorted_maxs
+
+        # folhas: reducao por grupos de leaf_size; folhas vazias ficam "invertidas"
+        n_leaves = 1 << self.depth
+        leaf_mins = np.full((n_leaves, 3), np.inf)
+        leaf_maxs = np.full((n_leaves, 3), -np.inf)
+        if self.count:
+            starts = np.arange(0, self.count, self.leaf_size)
+            leaf_mins[:len(starts)] = np.minimum.reduceat(sorted_mins, starts, axis=0)
+            leaf_maxs[:len(starts)] = np.maximum.reduceat(sorted_maxs, starts, axis=0)
+
+        self.mins: List[np.ndarray] = [leaf_mins]
+        self.maxs: List[np.ndarray] = [leaf_maxs]
+        for _ in range(self.depth):
+            below_min, below_max = self.mins[0], self.maxs[0]
+            self.mins.insert(0, np.minimum(below_min[0::2], below_min[1::2]))
+            self.maxs.insert(0, np.maximum(below_max[0::2], below_max[1::2]))
+
+    def _leaf_area(self) -> float:
+        filled = self.counts[-1] > 0
+        size = self.maxs[-1][filled] - self.mins[-1][filled]
+        return float((size[:, 0] * size[:, 1] + size[:, 1] * size[:, 2] + size[:, 2] * size[:, 0]).sum())
+
+    def refit(self, mins: np.ndarray, maxs: np.ndarray) -> bool:
+        # Atualiza as caixas (mesmos objetos, posicoes novas). Retorna True se
+        # a arvore piorou o bastante para ser reconstruida.
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+        if len(mins) != self.count:
+            self.build(mins, maxs)
+            return True
+
+        self._refit_levels(mins, maxs)
+        self.refits += 1
+        if self._leaf_area() > REBUILD_RATIO * max(self._built_area, 1e-12):
+            self.build(mins, maxs)
+            return True
+        return False
+
+    # -- culling --------------------------------------------------------------
+
+    def _ranges(self, level: int, nodes: np.ndarray) -> np.ndarray:
+        # Posicoes (na ordem de Morton) de todos os objetos sob os nos dados
+        span = self.leaf_size << (self.depth - level)
+        starts = nodes * span
+        counts = self.counts[level][nodes]
+        total = int(counts.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return np.arange(total) + offsets
+
+    def cull(self, frustum: Frustum) -> np.ndarray:
+        # Indices (na ordem original) dos objetos cuja caixa toca o frustum
+        stats = {"objects": self.count, "nodes_tested": 0, "objects_tested": 0,
+                 "culled": 0, "drawn": 0}
+        accepted = []
+        active = np.zeros(1 if self.count else 0, dtype=np.int64)
+
+        for level in range(self.depth + 1):
+            if not len(active):
+                break
+            stats["nodes_tested"] += len(active)
+            outside, inside = frustum.classify(self.mins[level][active], self.maxs[level][active])
+            accepted.append(self._ranges(level, active[inside & ~outside]))
+            partial = active[~outside & ~inside]
+
+            if level < self.depth:
+                children = np.concatenate((partial * 2, partial * 2 + 1))
+                active = np.sort(children[self.counts[level + 1][children] > 0])
+            else:
+                # folhas que cruzam algum plano: testa objeto a objeto
+                candidates = self._ranges(level, partial)
+                stats["objects_tested"] += len(candidates)
+                out, _ = frustum.classify(self.object_mins[candidates], self.object_maxs[candidates])
+                accepted.append(candidates[~out])
+
+        positions = np.concatenate(accepted) if accepted else np.zeros(0, dtype=np.int64)
+        visible = np.sort(self.order[positions])
+        stats["drawn"] = len(visible)
+        stats["culled"] = self.count - len(visible)
+        self.stats = stats
+        return visible
+
+    # -- raios ----------------------------------------------------------------
+
+    def intersect_ray(self, origin: np.ndarray, direction: np.ndarray,
+                      t_max: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        # Objetos (na ordem original) cuja caixa o raio atravessa ate t_max e
+        # o t de entrada em cada caixa, do mais proximo ao mais distante.
+        # Desce RAY_LEVEL_STEP niveis por vez (testa os netos/bisnetos direto,
+        # como uma arvore de 8 filhos): menos passos, cada um com mais caixas.
+        origin = np.asarray(origin, dtype=np.float64)
+        inv_direction = inverse_direction(direction)
+        level = min(RAY_START_LEVEL, self.depth)
+        active = np.flatnonzero(self.counts[level]) if self.count else np.zeros(0, dtype=np.int64)
+
+        while len(active):
+            hit, _ = ray_boxes(origin, inv_direction, self.mins[level][active], self.maxs[level][active], t_max)
+            active = active[hit]
+            if level == self.depth:
+                break
+            step = min(RAY_LEVEL_STEP, self.depth - level)
+            level += step
+            children = ((active[:, None] << step) + np.arange(1 << step)).ravel()
+            active = children[self.counts[level][children] > 0]
+
+        candidates = self._ranges(self.depth, active)
+        hit, t_enter = ray_boxes(origin, inv_direction, self.object_mins[candidates],
+                                 self.object_maxs[candidates], t_max)
+        order = np.argsort(t_enter[hit], kind="stable")
+        return self.order[candidates[hit][order]], np.maximum(t_enter[hit][order], 0.0)
+
+
+class SceneCuller:
+    # Mantem um BVH sobre todas as instancias de um SceneGraph (todos os tipos
+    # juntos) e devolve, por tipo, quais instancias estao no frustum.
+    # Reconstroi quando a estrutura do grafo muda e faz refit quando so as
+    # matrizes mudam.
+
+    def __init__(self, graph: SceneGraph,
+                 local_bounds: Callable[[str], Tuple[np.ndarray, np.ndarray]]) -> None:
+        self.graph = graph
+        self.local_bounds = local_bounds
+        self.bvh: Optional[BVH] = None
+        self._version = None
+        self._topology = None
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+
+    def _world_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        all_mins, all_maxs = [], []
+        start = 0
+        for kind in KINDS:
+            models = self.graph.instances(kind)
+            self._offsets[kind] = (start, start + len(models))
+            start += len(models)
+            if len(models):
+                lo, hi = self.local_bounds(kind)
+                mins, maxs = transform_aabbs(lo, hi, models)
+                all_mins.append(mins)
+                all_maxs.append(maxs)
+        if not all_mins:
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        return np.concatenate(all_mins), np.concatenate(all_maxs)
+
+    def update(self) -> None:
+        graph = self.graph
+        graph.update()
+        if graph.version == self._version:
+            return
+        mins, maxs = self._world_bounds()
+        if self.bvh is None or graph.topology_version != self._topology:
+            if self.bvh is None:
+                self.bvh = BVH(mins, maxs)
+            else:
+                self.bvh.build(mins, maxs)
+        else:
+            self.bvh.refit(mins, maxs)
+        self._version = graph.version
+        self._topology = graph.topology_version
+
+    def visible(self, frustum: Frustum) -> Dict[str, np.ndarray]:
+        # tipo -> indices das instancias visiveis (para graph.instances(tipo))
+        self.update()
+        visible = self.bvh.cull(frustum)
+        result = {}
+        for kind, (start, end) in self._offsets.items():
+            lo, hi = np.searchsorted(visible, (start, end))
+            result[kind] = visible[lo:hi] - start
+        return result
+
+    def intersect_ray(self, origin: np.ndarray, direction: np.ndarray,
+                      t_max: float = np.inf) -> List[Tuple[str, int, float]]:
+        # (tipo, indice da instancia, t de entrada) das instancias cuja caixa
+        # o raio atravessa, da mais proxima a mais distante
+        self.update()
+        indices, t_enter = self.bvh.intersect_ray(origin, direction, t_max)
+        starts = np.array([start for start, _ in self._offsets.values()])
+        kinds = list(self._offsets)
+        slots = np.searchsorted(starts, indices, side="right") - 1
+        return [(kinds[slot], int(index - starts[slot]), float(t))
+                for slot, index, t in zip(slots, indices, t_enter)]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.bvh.stats if self.bvh is not None else {}
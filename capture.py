@@ -0,0 +1,289 @@
+import ctypes
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _raw_read_pixels
+
+import images
+
+# Gravacao de frames sem travar o laco de desenho.
+# - capture() (chamado no fim do frame, antes da troca de buffers) so pede a
+#   copia: glReadPixels num pixel buffer object (PBO) de um anel de
+#   RING_SIZE buffers, seguido de um fence. A GPU faz a copia de forma
+#   assincrona e a CPU segue para o proximo frame.
+# - Os PBOs sao mapeados um ou dois frames depois, quando o fence ja sinalizou
+#   (glClientWaitSync com timeout 0). So se o anel inteiro estiver ocupado a
+#   CPU espera pelo mais antigo (contado em stalls).
+# - Os pixels mapeados vao para uma thread que grava (PNG com zlib, que libera
+#   o GIL, ou video bruto). Se a fila da thread estiver cheia o frame e
+#   descartado (dropped) em vez de segurar o laco do GLUT.
+# Latencias medidas a partir do fim do frame: ate o mapeamento do PBO
+# (readback) e ate o frame estar gravado (total).
+
+RING_SIZE = 3
+QUEUE_SIZE = 8
+WINDOW = 300
+
+FORMATS = ("png", "raw")
+
+
+class PngSequence:
+    # Um PNG por frame: <diretorio>/frame_000000.png ...
+
+    def __init__(self, directory: str, compression: int = 1) -> None:
+        self.directory = directory
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index: int, pixels: np.ndarray, timestamp: float) -> None:
+        images.write_png(os.path.join(self.directory, f"frame_{index:06d}.png"), pixels, self.compression)
+
+    def close(self) -> None:
+        pass
+
+
+class RawVideo:
+    # Frames RGB24 concatenados num arquivo, mais <arquivo>.json com tamanho e
+    # instante de cada frame. Converter, por exemplo, com:
+    #   ffmpeg -f rawvideo -pix_fmt rgb24 -s LxA -r 60 -i captura.rgb captura.mp4
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "wb")
+        self._size = None
+        self._frames: List[List[float]] = []
+
+    def write(self, index: int, pixels: np.ndarray, timestamp: float) -> None:
+        height, width = pixels.shape[:2]
+        if self._size is None:
+            self._size = (width, height)
+        elif self._size != (width, height):
+            # video bruto nao muda de tamanho: frames de outro tamanho ficam de fora
+            return
+        self._file.write(pixels.tobytes())
+        self._frames.append([index, timestamp])
+
+    def close(self) -> None:
+        self._file.close()
+        width, height = self._size or (0, 0)
+        with open(self.path + ".json", "w") as f:
+            json.dump({"width": width, "height": height, "pix_fmt": "rgb24",
+                       "frames": self._frames}, f, indent=1)
+
+
+def open_sink(path: str, fmt: str):
+    if fmt == "png":
+        return PngSequence(path)
+    if fmt == "raw":
+        return RawVideo(path)
+    raise ValueError(f"Formato de captura invalido: {fmt}")
+
+
+class _Slot:
+    # Um PBO do anel e o frame que ele esta recebendo
+
+    def __init__(self) -> None:
+        self.pbo = int(glGenBuffers(1))
+        self.fence = None
+        self.index = 0
+        self.timestamp = 0.0
+        self.size = (0, 0)
+
+
+class FrameCapture:
+
+    def __init__(self, sink, ring_size: int = RING_SIZE, queue_size: int = QUEUE_SIZE,
+                 window: int = WINDOW) -> None:
+        self.sink = sink
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.stalls = 0
+        # janelas deslizantes de latencia (segundos)
+        self.readback_latency: Deque[float] = deque(maxlen=window)
+        self.total_latency: Deque[float] = deque(maxlen=window)
+
+        self._slots = [_Slot() for _ in range(ring_size)]
+        self._next = 0
+        self._allocated = (0, 0)
+        self._start = time.perf_counter()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._worker = threading.Thread(target=self._run, name="frame-capture", daemon=True)
+        self._worker.start()
+
+    # -- laco de desenho --------------------------------------------------
+
+    def capture(self, width: int, height: int) -> None:
+        # Pede a copia do framebuffer de leitura atual (back buffer da janela
+        # ou FBO) e entrega a thread os frames anteriores que ja ficaram prontos
+        if self._error is not None:
+            raise RuntimeError(f"Erro gravando frames: {self._error}")
+        self._collect(wait=False)
+
+        slot = self._slots[self._next]
+        if slot.fence is not None:
+            # anel cheio: a GPU ainda nao terminou o frame mais antigo
+            self.stalls += 1
+            self._finish(slot, wait=True)
+
+        if (width, height) != self._allocated:
+            self._allocate(width, height)
+
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, slot.pbo)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        _raw_read_pixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        slot.fence = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        slot.index = self.captured
+        slot.timestamp = time.perf_counter()
+        slot.size = (width, height)
+        self.captured += 1
+        self._next = (self._next + 1) % len(self._slots)
+
+    def _allocate(self, width: int, height: int) -> None:
+        # Tamanho novo (reshape): entrega o que esta pendente e realoca os PBOs
+        self._collect(wait=True)
+        for slot in self._slots:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, slot.pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, width * height * 4, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._allocated = (width, height)
+
+    def _collect(self, wait: bool) -> None:
+        # Percorre o anel do frame mais antigo ao mais novo; sem wait para no
+        # primeiro que a GPU ainda nao terminou (os seguintes sao mais novos)
+        count = len(self._slots)
+        for offset in range(count):
+            slot = self._slots[(self._next + offset) % count]
+            if slot.fence is not None and not self._finish(slot, wait):
+                return
+
+    def _finish(self, slot: _Slot, wait: bool) -> bool:
+        if wait:
+            status = glClientWaitSync(slot.fence, GL_SYNC_FLUSH_COMMANDS_BIT, GL_TIMEOUT_IGNORED)
+        else:
+            status = glClientWaitSync(slot.fence, 0, 0)
+        if status not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED):
+            return False
+        glDeleteSync(slot.fence)
+        slot.fence = None
+
+        width, height = slot.size
+        size = width * height * 4
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, slot.pbo)
+        address = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, size, GL_MAP_READ_BIT)
+        pixels = np.frombuffer((ctypes.c_ubyte * size).from_address(address), dtype=np.uint8).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.readback_latency.append(time.perf_counter() - slot.timestamp)
+
+        item = (slot.index, slot.timestamp, pixels.reshape(height, width, 4))
+        if self._closing:
+            # no fim da gravacao nenhum frame pendente e descartado
+            self._queue.put(item)
+            return True
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # a thread nao esta dando conta: perde o frame, nao o laco de desenho
+            self.dropped += 1
+        return True
+
+    # -- thread de gravacao -----------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, timestamp, pixels = item
+            if self._error is not None:
+                continue
+            try:
+                # OpenGL guarda a linha 0 embaixo; sem o canal alfa
+                self.sink.write(index, pixels[::-1, :, :3], timestamp - self._start)
+            except Exception as error:
+                self._error = error
+                continue
+            self.written += 1
+            self.total_latency.append(time.perf_counter() - timestamp)
+
+    # -- estatisticas -----------------------------------------------------
+
+    @staticmethod
+    def _stats(samples: Deque[float]) -> Optional[Dict[str, float]]:
+        if not samples:
+            return None
+        data = np.fromiter(samples, dtype=np.float64) * 1e3
+        p50, p95 = np.percentile(data, (50, 95))
+        return {"p50_ms": float(p50), "p95_ms": float(p95), "mean_ms": float(data.mean())}
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.dropped,
+            "stalls": self.stalls,
+            "pending": self._queue.qsize(),
+            "readback": self._stats(self.readback_latency),
+            "total": self._stats(self.total_latency),
+        }
+
+    def overlay_line(self) -> str:
+        text = f"captura {self.written}/{self.captured} gravados  {self.dropped} perdidos"
+        total = self._stats(self.total_latency)
+        if total is not None:
+            text += f"  latencia {total['p50_ms']:.1f}/{total['p95_ms']:.1f} ms"
+        return text
+
+    def close(self) -> Dict[str, object]:
+        # Entrega os frames pendentes, espera a thread gravar tudo e libera os PBOs
+        self._closing = True
+        self._collect(wait=True)
+        self._queue.put(None)
+        self._worker.join()
+        self.sink.close()
+        glDeleteBuffers(len(self._slots), [slot.pbo for slot in self._slots])
+        self._slots = []
+        if self._error is not None:
+            raise RuntimeError(f"Erro gravando frames: {self._error}")
+        return self.summary()
+
+
+# Gravacao ativa (scene.display() chama capture() quando definida)
+recorder: Optional[FrameCapture] = None
+# Resumo da ultima gravacao encerrada por stop()
+last_summary: Optional[Dict[str, object]] = None
+
+
+def start(path: str, fmt: str = "png") -> FrameCapture:
+    global recorder
+    if recorder is not None:
+        stop()
+    recorder = FrameCapture(open_sink(path, fmt))
+    return recorder
+
+
+def stop() -> Optional[Dict[str, object]]:
+    # Termina a gravacao (precisa do contexto OpenGL ainda ativo)
+    global recorder, last_summary
+    if recorder is None:
+        return None
+    try:
+        last_summary = recorder.close()
+    finally:
+        recorder = None
+    return last_summary
@@ -0,0 +1,209 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from OpenGL.GL import *
+
+import light_clusters
+import shading
+import transforms
+from light_clusters import PointLights
+
+# Iluminacao Phong com centenas de luzes pontuais (clustered forward shading).
+# - As luzes (posicao no espaco de camera + raio, cor) ficam num uniform
+#   buffer object (bloco std140 PointLights, ponto de ligacao LIGHTS_BINDING).
+# - A grade de clusters ((offset, contagem) por cluster) e a lista de indices
+#   de luzes, montadas na CPU por light_clusters.assign_lights(), vao para dois
+#   texture buffers (GL 3.1) lidos com texelFetch no fragment shader.
+# - O fragment shader (shade() de LIGHTING_SRC) calcula a luz principal
+#   (uLightPos) como shading.PHONG_FRAGMENT_SRC e soma so as luzes pontuais
+#   do proprio cluster.
+# A distribuicao so e refeita quando as luzes, a camera, a projecao ou o
+# viewport mudam. Os programas combinam qualquer vertex shader Phong
+# (shading.py, instancing.py, formatos compactos) com FRAGMENT_SRC; ver
+# shading.lit_program().
+
+# Capacidade do bloco de luzes (ver light_clusters.MAX_LIGHTS)
+MAX_LIGHTS = light_clusters.MAX_LIGHTS
+LIGHTS_BINDING = 1
+
+# Unidades de textura dos texture buffers (a UI usa a unidade 0)
+GRID_TEXTURE_UNIT = 6
+INDEX_TEXTURE_UNIT = 7
+
+# Cabecalho dos shaders que usam LIGHTING_SRC (blocos uniformes e texture
+# buffers pedem GLSL 1.40; o contexto de compatibilidade mantem gl_FragColor etc.)
+GLSL_HEADER = "#version 140\n#define MAX_LIGHTS %d\n" % MAX_LIGHTS
+
+# Iluminacao compartilhada pelo fragment shader forward (FRAGMENT_SRC) e pela
+# resolucao do G-buffer (deferred.py). shade() calcula a luz principal
+# (uLightPos) exatamente como shading.PHONG_FRAGMENT_SRC e, com POINT_LIGHTS
+# definido, soma so as luzes pontuais do cluster do fragmento.
+LIGHTING_SRC = """
+    uniform vec3 uLightPos;
+    uniform vec3 uViewPos;
+    uniform vec3 uSpecularColor;
+    uniform float uShininess;
+    uniform float uAmbientStrength;
+    uniform float uDiffuseStrength;
+
+    #ifdef POINT_LIGHTS
+    layout(std140) uniform PointLights {
+        vec4 uPointPosRadius[MAX_LIGHTS];   // xyz em coordenadas de camera, w = raio
+        vec4 uPointColor[MAX_LIGHTS];
+    };
+
+    uniform usamplerBuffer uClusterGrid;    // (offset, contagem) por cluster
+    uniform usamplerBuffer uLightIndices;   // luzes de cada cluster, em sequencia
+    uniform ivec3 uClusterDims;
+    uniform vec4 uClusterParams;            // xy: clusters por pixel; z, w: escala e bias de log(d)
+    #endif
+
+    vec3 shade(vec3 pos, vec3 N, vec3 albedo) {
+        vec3 L = normalize(uLightPos - pos);
+        vec3 V = normalize(uViewPos - pos);
+        vec3 R = reflect(-L, N);
+
+        float diff = max(dot(N, L), 0.0);
+        float spec = 0.0;
+        if (diff > 0.0) {
+            spec = pow(max(dot(R, V), 0.0), uShininess);
+        }
+        vec3 color = uAmbientStrength * albedo + diff * uDiffuseStrength * albedo + spec * uSpecularColor;
+
+    #ifdef POINT_LIGHTS
+        // cluster do fragmento: tile na tela e fatia exponencial de profundidade
+        vec3 cell = vec3(gl_FragCoord.xy * uClusterParams.xy,
+                         log(max(-pos.z, 1e-6)) * uClusterParams.z + uClusterParams.w);
+        ivec3 c = clamp(ivec3(max(cell, 0.0)), ivec3(0), uClusterDims - 1);
+        uvec2 range = texelFetch(uClusterGrid, (c.z * uClusterDims.y + c.y) * uClusterDims.x + c.x).rg;
+
+        for (uint i = 0u; i < range.y; ++i) {
+            int index = int(texelFetch(uLightIndices, int(range.x + i)).r);
+            vec3 toLight = uPointPosRadius[index].xyz - pos;
+            float dist = length(toLight);
+            // queda suave que chega a zero no raio (o culling por cluster e exato)
+            float window = clamp(1.0 - pow(dist / uPointPosRadius[index].w, 4.0), 0.0, 1.0);
+            float attenuation = window * window / (1.0 + dist * dist);
+            vec3 Lp = toLight / max(dist, 1e-6);
+            float d = max(dot(N, Lp), 0.0);
+            float s = d > 0.0 ? pow(max(dot(reflect(-Lp, N), V), 0.0), uShininess) : 0.0;
+            color += attenuation * uPointColor[index].rgb * (d * uDiffuseStrength * albedo + s);
+        }
+    #endif
+        return color;
+    }
+"""
+
+FRAGMENT_SRC = GLSL_HEADER + "#define POINT_LIGHTS\n" + LIGHTING_SRC + """
+    varying vec3 vNormal;
+    varying vec3 vFragPos;
+    varying vec3 vColor;
+
+    void main() {
+        gl_FragColor = vec4(shade(vFragPos, normalize(vNormal), vColor), 1.0);
+    }
+"""
+
+shading.register_phong_fragment(FRAGMENT_SRC)
+
+
+class ClusteredLighting:
+    # Buffers na GPU + programas Phong com o fragment shader de clusters
+
+    def __init__(self, dims: Sequence[int] = light_clusters.GRID) -> None:
+        self.dims = tuple(dims)
+        self.count = 0
+        self.stats: Dict[str, int] = {}
+        self._programs: Dict[str, shading.ShaderProgram] = {}
+        self._bounds = None
+        self._bounds_key = None
+        self._key = None
+        self._params = (0.0, 0.0, 0.0, 0.0)
+
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, 2 * MAX_LIGHTS * 16, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+        self.grid_buffer, self.index_buffer = glGenBuffers(2)
+        self.grid_texture, self.index_texture = glGenTextures(2)
+        for buffer, texture, internal in ((self.grid_buffer, self.grid_texture, GL_RG32UI),
+                                          (self.index_buffer, self.index_texture, GL_R16UI)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buffer)
+            glBufferData(GL_TEXTURE_BUFFER, 16, None, GL_DYNAMIC_DRAW)
+            glBindTexture(GL_TEXTURE_BUFFER, texture)
+            glTexBuffer(GL_TEXTURE_BUFFER, internal, buffer)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def program(self, vertex_src: str,
+                attrib_locations: Optional[Dict[str, int]] = None) -> shading.ShaderProgram:
+        # Variante com luzes pontuais de um vertex shader Phong (criada no primeiro uso)
+        program = self._programs.get(vertex_src)
+        if program is None:
+            program = shading.ShaderProgram(vertex_src, FRAGMENT_SRC, attrib_locations)
+            block = glGetUniformBlockIndex(program.handle, "PointLights")
+            glUniformBlockBinding(program.handle, block, LIGHTS_BINDING)
+            self._programs[vertex_src] = program
+        return program
+
+    def update(self, lights: PointLights, view: np.ndarray, projection: np.ndarray,
+               viewport: Sequence[int], near: float, far: float) -> None:
+        # Refaz a distribuicao e reenvia os buffers se algo mudou desde o ultimo frame
+        key = (id(lights), lights.version, view.tobytes(), projection.tobytes(), tuple(viewport), near, far)
+        if key == self._key:
+            return
+        self._key = key
+        if len(lights) > MAX_LIGHTS:
+            raise ValueError(f"No maximo {MAX_LIGHTS} luzes pontuais")
+
+        self.count = len(lights)
+        positions = transforms.transform_points(view, lights.positions)[:, :3]
+        # caixas dos clusters: so dependem da projecao
+        if key[3:] != self._bounds_key:
+            self._bounds = light_clusters.cluster_bounds(projection, self.dims, near, far)
+            self._bounds_key = key[3:]
+        clusters = light_clusters.assign_lights(positions, lights.radii, projection,
+                                                self.dims, near, far, self._bounds)
+
+        if self.count:
+            glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+            position_radius = np.column_stack((positions, lights.radii)).astype(np.float32)
+            colors = np.column_stack((lights.colors, np.zeros(self.count))).astype(np.float32)
+            glBufferSubData(GL_UNIFORM_BUFFER, 0, position_radius.nbytes, position_radius)
+            glBufferSubData(GL_UNIFORM_BUFFER, MAX_LIGHTS * 16, colors.nbytes, colors)
+            glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+        indices = clusters.indices if len(clusters.indices) else np.zeros(1, dtype=np.uint16)
+        for buffer, data in ((self.grid_buffer, clusters.grid), (self.index_buffer, indices)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buffer)
+            glBufferData(GL_TEXTURE_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+        scale, bias = light_clusters.depth_params(self.dims, near, far)
+        self._params = (self.dims[0] / float(viewport[0]), self.dims[1] / float(viewport[1]), scale, bias)
+        self.stats = {"lights": self.count, "pairs": len(clusters.indices),
+                      "occupied": clusters.occupied, "clusters": len(clusters.grid)}
+
+    def apply_uniforms(self, program: shading.ShaderProgram) -> None:
+        # Liga o bloco de luzes e os texture buffers e envia os parametros da
+        # grade ao programa (que precisa estar ativo)
+        glBindBufferBase(GL_UNIFORM_BUFFER, LIGHTS_BINDING, self.ubo)
+        glActiveTexture(GL_TEXTURE0 + GRID_TEXTURE_UNIT)
+        glBindTexture(GL_TEXTURE_BUFFER, self.grid_texture)
+        glActiveTexture(GL_TEXTURE0 + INDEX_TEXTURE_UNIT)
+        glBindTexture(GL_TEXTURE_BUFFER, self.index_texture)
+        glActiveTexture(GL_TEXTURE0)
+
+        program.set_uniform("uClusterGrid", GRID_TEXTURE_UNIT)
+        program.set_uniform("uLightIndices", INDEX_TEXTURE_UNIT)
+        program.set_uniform("uClusterDims", *self.dims)
+        program.set_uniform("uClusterParams", *self._params)
+
+    def delete(self) -> None:
+        for program in self._programs.values():
+            program.delete()
+        self._programs.clear()
+        glDeleteBuffers(3, [self.ubo, self.grid_buffer, self.index_buffer])
+        glDeleteTextures(2, [self.grid_texture, self.index_texture])
+        self._key = None
@@ -0,0 +1,200 @@
+from typing import Dict, Optional
+
+from OpenGL.GL import *
+
+import clustered_shading
+import glstate
+import shading
+from framebuffer import Framebuffer
+
+# Modo de sombreamento "deferred" (G-buffer).
+# 1. Passo de geometria: os mesmos vertex shaders Phong (shading.py,
+#    instancing.py, formatos compactos) com GBUFFER_FRAGMENT_SRC, que grava em
+#    tres alvos (MRT) do G-buffer: albedo, normal e posicao no espaco de camera.
+#    Nenhuma iluminacao e calculada aqui, entao fragmentos sobrepostos
+#    (overdraw) custam so a escrita.
+# 2. Resolucao: um quad de tela inteira le o G-buffer com texelFetch e chama
+#    shade() de clustered_shading.LIGHTING_SRC uma vez por pixel: luz
+#    principal e, se houver, as luzes pontuais do cluster do pixel.
+# Sem luzes pontuais o resultado e o do Phong forward (a cor passa por 8 bits).
+# shading.lit_program() escolhe os programas do G-buffer quando o modo atual e
+# "deferred"; scene.py chama begin_frame() antes de desenhar e resolve() depois.
+
+# Alvos do G-buffer: albedo (alfa 0 = fundo), normal octaedrica (2 x 16 bits,
+# mais precisa que 3 x float16 e com metade dos bytes) e posicao (xyz de camera)
+GBUFFER_FORMATS = (GL_RGBA8, GL_RG16, GL_RGBA32F)
+
+# Unidades de textura das tres texturas do G-buffer na resolucao
+GBUFFER_TEXTURE_UNITS = (0, 1, 2)
+
+# Mesma projecao octaedrica de vertex_formats.octahedral_encode(), levada de
+# [-1, 1] para [0, 1] (alvo unorm)
+GBUFFER_FRAGMENT_SRC = """
+    varying vec3 vNormal;
+    varying vec3 vFragPos;
+    varying vec3 vColor;
+
+    vec2 encodeNormal(vec3 n) {
+        n /= abs(n.x) + abs(n.y) + abs(n.z);
+        vec2 e = n.xy;
+        if (n.z < 0.0) {
+            e = (1.0 - abs(n.yx)) * vec2(n.x >= 0.0 ? 1.0 : -1.0, n.y >= 0.0 ? 1.0 : -1.0);
+        }
+        return e * 0.5 + 0.5;
+    }
+
+    void main() {
+        gl_FragData[0] = vec4(vColor, 1.0);
+        gl_FragData[1] = vec4(encodeNormal(normalize(vNormal)), 0.0, 0.0);
+        gl_FragData[2] = vec4(vFragPos, 1.0);
+    }
+"""
+
+# Quad em coordenadas de recorte, sem matrizes
+_RESOLVE_VERTEX_SRC = """
+    void main() {
+        gl_Position = gl_Vertex;
+    }
+"""
+
+_RESOLVE_FRAGMENT_SRC = clustered_shading.LIGHTING_SRC + """
+    uniform sampler2D uAlbedo;
+    uniform sampler2D uNormal;
+    uniform sampler2D uPosition;
+
+    vec3 decodeNormal(vec2 e) {
+        e = e * 2.0 - 1.0;
+        vec3 n = vec3(e, 1.0 - abs(e.x) - abs(e.y));
+        float t = max(-n.z, 0.0);
+        n.x += n.x >= 0.0 ? -t : t;
+        n.y += n.y >= 0.0 ? -t : t;
+        return normalize(n);
+    }
+
+    void main() {
+        ivec2 p = ivec2(gl_FragCoord.xy);
+        vec4 albedo = texelFetch(uAlbedo, p, 0);
+        if (albedo.a == 0.0) {
+            discard;   // fundo: fica a cor de glClear do framebuffer de destino
+        }
+        vec3 pos = texelFetch(uPosition, p, 0).xyz;
+        vec3 N = decodeNormal(texelFetch(uNormal, p, 0).xy);
+        gl_FragColor = vec4(shade(pos, N, albedo.rgb), 1.0);
+    }
+"""
+
+
+def _resolve_fragment_src(point_lights: bool) -> str:
+    header = clustered_shading.GLSL_HEADER + ("#define POINT_LIGHTS\n" if point_lights else "")
+    return header + _RESOLVE_FRAGMENT_SRC
+
+
+shading.register_phong_fragment(GBUFFER_FRAGMENT_SRC)
+for _point_lights in (False, True):
+    shading.register_variant(_RESOLVE_VERTEX_SRC, _resolve_fragment_src(_point_lights))
+
+
+class DeferredRenderer:
+    # G-buffer do tamanho da janela + programas de geometria e de resolucao
+
+    def __init__(self) -> None:
+        self.gbuffer: Optional[Framebuffer] = None
+        self._programs: Dict[str, shading.ShaderProgram] = {}
+        # com/sem luzes pontuais -> programa de resolucao
+        self._resolve_programs: Dict[bool, shading.ShaderProgram] = {}
+        self._target = 0
+
+    def program(self, vertex_src: str, attrib_locations=None) -> shading.ShaderProgram:
+        # Variante de um vertex shader Phong que grava o G-buffer (criada no primeiro uso)
+        program = self._programs.get(vertex_src)
+        if program is None:
+            program = shading.ShaderProgram(vertex_src, GBUFFER_FRAGMENT_SRC, attrib_locations)
+            self._programs[vertex_src] = program
+        return program
+
+    def _resolve_program(self, point_lights: bool) -> shading.ShaderProgram:
+        program = self._resolve_programs.get(point_lights)
+        if program is None:
+            program = shading.ShaderProgram(_RESOLVE_VERTEX_SRC, _resolve_fragment_src(point_lights))
+            if point_lights:
+                block = glGetUniformBlockIndex(program.handle, "PointLights")
+                glUniformBlockBinding(program.handle, block, clustered_shading.LIGHTS_BINDING)
+            self._resolve_programs[point_lights] = program
+        return program
+
+    def begin(self, width: int, height: int) -> None:
+        # Passa a desenhar no G-buffer (limpo); guarda o framebuffer de destino
+        self._target = int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+        if self.gbuffer is None:
+            self.gbuffer = Framebuffer(width, height, GBUFFER_FORMATS)
+        else:
+            self.gbuffer.resize(width, height)
+        self.gbuffer.bind()
+        # glClearBuffer nao mexe na cor de fundo (glClearColor) da cena
+        for i in range(len(GBUFFER_FORMATS)):
+            glClearBufferfv(GL_COLOR, i, (0.0, 0.0, 0.0, 0.0))
+        glClear(GL_DEPTH_BUFFER_BIT)
+
+    def resolve(self, light_pos, view_pos,
+                lighting: Optional[clustered_shading.ClusteredLighting] = None) -> None:
+        # Volta ao framebuffer de destino e ilumina cada pixel coberto do G-buffer
+        glBindFramebuffer(GL_FRAMEBUFFER, self._target)
+        program = self._resolve_program(lighting is not None)
+        program.use()
+        shading.apply_phong_uniforms(program, light_pos, view_pos)
+        if lighting is not None:
+            lighting.apply_uniforms(program)
+
+        for unit, texture, name in zip(GBUFFER_TEXTURE_UNITS, self.gbuffer.textures,
+                                       ("uAlbedo", "uNormal", "uPosition")):
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_2D, texture)
+            program.set_uniform(name, unit)
+
+        glstate.push_attrib(GL_ENABLE_BIT)
+        glstate.disable(GL_DEPTH_TEST)
+        glBegin(GL_QUADS)
+        glVertex2f(-1.0, -1.0)
+        glVertex2f(1.0, -1.0)
+        glVertex2f(1.0, 1.0)
+        glVertex2f(-1.0, 1.0)
+        glEnd()
+        glstate.pop_attrib()
+
+        for unit in reversed(GBUFFER_TEXTURE_UNITS):
+            glActiveTexture(GL_TEXTURE0 + unit)
+            glBindTexture(GL_TEXTURE_2D, 0)
+
+    def delete(self) -> None:
+        for program in list(self._programs.values()) + list(self._resolve_programs.values()):
+            program.delete()
+        self._programs.clear()
+        self._resolve_programs.clear()
+        if self.gbuffer is not None:
+            self.gbuffer.delete()
+            self.gbuffer = None
+
+
+# Instancia criada no primeiro frame em modo deferred
+renderer: Optional[DeferredRenderer] = None
+
+
+def begin_frame(width: int, height: int) -> None:
+    global renderer
+    if renderer is None:
+        renderer = DeferredRenderer()
+    shading.deferred_renderer = renderer
+    renderer.begin(width, height)
+
+
+def resolve(light_pos, view_pos, lighting: Optional[clustered_shading.ClusteredLighting] = None) -> None:
+    renderer.resolve(light_pos, view_pos, lighting)
+
+
+def release() -> None:
+    # Libera G-buffer e programas (antes de destruir o contexto OpenGL)
+    global renderer
+    if renderer is not None:
+        renderer.delete()
+        renderer = None
+    shading.deferred_renderer = None
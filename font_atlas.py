@@ -0,0 +1,242 @@
+import ctypes
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from OpenGL.GL import *
+
+import glstate
+from framebuffer import Framebuffer
+
+# Atlas de glifos para o texto da UI.
+# Os caracteres ASCII imprimiveis da fonte bitmap do GLUT sao desenhados uma
+# unica vez com glutBitmapCharacter num FBO; o resultado vira uma textura
+# GL_ALPHA. Depois disso cada texto e uma lista de quads texturizados, e todos
+# os textos de um frame saem num unico glDrawArrays.
+# Com GL_NEAREST, quads em coordenadas inteiras e teste de alfa o resultado e
+# pixel a pixel igual ao de glutBitmapCharacter.
+
+# Fonte padrao: GLUT_BITMAP_HELVETICA_18. O GLUT so e importado quando o
+# atlas e criado (a UI nao e desenhada no modo headless).
+FONT = "GLUT_BITMAP_HELVETICA_18"
+FIRST_CHAR = 32
+LAST_CHAR = 126
+
+# Celula de cada glifo no atlas: folga horizontal e altura total, com a linha
+# de base BASELINE pixels acima da borda de baixo (a fonte desce ate 5 px)
+PAD_X = 2
+CELL_HEIGHT = 28
+BASELINE = 8
+ATLAS_WIDTH = 512
+
+# Textos com layout guardado (a UI repete os mesmos rotulos todo frame)
+MAX_LAYOUTS = 256
+
+# Cada vertice: x, y, u, v
+_FLOATS_PER_VERTEX = 4
+
+
+class GlyphAtlas:
+
+    def __init__(self, font=FONT) -> None:
+        from OpenGL import GLUT
+
+        self._glut = GLUT
+        self.font = getattr(GLUT, font) if isinstance(font, str) else font
+        # caractere -> (x da celula no atlas, y da celula, avanco em pixels)
+        self.glyphs: Dict[str, Tuple[int, int, int]] = {}
+        self.width = ATLAS_WIDTH
+        self.height = 0
+        self.texture: Optional[int] = None
+        self._layouts: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.layout_hits = 0
+        self.layout_misses = 0
+        self._bake()
+
+    def _pack(self) -> None:
+        x = y = 0
+        for code in range(FIRST_CHAR, LAST_CHAR + 1):
+            advance = self._glut.glutBitmapWidth(self.font, code)
+            cell_w = advance + 2 * PAD_X
+            if x + cell_w > self.width:
+                x = 0
+                y += CELL_HEIGHT
+            self.glyphs[chr(code)] = (x, y, advance)
+            x += cell_w
+        # altura em potencia de dois, por compatibilidade com drivers antigos
+        needed = y + CELL_HEIGHT
+        self.height = 1
+        while self.height < needed:
+            self.height *= 2
+
+    def _bake(self) -> None:
+        self._pack()
+
+        # Salva o que o FBO vai alterar: framebuffer atual, viewport e matrizes
+        previous_draw = int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+        previous_read = int(glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING))
+        viewport = glGetIntegerv(GL_VIEWPORT)
+        glstate.push_attrib(GL_ENABLE_BIT | GL_CURRENT_BIT | GL_COLOR_BUFFER_BIT)
+        glstate.use_program(0)
+        glstate.disable(GL_LIGHTING)
+        glstate.disable(GL_DEPTH_TEST)
+        glstate.disable(GL_TEXTURE_2D)
+
+        fbo = Framebuffer(self.width, self.height, depth=False)
+        fbo.bind()
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+
+        glstate.matrix_mode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.width, 0, self.height, -1, 1)
+        glstate.matrix_mode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        for ch, (x, y, _) in self.glyphs.items():
+            glRasterPos2f(x + PAD_X, y + BASELINE)
+            self._glut.glutBitmapCharacter(self.font, ord(ch))
+
+        glPopMatrix()
+        glstate.matrix_mode(GL_PROJECTION)
+        glPopMatrix()
+        glstate.matrix_mode(GL_MODELVIEW)
+
+        # read_pixels devolve a linha 0 no topo; a textura quer a linha 0 embaixo
+        alpha = np.ascontiguousarray(fbo.read_pixels()[::-1, :, 0])
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, previous_draw)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, previous_read)
+        glViewport(*viewport)
+        fbo.delete()
+        glstate.pop_attrib()
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA8, self.width, self.height, 0,
+                     GL_ALPHA, GL_UNSIGNED_BYTE, alpha)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def text_width(self, text: str) -> int:
+        return sum(self.glyphs[ch][2] for ch in text if ch in self.glyphs)
+
+    def layout(self, text: str) -> np.ndarray:
+        # Quads (4 vertices x, y, u, v por caractere) com a origem na posicao
+        # inicial da linha de base, como em glRasterPos + glutBitmapCharacter
+        cached = self._layouts.get(text)
+        if cached is not None:
+            self._layouts.move_to_end(text)
+            self.layout_hits += 1
+            return cached
+        self.layout_misses += 1
+
+        cells = np.array([self.glyphs[ch] for ch in text if ch in self.glyphs],
+                         dtype=np.float32).reshape(-1, 3)
+        if not len(cells):
+            # texto vazio ou so com caracteres fora do atlas: nada a desenhar
+            quads = np.zeros((0, _FLOATS_PER_VERTEX), dtype=np.float32)
+            quads.setflags(write=False)
+            self._cache_layout(text, quads)
+            return quads
+        cell_x, cell_y, advance = cells.T
+        pen = np.concatenate(([0.0], np.cumsum(advance)[:-1])).astype(np.float32)
+
+        x0 = pen - PAD_X
+        x1 = x0 + advance + 2 * PAD_X
+        y0 = np.full_like(x0, -BASELINE)
+        y1 = y0 + CELL_HEIGHT
+        u0 = cell_x / self.width
+        u1 = (cell_x + advance + 2 * PAD_X) / self.width
+        v0 = cell_y / self.height
+        v1 = (cell_y + CELL_HEIGHT) / self.height
+
+        quads = np.stack([
+            np.stack([x0, y0, u0, v0], axis=1),
+            np.stack([x1, y0, u1, v0], axis=1),
+            np.stack([x1, y1, u1, v1], axis=1),
+            np.stack([x0, y1, u0, v1], axis=1),
+        ], axis=1).reshape(-1, _FLOATS_PER_VERTEX)
+        quads.setflags(write=False)
+        self._cache_layout(text, quads)
+        return quads
+
+    def _cache_layout(self, text: str, quads: np.ndarray) -> None:
+        self._layouts[text] = quads
+        if len(self._layouts) > MAX_LAYOUTS:
+            self._layouts.popitem(last=False)
+
+    def build_batch(self, items: Iterable[Tuple[float, float, str]]) -> np.ndarray:
+        # Junta varios textos (x, y, texto) num unico array de vertices
+        parts = []
+        for x, y, text in items:
+            quads = self.layout(text)
+            if len(quads):
+                parts.append(quads + np.array((x, y, 0.0, 0.0), dtype=np.float32))
+        if not parts:
+            return np.zeros((0, _FLOATS_PER_VERTEX), dtype=np.float32)
+        return np.concatenate(parts)
+
+    def draw(self, items: Iterable[Tuple[float, float, str]]) -> None:
+        # Desenha todos os textos na cor atual (glColor) com um glDrawArrays.
+        # Espera projecao ortografica em pixels, como a da UI.
+        vertices = self.build_batch(items)
+        if not len(vertices):
+            return
+
+        glstate.push_attrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT)
+        glstate.enable(GL_TEXTURE_2D)
+        glstate.enable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.5)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        # ponteiros crus: vertices continua vivo ate o fim do glDrawArrays
+        stride = _FLOATS_PER_VERTEX * 4
+        base = vertices.ctypes.data
+        glVertexPointer(2, GL_FLOAT, stride, ctypes.c_void_p(base))
+        glTexCoordPointer(2, GL_FLOAT, stride, ctypes.c_void_p(base + 2 * 4))
+        glDrawArrays(GL_QUADS, 0, len(vertices))
+        glPopClientAttrib()
+
+        # GL_TEXTURE_BIT tambem restaura a textura que estava ligada
+        glstate.pop_attrib()
+
+    def delete(self) -> None:
+        if self.texture is not None:
+            glDeleteTextures(1, [self.texture])
+            self.texture = None
+        self._layouts.clear()
+
+
+# Atlas criado no primeiro uso (precisa de contexto OpenGL e do GLUT iniciado)
+_atlas: Optional[GlyphAtlas] = None
+
+
+def get_atlas() -> GlyphAtlas:
+    global _atlas
+    if _atlas is None:
+        _atlas = GlyphAtlas()
+    return _atlas
+
+
+def draw_texts(items: Iterable[Tuple[float, float, str]]) -> None:
+    get_atlas().draw(items)
+
+
+def release() -> None:
+    # Libera a textura (usar antes de destruir o contexto OpenGL)
+    global _atlas
+    if _atlas is not None:
+        _atlas.delete()
+        _atlas = None
@@ -0,0 +1,106 @@
+from typing import Optional, Sequence
+
+import numpy as np
+from OpenGL.GL import *
+
+# Formato externo (formato, tipo, canais, dtype NumPy) usado para ler cada formato interno
+_READ_FORMATS = {
+    GL_RGBA8: (GL_RGBA, GL_UNSIGNED_BYTE, 4, np.uint8),
+    GL_RGB8: (GL_RGB, GL_UNSIGNED_BYTE, 3, np.uint8),
+    GL_RGBA16F: (GL_RGBA, GL_FLOAT, 4, np.float32),
+    GL_RGB16F: (GL_RGB, GL_FLOAT, 3, np.float32),
+    GL_RGBA32F: (GL_RGBA, GL_FLOAT, 4, np.float32),
+    GL_RGB32F: (GL_RGB, GL_FLOAT, 3, np.float32),
+}
+
+
+class Framebuffer:
+    # FBO com uma ou mais texturas de cor e um renderbuffer de profundidade.
+    # As texturas podem ser lidas de volta (read_pixels) ou usadas em outros passes.
+
+    def __init__(self, width: int, height: int, color_formats: Sequence[int] = (GL_RGBA8,),
+                 depth: bool = True) -> None:
+        self.width = width
+        self.height = height
+        self.color_formats = tuple(color_formats)
+        self.has_depth = depth
+
+        self.fbo = glGenFramebuffers(1)
+        self.textures = []
+        self.depth_rb: Optional[int] = None
+        self._allocate()
+
+    def _allocate(self) -> None:
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+        for i, fmt in enumerate(self.color_formats):
+            tex = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, tex)
+            ext_format, ext_type, _, _ = _READ_FORMATS.get(fmt, (GL_RGBA, GL_UNSIGNED_BYTE, 4, np.uint8))
+            glTexImage2D(GL_TEXTURE_2D, 0, fmt, self.width, self.height, 0, ext_format, ext_type, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0 + i, GL_TEXTURE_2D, tex, 0)
+            self.textures.append(tex)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        if self.has_depth:
+            self.depth_rb = glGenRenderbuffers(1)
+            glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rb)
+            glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, self.width, self.height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, self.depth_rb)
+            glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        # Com varias texturas de cor (MRT) o fragment shader escreve em todas
+        if len(self.textures) > 1:
+            glDrawBuffers(len(self.textures), [GL_COLOR_ATTACHMENT0 + i for i in range(len(self.textures))])
+
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"Framebuffer incompleto: 0x{int(status):x}")
+
+    def _release(self) -> None:
+        if self.textures:
+            glDeleteTextures(len(self.textures), self.textures)
+        if self.depth_rb is not None:
+            glDeleteRenderbuffers(1, [self.depth_rb])
+        self.textures = []
+        self.depth_rb = None
+
+    def resize(self, width: int, height: int) -> None:
+        if (width, height) == (self.width, self.height):
+            return
+        self._release()
+        self.width, self.height = width, height
+        self._allocate()
+
+    def bind(self) -> None:
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    @staticmethod
+    def unbind() -> None:
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def read_pixels(self, attachment: int = 0) -> np.ndarray:
+        # Le uma textura de cor como array (altura, largura, canais), linha 0 no topo
+        ext_format, ext_type, channels, dtype = _READ_FORMATS[self.color_formats[attachment]]
+        # restaura a leitura anterior (capture.py le do framebuffer de leitura atual)
+        previous = int(glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING))
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glReadBuffer(GL_COLOR_ATTACHMENT0 + attachment)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        data = glReadPixels(0, 0, self.width, self.height, ext_format, ext_type)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, previous)
+
+        pixels = np.frombuffer(data, dtype=dtype).reshape(self.height, self.width, channels)
+        # OpenGL guarda a linha 0 embaixo; imagens usam a linha 0 em cima
+        return pixels[::-1].copy()
+
+    def delete(self) -> None:
+        self._release()
+        glDeleteFramebuffers(1, [self.fbo])
+        self.fbo = 0
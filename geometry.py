@@ -0,0 +1,153 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+import tessellation
+
+# Dados de vertices dos objetos da cena, sem nenhuma dependencia de OpenGL.
+# objects3d envia esses arrays para a GPU (VBO) e o renderizador em software
+# (software_renderer.py) os rasteriza diretamente, mesmo sem GL disponivel.
+
+# Cores base de cada objeto (modo imediato, malhas em VBO e renderizador em software)
+CUBE_COLOR = (0.8, 0.2, 0.2)
+PYRAMID_COLOR = (0.2, 0.7, 0.2)
+CYLINDER_COLOR = (0.2, 0.4, 0.8)
+SPHERE_COLOR = (0.7, 0.7, 0.1)
+
+# Parametros de tesselacao das quadricas: (raio, slices, stacks)
+CYLINDER_RADIUS = 0.7
+CYLINDER_HEIGHT = 2.0
+CYLINDER_DETAIL = (32, 8)
+SPHERE_RADIUS = 1.2
+SPHERE_DETAIL = (40, 40)
+
+# Layout intercalado dos vertices: posicao (3) + normal (3) + cor (3), float32
+FLOATS_PER_VERTEX = 9
+
+# Eixos de referencia desenhados por objects3d.draw_axes(): (inicio, fim, cor)
+AXES = (
+    ((-5.0, 0.0, 0.0), (5.0, 0.0, 0.0), (1.0, 0.0, 0.0)),
+    ((0.0, -5.0, 0.0), (0.0, 5.0, 0.0), (0.0, 1.0, 0.0)),
+    ((0.0, 0.0, -5.0), (0.0, 0.0, 5.0), (0.0, 0.0, 1.0)),
+)
+
+
+def interleave(positions: np.ndarray, normals: np.ndarray, colors) -> np.ndarray:
+    # Monta o array intercalado [pos | normal | cor] a partir de arrays separados.
+    # colors pode ser um array (N, 3) ou uma unica cor (r, g, b) para toda a malha.
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.float32), positions.shape)
+    return np.hstack((positions, normals, colors)).astype(np.float32)
+
+
+def _quads_to_triangles(quads: np.ndarray) -> np.ndarray:
+    # (F, 4, 3) -> (F * 6, 3): cada quad v0 v1 v2 v3 vira (v1 v2 v3) e (v0 v1 v3).
+    # Os dois triangulos terminam em v3, o vertice provocante do GL_QUADS,
+    # entao o sombreamento flat fica identico ao do modo imediato.
+    return quads[:, [1, 2, 3, 0, 1, 3]].reshape(-1, 3)
+
+
+def cube_vertex_data() -> np.ndarray:
+    s = 1.0
+    # mesmas faces (e mesma ordem de vertices) de draw_cube()
+    quads = np.array([
+        [(-s, -s, s), (s, -s, s), (s, s, s), (-s, s, s)],        # frente
+        [(-s, -s, -s), (-s, s, -s), (s, s, -s), (s, -s, -s)],    # tras
+        [(-s, -s, -s), (-s, -s, s), (-s, s, s), (-s, s, -s)],    # esquerda
+        [(s, -s, -s), (s, s, -s), (s, s, s), (s, -s, s)],        # direita
+        [(-s, s, -s), (-s, s, s), (s, s, s), (s, s, -s)],        # topo
+        [(-s, -s, -s), (s, -s, -s), (s, -s, s), (-s, -s, s)],    # base
+    ], dtype=np.float32)
+    face_normals = np.array([
+        (0.0, 0.0, 1.0), (0.0, 0.0, -1.0), (-1.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, -1.0, 0.0),
+    ], dtype=np.float32)
+
+    positions = _quads_to_triangles(quads)
+    normals = np.repeat(face_normals, 6, axis=0)
+    return interleave(positions, normals, CUBE_COLOR)
+
+
+def pyramid_vertex_data() -> np.ndarray:
+    s = 1.0
+    h = 1.5
+    v0, v1, v2, v3 = (-s, 0.0, -s), (s, 0.0, -s), (s, 0.0, s), (-s, 0.0, s)
+    top = (0.0, h, 0.0)
+
+    # mesmas faces de draw_pyramid(): 4 laterais + base (quad -> 2 triangulos)
+    sides = np.array([
+        (v0, v1, top), (v1, v2, top), (v2, v3, top), (v3, v0, top),
+    ], dtype=np.float32).reshape(-1, 3)
+    base = _quads_to_triangles(np.array([(v0, v1, v2, v3)], dtype=np.float32))
+
+    side_normals = np.array([
+        (0.0, 0.6, -0.8), (0.8, 0.6, 0.0), (0.0, 0.6, 0.8), (-0.8, 0.6, 0.0),
+    ], dtype=np.float32)
+    normals = np.vstack((
+        np.repeat(side_normals, 3, axis=0),
+        np.tile((0.0, -1.0, 0.0), (6, 1)),
+    ))
+
+    positions = np.vstack((sides, base))
+    return interleave(positions, normals, PYRAMID_COLOR)
+
+
+def cylinder_vertex_data(slices: int, stacks: int):
+    # Cilindro tesselado em NumPy (tessellation.py), ao longo de +Y como em draw_cylinder().
+    # Retorna (vertices intercalados, indices).
+    mesh = tessellation.get("cylinder", CYLINDER_RADIUS, slices, stacks, height=CYLINDER_HEIGHT)
+
+    # mesma rotacao de draw_cylinder(): glRotatef(-90, 1, 0, 0) leva (x, y, z) em (x, z, -y)
+    rot = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]], dtype=np.float32)
+    vertices = interleave(mesh.positions @ rot.T, mesh.normals @ rot.T, CYLINDER_COLOR)
+    return vertices, mesh.indices
+
+
+def sphere_vertex_data(slices: int, stacks: int):
+    mesh = tessellation.get("sphere", SPHERE_RADIUS, slices, stacks)
+    return interleave(mesh.positions, mesh.normals, SPHERE_COLOR), mesh.indices
+
+
+def vertex_data(name: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    # (vertices intercalados, indices ou None) do objeto com os parametros padrao
+    if name == "cube":
+        return cube_vertex_data(), None
+    if name == "pyramid":
+        return pyramid_vertex_data(), None
+    if name == "cylinder":
+        return cylinder_vertex_data(*CYLINDER_DETAIL)
+    if name == "sphere":
+        return sphere_vertex_data(*SPHERE_DETAIL)
+    raise KeyError(f"Objeto desconhecido: {name}")
+
+
+def smooth_normals(positions: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # Normais por vertice: media das normais das faces vizinhas, ponderada pela
+    # area (o produto vetorial nao normalizado ja tem modulo 2 * area)
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(indices).reshape(-1, 3)
+    p = positions[indices]
+    face = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    corners = indices.ravel()
+    normals = np.stack([np.bincount(corners, np.repeat(face[:, axis], 3), len(positions))
+                        for axis in range(3)], axis=1)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(length > 0, length, 1.0)
+
+
+def vertex_bounds(vertices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Caixa alinhada aos eixos (min, max) das posicoes de um array intercalado
+    positions = np.asarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)[:, :3]
+    return positions.min(axis=0), positions.max(axis=0)
+
+
+_bounds_cache = {}
+
+
+def object_bounds(name: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Caixa (min, max) no espaco do objeto, com os parametros padrao
+    bounds = _bounds_cache.get(name)
+    if bounds is None:
+        bounds = _bounds_cache[name] = vertex_bounds(vertex_data(name)[0])
+    return bounds
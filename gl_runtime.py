@@ -0,0 +1,128 @@
+import ctypes
+import importlib.util
+import os
+import sys
+import traceback
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Perfil de execucao do PyOpenGL, escolhido antes do primeiro import de
+# OpenGL.GL (as flags abaixo so valem para funcoes criadas depois delas).
+# - "release" (padrao): sem glGetError apos cada chamada (ERROR_CHECKING),
+#   sem log de erros, sem checagem de contexto atual e de tamanho de arrays.
+#   Usa o OpenGL_accelerate (wrappers em Cython) quando instalado.
+# - "debug": mantem a checagem do PyOpenGL (GLError na propria chamada) e
+#   pede um contexto de debug; install_debug_output() (scene.init_gl) liga o
+#   callback de GL_KHR_debug, que registra erros, avisos de desempenho e do
+#   compilador de shaders com o texto do driver e a pilha Python da chamada.
+# TG3D_GL_PROFILE define o perfil padrao (main.py: --gl-profile).
+
+PROFILES = ("release", "debug")
+
+profile: Optional[str] = None
+
+# Ultimas mensagens do callback: (tipo, severidade, texto)
+messages: Deque[Tuple[str, str, str]] = deque(maxlen=100)
+# Mensagens recebidas por tipo ("error", "performance", ...)
+message_counts: Dict[str, int] = {}
+
+# Referencia ao callback ctypes (precisa viver enquanto o contexto existir)
+_callback = None
+
+_RELEASE_FLAGS = {
+    "ERROR_CHECKING": False,
+    "ERROR_LOGGING": False,
+    "CONTEXT_CHECKING": False,
+    "ARRAY_SIZE_CHECKING": False,
+    "USE_ACCELERATE": True,
+}
+
+
+def default_profile() -> str:
+    return os.environ.get("TG3D_GL_PROFILE", "release")
+
+
+def select_profile(name: Optional[str] = None) -> str:
+    # Configura as flags do PyOpenGL; so tem efeito antes do primeiro import de OpenGL.GL
+    # (sem nome: mantem o perfil ja escolhido ou usa o padrao)
+    global profile
+    name = name or profile or default_profile()
+    if name not in PROFILES:
+        raise ValueError(f"Perfil OpenGL invalido: {name}")
+    if profile == name:
+        return name
+    if "OpenGL.GL" in sys.modules:
+        raise RuntimeError(
+            f"OpenGL.GL ja foi importado com o perfil {profile!r}; "
+            f"selecione o perfil {name!r} antes de importar OpenGL"
+        )
+
+    import OpenGL
+    if name == "release":
+        for flag, value in _RELEASE_FLAGS.items():
+            setattr(OpenGL, flag, value)
+    profile = name
+    return name
+
+
+def accelerated() -> bool:
+    # True se o OpenGL_accelerate esta instalado (e portanto em uso)
+    return importlib.util.find_spec("OpenGL_accelerate") is not None
+
+
+def debug_context() -> bool:
+    # O contexto a criar deve ser de debug (EGL_CONTEXT_OPENGL_DEBUG, GLUT_DEBUG)
+    return profile == "debug"
+
+
+def _enum_name(value: int) -> str:
+    from OpenGL.GL import (GL_DEBUG_TYPE_ERROR, GL_DEBUG_TYPE_DEPRECATED_BEHAVIOR,
+                           GL_DEBUG_TYPE_UNDEFINED_BEHAVIOR, GL_DEBUG_TYPE_PORTABILITY,
+                           GL_DEBUG_TYPE_PERFORMANCE, GL_DEBUG_SEVERITY_HIGH,
+                           GL_DEBUG_SEVERITY_MEDIUM, GL_DEBUG_SEVERITY_LOW)
+    names = {
+        GL_DEBUG_TYPE_ERROR: "error",
+        GL_DEBUG_TYPE_DEPRECATED_BEHAVIOR: "deprecated",
+        GL_DEBUG_TYPE_UNDEFINED_BEHAVIOR: "undefined",
+        GL_DEBUG_TYPE_PORTABILITY: "portability",
+        GL_DEBUG_TYPE_PERFORMANCE: "performance",
+        GL_DEBUG_SEVERITY_HIGH: "high",
+        GL_DEBUG_SEVERITY_MEDIUM: "medium",
+        GL_DEBUG_SEVERITY_LOW: "low",
+    }
+    return names.get(int(value), "other")
+
+
+def _on_message(source, message_type, message_id, severity, length, message, user_param) -> None:
+    kind = _enum_name(message_type)
+    level = _enum_name(severity)
+    text = ctypes.string_at(message, length).decode(errors="replace").strip()
+    messages.append((kind, level, text))
+    message_counts[kind] = message_counts.get(kind, 0) + 1
+
+    # Saida sincrona: a pilha ainda e a da chamada que gerou a mensagem
+    print(f"[GL {kind}/{level}] {text}", file=sys.stderr)
+    if kind == "error":
+        traceback.print_stack(sys._getframe(1), limit=4, file=sys.stderr)
+
+
+def install_debug_output() -> bool:
+    # Liga o callback de GL_KHR_debug no contexto atual (so no perfil debug).
+    # Retorna False se o perfil nao e debug ou o driver nao tem GL_KHR_debug.
+    global _callback
+    if profile != "debug":
+        return False
+    from OpenGL.GL import (GLDEBUGPROC, GL_DEBUG_OUTPUT, GL_DEBUG_OUTPUT_SYNCHRONOUS,
+                           GL_DEBUG_SEVERITY_NOTIFICATION, GL_DONT_CARE, GL_FALSE,
+                           glDebugMessageCallback, glDebugMessageControl, glEnable)
+    if not bool(glDebugMessageCallback):
+        print("[GL] GL_KHR_debug indisponivel: so a checagem do PyOpenGL fica ativa", file=sys.stderr)
+        return False
+
+    _callback = GLDEBUGPROC(_on_message)
+    glEnable(GL_DEBUG_OUTPUT)
+    glEnable(GL_DEBUG_OUTPUT_SYNCHRONOUS)
+    glDebugMessageCallback(_callback, None)
+    # notificacoes (criacao de buffers etc.) so poluem a saida
+    glDebugMessageControl(GL_DONT_CARE, GL_DONT_CARE, GL_DEBUG_SEVERITY_NOTIFICATION, 0, None, GL_FALSE)
+    return True
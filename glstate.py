@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Tuple
+
+from OpenGL.GL import *
+
+# Camada de "estado sombra" na frente das chamadas de estado mais comuns
+# (glUseProgram, glEnable/glDisable, glShadeModel, glMatrixMode).
+# Cada funcao compara o valor pedido com o ultimo valor conhecido e so chama
+# o driver quando ha mudanca de fato. None significa "estado desconhecido":
+# a primeira chamada depois de invalidate() sempre chega ao driver.
+
+_program: Optional[int] = None
+_enabled: Dict[int, bool] = {}
+_shade_model: Optional[int] = None
+_matrix_mode: Optional[int] = None
+
+# Pilha espelhando glPushAttrib/glPopAttrib: (mascara, copia do estado sombra)
+_attrib_stack: List[Tuple[int, Dict[int, bool], Optional[int], Optional[int]]] = []
+
+# Contadores por tipo de chamada: nome -> [emitidas, filtradas]
+_counters: Dict[str, List[int]] = {}
+_last_frame: Dict[str, Dict[str, int]] = {}
+
+# Capacidades que fazem parte de GL_LIGHTING_BIT (alem de GL_ENABLE_BIT)
+_LIGHTING_CAPS = (GL_LIGHTING, GL_COLOR_MATERIAL, GL_LIGHT0, GL_LIGHT1, GL_LIGHT2,
+                  GL_LIGHT3, GL_LIGHT4, GL_LIGHT5, GL_LIGHT6, GL_LIGHT7)
+
+
+def _count(name: str, issued: bool) -> bool:
+    entry = _counters.get(name)
+    if entry is None:
+        entry = _counters[name] = [0, 0]
+    entry[0 if issued else 1] += 1
+    return issued
+
+
+def invalidate() -> None:
+    # Esquece todo o estado conhecido (ex.: depois de codigo externo mexer no GL
+    # ou de criar um novo contexto). As proximas chamadas vao ao driver.
+    global _program, _shade_model, _matrix_mode
+    _program = None
+    _shade_model = None
+    _matrix_mode = None
+    _enabled.clear()
+    _attrib_stack.clear()
+
+
+def use_program(program: int) -> None:
+    global _program
+    if _count("glUseProgram", program != _program):
+        glUseProgram(program)
+        _program = program
+
+
+def current_program() -> Optional[int]:
+    return _program
+
+
+def enable(cap: int) -> None:
+    if _count("glEnable", _enabled.get(cap) is not True):
+        glEnable(cap)
+        _enabled[cap] = True
+
+
+def disable(cap: int) -> None:
+    if _count("glDisable", _enabled.get(cap) is not False):
+        glDisable(cap)
+        _enabled[cap] = False
+
+
+def is_enabled(cap: int) -> bool:
+    # Consulta o driver apenas se o estado ainda for desconhecido
+    state = _enabled.get(cap)
+    if state is None:
+        state = _enabled[cap] = bool(glIsEnabled(cap))
+    return state
+
+
+def shade_model(mode: int) -> None:
+    global _shade_model
+    if _count("glShadeModel", mode != _shade_model):
+        glShadeModel(mode)
+        _shade_model = mode
+
+
+def matrix_mode(mode: int) -> None:
+    global _matrix_mode
+    if _count("glMatrixMode", mode != _matrix_mode):
+        glMatrixMode(mode)
+        _matrix_mode = mode
+
+
+def push_attrib(mask: int) -> None:
+    # glPushAttrib salva estado no driver; guardamos a copia da sombra junto
+    # para que glPopAttrib nao deixe o estado sombra dessincronizado.
+    glPushAttrib(mask)
+    _attrib_stack.append((mask, dict(_enabled), _shade_model, _matrix_mode))
+
+
+def pop_attrib() -> None:
+    global _shade_model, _matrix_mode
+    glPopAttrib()
+    mask, enabled, shade, mode = _attrib_stack.pop()
+
+    if mask & GL_ENABLE_BIT:
+        _enabled.clear()
+        _enabled.update(enabled)
+    elif mask & GL_LIGHTING_BIT:
+        for cap in _LIGHTING_CAPS:
+            if cap in enabled:
+                _enabled[cap] = enabled[cap]
+            else:
+                _enabled.pop(cap, None)
+
+    if mask & GL_LIGHTING_BIT:
+        _shade_model = shade
+    if mask & GL_TRANSFORM_BIT:
+        _matrix_mode = mode
+
+
+def end_frame() -> None:
+    # Fecha os contadores do frame; o resultado fica disponivel em frame_report()
+    global _last_frame
+    _last_frame = {name: {"issued": c[0], "filtered": c[1]} for name, c in _counters.items()}
+    _counters.clear()
+
+
+def frame_report() -> Dict[str, Dict[str, int]]:
+    # Chamadas emitidas/filtradas no ultimo frame, por tipo e no total
+    report = dict(_last_frame)
+    report["total"] = {
+        "issued": sum(c["issued"] for c in _last_frame.values()),
+        "filtered": sum(c["filtered"] for c in _last_frame.values()),
+    }
+    return report
@@ -0,0 +1,252 @@
+# Modo headless: renderiza scene.render_frame() em um FBO usando um contexto
+# OpenGL fora de tela (EGL surfaceless ou OSMesa), sem janela GLUT.
+# Funciona em maquinas sem display, inclusive so com CPU (Mesa llvmpipe).
+#
+# Uso (a partir da raiz do projeto):
+#     python headless.py --out frames/            salva um PNG por (objeto, shading)
+#     python headless.py --frames 200 --json      mede FPS por (objeto, shading)
+#
+# O backend (variavel PYOPENGL_PLATFORM) e o perfil release/debug
+# (gl_runtime.py) precisam ser escolhidos antes de importar o PyOpenGL,
+# por isso os imports de OpenGL/scene ficam dentro das funcoes.
+import argparse
+import ctypes
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKENDS = ("egl", "osmesa")
+
+# EGL_PLATFORM_SURFACELESS_MESA (extensao EGL_MESA_platform_surfaceless)
+_EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+# EGL_CONTEXT_OPENGL_DEBUG (EGL 1.5), pedido no perfil debug de gl_runtime.py
+_EGL_CONTEXT_OPENGL_DEBUG = 0x31B0
+
+
+def select_backend(backend: str) -> None:
+    # Define a plataforma do PyOpenGL; so tem efeito antes do primeiro import de OpenGL
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend headless invalido: {backend}")
+    current = os.environ.get("PYOPENGL_PLATFORM")
+    if "OpenGL.platform" in sys.modules and current != backend:
+        raise RuntimeError(
+            f"PyOpenGL ja foi importado com a plataforma {current!r}; "
+            f"selecione o backend {backend!r} antes de importar OpenGL"
+        )
+    os.environ["PYOPENGL_PLATFORM"] = backend
+
+
+class EGLContext:
+    # Contexto OpenGL (perfil de compatibilidade) sem superficie, via EGL
+
+    def __init__(self, width: int, height: int) -> None:
+        import gl_runtime
+        # PyOpenGL 3.1 nao define o verificador de erros do EGL quando
+        # ERROR_CHECKING esta desligado (perfil release) e o import falharia
+        from OpenGL.raw.EGL import _errors
+        if not hasattr(_errors, "_error_checker"):
+            _errors._error_checker = None
+        from OpenGL import EGL
+
+        self._egl = EGL
+        self.display = None
+        try:
+            from OpenGL.EGL.EXT.platform_base import eglGetPlatformDisplayEXT
+            self.display = eglGetPlatformDisplayEXT(
+                _EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+        except Exception:
+            # extensao indisponivel: tenta o display padrao logo abaixo
+            self.display = None
+        if not self.display:
+            self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize falhou")
+        if not EGL.eglBindAPI(EGL.EGL_OPENGL_API):
+            raise RuntimeError("EGL sem suporte a OpenGL desktop")
+
+        attribs = (EGL.EGLint * 5)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        )
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, attribs, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or count.value == 0:
+            raise RuntimeError("Nenhuma configuracao EGL com OpenGL disponivel")
+
+        context_attribs = None
+        if gl_runtime.debug_context():
+            context_attribs = (EGL.EGLint * 3)(_EGL_CONTEXT_OPENGL_DEBUG, EGL.EGL_TRUE, EGL.EGL_NONE)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, context_attribs)
+        if not self.context:
+            raise RuntimeError("eglCreateContext falhou")
+
+        # Sem superficie (EGL_KHR_surfaceless_context); se nao der, usa um pbuffer
+        self.surface = EGL.EGL_NO_SURFACE
+        if not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            pbuffer_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+            self.surface = EGL.eglCreatePbufferSurface(self.display, config, pbuffer_attribs)
+            if not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+                raise RuntimeError("eglMakeCurrent falhou")
+
+    def release(self) -> None:
+        EGL = self._egl
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        if self.surface != EGL.EGL_NO_SURFACE:
+            EGL.eglDestroySurface(self.display, self.surface)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglTerminate(self.display)
+
+
+class OSMesaContext:
+    # Contexto OpenGL renderizado por software (OSMesa) em um buffer da CPU
+
+    def __init__(self, width: int, height: int) -> None:
+        from OpenGL import GL, arrays, osmesa
+
+        self._osmesa = osmesa
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.context:
+            raise RuntimeError("OSMesaCreateContextExt falhou")
+        # O buffer padrao nao e usado para desenhar (tudo vai para o FBO),
+        # mas o OSMesa exige um buffer para tornar o contexto atual
+        self._buffer = arrays.GLubyteArray.zeros((height, width, 4))
+        if not osmesa.OSMesaMakeCurrent(self.context, self._buffer, GL.GL_UNSIGNED_BYTE, width, height):
+            raise RuntimeError("OSMesaMakeCurrent falhou")
+
+    def release(self) -> None:
+        self._osmesa.OSMesaDestroyContext(self.context)
+
+
+def create_context(width: int, height: int, backend: str = "egl", profile: Optional[str] = None):
+    import gl_runtime
+
+    select_backend(backend)
+    gl_runtime.select_profile(profile)
+    if backend == "egl":
+        return EGLContext(width, height)
+    return OSMesaContext(width, height)
+
+
+class HeadlessRenderer:
+    # Contexto fora de tela + FBO do tamanho da "janela" + cena inicializada.
+    # render() desenha scene.render_frame() no FBO e devolve os pixels.
+
+    def __init__(self, width: int = 800, height: int = 600, backend: str = "egl",
+                 profile: Optional[str] = None) -> None:
+        self.context = create_context(width, height, backend, profile)
+
+        from framebuffer import Framebuffer
+        import scene
+        import scheduler
+
+        self._scene = scene
+        scheduler.offscreen = True
+        scene.show_ui = False
+
+        self.framebuffer = Framebuffer(width, height)
+        self.framebuffer.bind()
+        scene.init_gl(width, height)
+
+    def set_view(self, obj: Optional[str] = None, shading_mode: Optional[str] = None) -> None:
+        import shading
+
+        scene = self._scene
+        if obj is not None:
+            scene.current_object = obj
+        if shading_mode is not None and shading_mode != scene.current_shading:
+            scene.current_shading = shading_mode
+            shading.set_shading_mode(shading_mode)
+
+    def resize(self, width: int, height: int) -> None:
+        # Equivalente ao reshape da janela: FBO do novo tamanho e projecao
+        self.framebuffer.resize(width, height)
+        self.framebuffer.bind()
+        self._scene.reshape(width, height)
+
+    def render(self, obj: Optional[str] = None, shading_mode: Optional[str] = None,
+               alpha: bool = False) -> np.ndarray:
+        # Renderiza um frame e devolve (altura, largura, 3|4) uint8, linha 0 no topo
+        self.set_view(obj, shading_mode)
+        self.framebuffer.bind()
+        self._scene.render_frame()
+        pixels = self.framebuffer.read_pixels()
+        return pixels if alpha else pixels[:, :, :3]
+
+    def save_png(self, path: str, obj: Optional[str] = None, shading_mode: Optional[str] = None) -> None:
+        from images import write_png
+        write_png(path, self.render(obj, shading_mode))
+
+    def measure_fps(self, obj: str, shading_mode: str, frames: int = 100, warmup: int = 5) -> float:
+        from OpenGL.GL import glFinish
+
+        self.set_view(obj, shading_mode)
+        self.framebuffer.bind()
+        for _ in range(warmup):
+            self._scene.render_frame()
+        glFinish()
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            self._scene.render_frame()
+        glFinish()
+        return frames / (time.perf_counter() - start)
+
+    def close(self) -> None:
+        import meshes
+        import shader_cache
+
+        self._scene.release_gl()
+        meshes.delete_all()
+        shader_cache.release()
+        self.framebuffer.delete()
+        self.context.release()
+
+
+def all_views() -> List[Tuple[str, str]]:
+    # Todos os pares (objeto, shading) oferecidos pelos botoes da UI
+    import ui
+    return [(oid, sid) for oid, _ in ui.OBJECT_BUTTONS for sid, _ in ui.SHADING_BUTTONS]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Renderizacao headless (sem janela) da cena")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--frames", type=int, default=100, help="frames por par para medir FPS")
+    parser.add_argument("--out", help="diretorio onde salvar um PNG por (objeto, shading)")
+    parser.add_argument("--json", action="store_true", help="imprime os resultados em JSON")
+    parser.add_argument("--gl-profile", choices=("release", "debug"),
+                        help="perfil do PyOpenGL (gl_runtime.py); padrao: TG3D_GL_PROFILE ou release")
+    args = parser.parse_args()
+
+    renderer = HeadlessRenderer(args.width, args.height, args.backend, args.gl_profile)
+
+    results: List[Dict[str, object]] = []
+    for obj, shading_mode in all_views():
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            renderer.save_png(os.path.join(args.out, f"{obj}_{shading_mode}.png"), obj, shading_mode)
+        fps = renderer.measure_fps(obj, shading_mode, args.frames) if args.frames > 0 else 0.0
+        results.append({"object": obj, "shading": shading_mode, "fps": fps})
+
+    renderer.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'objeto':<10}{'shading':<10}{'FPS':>10}")
+        for r in results:
+            print(f"{r['object']:<10}{r['shading']:<10}{r['fps']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Leitura e escrita de PNG sem dependencias externas (so zlib + NumPy),
+# usadas pelo modo headless para salvar frames e pelas comparacoes com
+# imagens de referencia (golden images) do renderizador em software.
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COLOR_TYPES = {1: 0, 3: 2, 4: 6}   # canais -> tipo de cor PNG (cinza, RGB, RGBA)
+_CHANNELS = {v: k for k, v in _COLOR_TYPES.items()}
+
+
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def encode_png(pixels: np.ndarray, compression: int = 6) -> bytes:
+    # pixels: (altura, largura) ou (altura, largura, 1|3|4), uint8, linha 0 no topo
+    pixels = np.asarray(pixels)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    if pixels.dtype != np.uint8:
+        raise ValueError("encode_png espera pixels uint8")
+    height, width, channels = pixels.shape
+
+    # Cada linha comeca com o byte de filtro (0 = sem filtro)
+    raw = np.zeros((height, width * channels + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, -1)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[channels], 0, 0, 0)
+    return (_PNG_SIGNATURE
+            + _chunk(b"IHDR", header)
+            + _chunk(b"IDAT", zlib.compress(raw.tobytes(), compression))
+            + _chunk(b"IEND", b""))
+
+
+def write_png(path: str, pixels: np.ndarray, compression: int = 6) -> None:
+    with open(path, "wb") as f:
+        f.write(encode_png(pixels, compression))
+
+
+def _unfilter(raw: np.ndarray, height: int, stride: int, bpp: int) -> np.ndarray:
+    # Desfaz os filtros PNG linha a linha (None, Sub, Up, Average, Paeth)
+    rows = raw.reshape(height, stride + 1)
+    out = np.zeros((height, stride), dtype=np.uint8)
+    prev = np.zeros(stride, dtype=np.int32)
+    for y in range(height):
+        kind = rows[y, 0]
+        line = rows[y, 1:].astype(np.int32)
+        if kind == 0:
+            cur = line
+        elif kind == 1:
+            # Sub: soma acumulada por canal (mod 256) ao longo da linha
+            cur = np.cumsum(line.reshape(-1, bpp), axis=0).ravel() & 0xFF
+        elif kind == 2:
+            cur = (line + prev) & 0xFF
+        else:
+            # Average e Paeth dependem do pixel recem decodificado: laco por byte
+            cur = np.zeros(stride, dtype=np.int32)
+            for i in range(stride):
+                a = cur[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                if kind == 3:
+                    cur[i] = (line[i] + (a + b) // 2) & 0xFF
+                else:
+                    c = prev[i - bpp] if i >= bpp else 0
+                    p = a + b - c
+                    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                    pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                    cur[i] = (line[i] + pred) & 0xFF
+        out[y] = cur
+        prev = cur
+    return out
+
+
+def read_png(path: str) -> np.ndarray:
+    # Le PNG de 8 bits sem entrelacamento (cinza, RGB ou RGBA), linha 0 no topo
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != _PNG_SIGNATURE:
+        raise ValueError(f"{path} nao e um arquivo PNG")
+
+    pos = 8
+    idat = []
+    width = height = channels = 0
+    while pos < len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if tag == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if depth != 8 or interlace != 0 or color_type not in _CHANNELS:
+                raise ValueError(f"{path}: so PNG de 8 bits sem entrelacamento e suportado")
+            channels = _CHANNELS[color_type]
+        elif tag == b"IDAT":
+            idat.append(body)
+        elif tag == b"IEND":
+            break
+
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8)
+    pixels = _unfilter(raw, height, width * channels, channels)
+    return pixels.reshape(height, width, channels)
+
+
+def image_diff(a: np.ndarray, b: np.ndarray, tolerance: int = 2) -> dict:
+    # Compara duas imagens uint8 do mesmo tamanho: diferenca maxima, media e
+    # fracao de pixels com algum canal diferindo mais que a tolerancia
+    if a.shape != b.shape:
+        raise ValueError(f"Imagens com tamanhos diferentes: {a.shape} x {b.shape}")
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16))
+    per_pixel = diff.max(axis=-1) if diff.ndim == 3 else diff
+    return {
+        "max": int(diff.max()),
+        "mean": float(diff.mean()),
+        "mismatch": float((per_pixel > tolerance).mean()),
+    }
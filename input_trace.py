@@ -0,0 +1,263 @@
+import hashlib
+import json
+import struct
+import time
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Gravacao e reproducao da interacao com a janela, para medir desempenho
+# sempre sobre a mesma sessao.
+# - Gravacao (main.py --record-trace): os callbacks do GLUT (teclado, setas,
+#   mouse, reshape) passam por recorded(), que anota o evento com o instante
+#   desde o inicio. scheduler.py anota cada passo das animacoes (com o dt
+#   usado) e cada frame desenhado. Tudo vai para um arquivo binario compacto:
+#   cabecalho JSON com o estado inicial da cena + registros de tamanho fixo.
+# - Reproducao (replay(), benchmarks/replay.py): modo headless (FBO), os
+#   eventos chamam as mesmas funcoes de scene.py na mesma ordem e as animacoes
+#   avancam com os dt gravados, entao o estado de cada frame e identico ao da
+#   sessao gravada. Em "max" os frames sao desenhados um atras do outro, sem o
+#   timer do scheduler; em "realtime" cada evento espera o seu instante.
+#   Cada frame e medido (CPU ate o fim de render_frame e total ate glFinish).
+
+MAGIC = b"TGIT"
+VERSION = 2
+
+# Tipos de evento
+KEYBOARD = 0
+SPECIAL = 1
+MOUSE = 2
+RESHAPE = 3
+TICK = 4
+FRAME = 5
+
+KIND_NAMES = ("keyboard", "special", "mouse", "reshape", "tick", "frame")
+
+# Registro: instante (s), tipo, codigo (tecla, botao ou largura), estado
+# (botao do mouse ou altura), x, y, dt do passo de animacao (s, em double
+# para a reproducao somar exatamente os mesmos valores que a sessao gravada)
+_RECORD = struct.Struct("<dBhhhhd")
+# Cabecalho: magic, versao, tamanho do JSON
+_HEADER = struct.Struct("<4sII")
+
+MODES = ("max", "realtime")
+
+Event = Tuple[float, int, int, int, int, int, float]
+
+
+def scene_state(scene) -> Dict[str, object]:
+    # Estado da cena que a interacao altera; aplicado antes de reproduzir
+    import scheduler
+
+    return {
+        "width": scene.width,
+        "height": scene.height,
+        "object": scene.current_object,
+        "shading": scene.current_shading,
+        "projection": scene.projection,
+        "angles": [scene.angle_x, scene.angle_y, scene.angle_z],
+        "eye_z": scene.eye_z,
+        "point_lights": len(scene.point_lights) if scene.point_lights is not None else 0,
+        "instanced": scene.instanced_scene is not None,
+        "culling": scene.culling_enabled,
+        "lod": scene.lod_enabled,
+        "auto_rotate": scheduler.is_animating("auto_rotate"),
+    }
+
+
+class TraceRecorder:
+
+    def __init__(self, path: str, state: Dict[str, object]) -> None:
+        self.path = path
+        self.events = 0
+        self._start = time.perf_counter()
+        self._file: BinaryIO = open(path, "wb")
+        header = json.dumps(state).encode()
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(header)))
+        self._file.write(header)
+
+    def record(self, kind: int, code: int = 0, state: int = 0, x: int = 0, y: int = 0,
+               dt: float = 0.0) -> None:
+        self._file.write(_RECORD.pack(time.perf_counter() - self._start, kind, code, state, x, y, dt))
+        self.events += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Gravacao ativa (None = callbacks passam direto)
+recorder: Optional[TraceRecorder] = None
+
+
+def start(path: str, state: Dict[str, object]) -> TraceRecorder:
+    global recorder
+    stop()
+    recorder = TraceRecorder(path, state)
+    return recorder
+
+
+def stop() -> None:
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
+
+def record(kind: int, code: int = 0, state: int = 0, x: int = 0, y: int = 0, dt: float = 0.0) -> None:
+    if recorder is not None:
+        recorder.record(kind, code, state, x, y, dt)
+
+
+def recorded(kind: int, callback: Callable) -> Callable:
+    # Envolve um callback do GLUT: anota o evento (se gravando) e repassa
+    if kind == KEYBOARD:
+        def wrapper(key: bytes, x: int, y: int) -> None:
+            record(KEYBOARD, key[0], 0, x, y)
+            callback(key, x, y)
+    elif kind == SPECIAL:
+        def wrapper(key: int, x: int, y: int) -> None:
+            record(SPECIAL, key, 0, x, y)
+            callback(key, x, y)
+    elif kind == MOUSE:
+        def wrapper(button: int, state: int, x: int, y: int) -> None:
+            record(MOUSE, button, state, x, y)
+            callback(button, state, x, y)
+    elif kind == RESHAPE:
+        def wrapper(w: int, h: int) -> None:
+            record(RESHAPE, w, h)
+            callback(w, h)
+    else:
+        raise ValueError(f"Evento sem callback: {KIND_NAMES[kind]}")
+    return wrapper
+
+
+def read_trace(path: str) -> Tuple[Dict[str, object], List[Event]]:
+    # (estado inicial, eventos na ordem gravada)
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path}: arquivo de interacao vazio")
+    magic, version, size = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: nao e um arquivo de interacao (versao {VERSION})")
+    offset = _HEADER.size + size
+    state = json.loads(data[_HEADER.size:offset])
+    # um registro cortado no fim (sessao interrompida) e ignorado
+    end = offset + (len(data) - offset) // _RECORD.size * _RECORD.size
+    return state, list(_RECORD.iter_unpack(data[offset:end]))
+
+
+def _apply_state(renderer, state: Dict[str, object]) -> None:
+    import scene
+    import scene_graph
+    import scheduler
+
+    renderer.resize(state["width"], state["height"])
+    renderer.set_view(state["object"], state["shading"])
+    scene.projection = state["projection"]
+    scene.angle_x, scene.angle_y, scene.angle_z = state["angles"]
+    scene.eye_z = state["eye_z"]
+    scene.set_point_light_count(state["point_lights"])
+    scene.instanced_scene = scene_graph.demo_grid(scene.INSTANCE_DEMO_COUNT) if state["instanced"] else None
+    scene.culling_enabled = state["culling"]
+    scene.lod_enabled = state["lod"]
+    # Nada do processo pode vazar para a reproducao (outra chamada de replay(),
+    # render_farm): animacoes ativas e niveis de LOD escolhidos com histerese
+    scheduler.stop_all_animations()
+    if state.get("auto_rotate"):
+        scheduler.start_animation("auto_rotate", scene._auto_rotate)
+    scene.reset_lod()
+
+
+def replay(path: str, mode: str = "max", backend: str = "egl", profile: bool = False,
+           model: Optional[str] = None) -> Dict[str, object]:
+    # Reproduz a sessao gravada num contexto headless e devolve os tempos por frame
+    if mode not in MODES:
+        raise ValueError(f"Modo de reproducao invalido: {mode}")
+    state, events = read_trace(path)
+
+    import headless
+    renderer = headless.HeadlessRenderer(state["width"], state["height"], backend)
+
+    from OpenGL.GL import glFinish
+    import meshes
+    import objects3d
+    from profiler import frame_profiler
+    import scene
+    import scheduler
+
+    if model:
+        import vertex_formats
+        objects3d.load_model(model, scene.MODEL_NAME, state.get("model_lod", False),
+                             vertex_formats.parse_format(state.get("vertex_format", "float32")))
+    if state["object"] == scene.MODEL_NAME and not meshes.has_mesh(scene.MODEL_NAME):
+        raise ValueError("A sessao usa o modelo importado (--model): informe o mesmo arquivo")
+    _apply_state(renderer, state)
+    if profile:
+        frame_profiler.reset()
+        frame_profiler.enable()
+
+    cpu_ms: List[float] = []
+    frame_ms: List[float] = []
+    counts = [0] * len(KIND_NAMES)
+    start = time.perf_counter()
+    for t, kind, code, button_state, x, y, dt in events:
+        if mode == "realtime":
+            delay = start + t - time.perf_counter()
+            if delay > 0.0:
+                time.sleep(delay)
+        counts[kind] += 1
+
+        if kind == FRAME:
+            renderer.framebuffer.bind()
+            frame_start = time.perf_counter()
+            scene.render_frame()
+            submitted = time.perf_counter()
+            glFinish()
+            cpu_ms.append((submitted - frame_start) * 1e3)
+            frame_ms.append((time.perf_counter() - frame_start) * 1e3)
+            scheduler.frame_presented()
+        elif kind == TICK:
+            scheduler.advance(dt)
+        elif kind == KEYBOARD:
+            if code == 0x1B:
+                # ESC fechou a janela: fim da sessao
+                break
+            scene.keyboard(bytes([code]), x, y)
+        elif kind == SPECIAL:
+            scene.special_keys(code, x, y)
+        elif kind == MOUSE:
+            scene.mouse(code, button_state, x, y)
+        elif kind == RESHAPE:
+            renderer.resize(code, button_state)
+    elapsed = time.perf_counter() - start
+
+    # hash do ultimo frame: builds que desenham a mesma coisa dao o mesmo valor
+    digest = hashlib.blake2b(renderer.framebuffer.read_pixels().tobytes(), digest_size=8).hexdigest()
+    result = {
+        "trace": path,
+        "mode": mode,
+        "events": {name: counts[i] for i, name in enumerate(KIND_NAMES)},
+        "frames": len(frame_ms),
+        "elapsed_s": elapsed,
+        "fps": len(frame_ms) / elapsed if elapsed > 0.0 else 0.0,
+        "frame": _stats(frame_ms),
+        "cpu": _stats(cpu_ms),
+        "frame_ms": frame_ms,
+        "cpu_ms": cpu_ms,
+        "final_frame_digest": digest,
+    }
+    if profile:
+        result["stages"] = frame_profiler.summary()
+        frame_profiler.enable(False)
+    renderer.close()
+    return result
+
+
+def _stats(samples: List[float]) -> Optional[Dict[str, float]]:
+    if not samples:
+        return None
+    data = np.asarray(samples)
+    p50, p95, p99 = np.percentile(data, (50, 95, 99))
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+            "mean_ms": float(data.mean()), "max_ms": float(data.max())}
@@ -0,0 +1,251 @@
+import ctypes
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from OpenGL.GL import *
+
+import glstate
+import meshes
+import shading
+from meshes import MeshBuffer
+from scene_graph import KINDS, SceneGraph
+
+# Desenho instanciado do grafo de cena (scene_graph.py).
+# Cada tipo de primitiva vira um unico glDrawArraysInstanced/glDrawElementsInstanced:
+# a malha continua vindo do VBO do registro (meshes.py) e os dados de cada
+# instancia (matriz de modelo, matriz de normais e cor) ficam num segundo VBO,
+# lido com glVertexAttribDivisor(..., 1). O custo em Python por frame nao
+# depende do numero de instancias; os buffers so sao reenviados quando o
+# grafo ou o conjunto de instancias visiveis (culling, ver bvh.py) muda.
+# Com niveis de detalhe (lod.py) as instancias de um tipo sao divididas em
+# grupos, um por malha (nivel), e cada grupo e um desenho instanciado.
+
+# Grupo de desenho: nome da malha -> (tipo no grafo, indices das instancias)
+Groups = Dict[str, Tuple[str, np.ndarray]]
+
+# Dados por instancia: modelo (mat4) + normais (mat3) + cor (vec3), float32
+FLOATS_PER_INSTANCE = 16 + 9 + 3
+INSTANCE_STRIDE = FLOATS_PER_INSTANCE * 4
+
+# Localizacoes fixas dos atributos genericos; uma mat4 ocupa 4 localizacoes
+# seguidas e uma mat3 ocupa 3. Ficam fora de 0-3, que alguns drivers
+# compartilham com gl_Vertex/gl_Normal/gl_Color.
+ATTRIB_LOCATIONS = {
+    "aInstanceModel": 6,
+    "aInstanceNormal": 10,
+    "aInstanceColor": 13,
+}
+
+_INSTANCE_ATTRIBS = """
+    attribute mat4 aInstanceModel;
+    attribute mat3 aInstanceNormal;
+    attribute vec3 aInstanceColor;
+"""
+
+# Iluminacao por vertice equivalente ao pipeline fixo (shading.GOURAUD_LIGHTING_SRC).
+# A cor vai em gl_FrontColor, entao glShadeModel(GL_FLAT) continua valendo e o
+# mesmo programa serve para "flat" e "gouraud".
+_GOURAUD_VERTEX_SRC = _INSTANCE_ATTRIBS + shading.GOURAUD_LIGHTING_SRC + """
+    void main() {
+        vec4 posView = gl_ModelViewMatrix * (aInstanceModel * gl_Vertex);
+        vec3 N = normalize(gl_NormalMatrix * (aInstanceNormal * gl_Normal));
+        gl_FrontColor = gouraudColor(posView.xyz, N, aInstanceColor);
+        gl_Position = gl_ProjectionMatrix * posView;
+    }
+"""
+
+# Mesmas saidas do vertex shader Phong de shading.py, com as matrizes da instancia
+_PHONG_VERTEX_SRC = _INSTANCE_ATTRIBS + shading.MATRIX_UNIFORMS_SRC + """
+    varying vec3 vNormal;
+    varying vec3 vFragPos;
+    varying vec3 vColor;
+
+    void main() {
+        vec4 posView = uModelView * (aInstanceModel * gl_Vertex);
+        vFragPos = posView.xyz;
+        vNormal = normalize(uNormalMatrix * (aInstanceNormal * gl_Normal));
+        vColor = aInstanceColor;
+        gl_Position = uProjection * posView;
+    }
+"""
+
+shading.register_variant(_GOURAUD_VERTEX_SRC, shading.GOURAUD_FRAGMENT_SRC, ATTRIB_LOCATIONS)
+shading.register_phong_vertex(_PHONG_VERTEX_SRC, ATTRIB_LOCATIONS)
+
+
+def pack_instances(models: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    # (N, 4, 4) + (N, 3) -> (N, FLOATS_PER_INSTANCE) no layout do VBO de instancias.
+    # O GLSL le matrizes por colunas, entao cada matriz vai transposta.
+    # Matriz de normais = inversa transposta da parte 3x3; transposta para o
+    # GLSL ela volta a ser simplesmente a inversa.
+    n = len(models)
+    data = np.empty((n, FLOATS_PER_INSTANCE), dtype=np.float32)
+    data[:, :16] = models.transpose(0, 2, 1).reshape(n, 16)
+    data[:, 16:25] = np.linalg.inv(models[:, :3, :3].astype(np.float64)).reshape(n, 9)
+    data[:, 25:] = colors
+    return data
+
+
+class InstancedBatch:
+    # Todas as instancias de uma malha: VAO proprio com os atributos da malha
+    # (via MeshBuffer.setup_arrays) mais os atributos por instancia
+
+    def __init__(self, mesh: MeshBuffer) -> None:
+        if mesh.encoding is not None:
+            raise ValueError("Desenho instanciado requer malhas no layout float32")
+        self.mesh = mesh
+        self.count = 0
+        self.instance_vbo = glGenBuffers(1)
+        self.vao = glGenVertexArrays(1)
+
+        glBindVertexArray(self.vao)
+        mesh.setup_arrays()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        columns = [(ATTRIB_LOCATIONS["aInstanceModel"] + i, 4, 4 * i) for i in range(4)]
+        columns += [(ATTRIB_LOCATIONS["aInstanceNormal"] + i, 3, 16 + 3 * i) for i in range(3)]
+        columns += [(ATTRIB_LOCATIONS["aInstanceColor"], 3, 25)]
+        for location, size, offset in columns:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE,
+                                  ctypes.c_void_p(offset * 4))
+            glVertexAttribDivisor(location, 1)
+
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def upload(self, models: np.ndarray, colors: np.ndarray) -> None:
+        self.count = len(models)
+        if not self.count:
+            return
+        data = pack_instances(models, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self) -> None:
+        if not self.count:
+            return
+        mesh = self.mesh
+        glBindVertexArray(self.vao)
+        if mesh.ebo is not None:
+            glDrawElementsInstanced(mesh.mode, mesh.index_count, GL_UNSIGNED_INT, None, self.count)
+        else:
+            glDrawArraysInstanced(mesh.mode, 0, mesh.vertex_count, self.count)
+        glBindVertexArray(0)
+
+    def delete(self) -> None:
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteBuffers(1, [self.instance_vbo])
+        self.vao = self.instance_vbo = None
+        self.count = 0
+
+
+class InstanceRenderer:
+
+    def __init__(self) -> None:
+        if not (bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor) and bool(glGenVertexArrays)):
+            raise RuntimeError("Desenho instanciado requer OpenGL 3.3 (ou ARB_instanced_arrays)")
+        self.gouraud_program = shading.ShaderProgram(
+            _GOURAUD_VERTEX_SRC, shading.GOURAUD_FRAGMENT_SRC, ATTRIB_LOCATIONS)
+        self.phong_program = shading.ShaderProgram(
+            _PHONG_VERTEX_SRC, shading.PHONG_FRAGMENT_SRC, ATTRIB_LOCATIONS)
+        # um lote por malha (nome do registro em meshes.py)
+        self.batches: Dict[str, InstancedBatch] = {}
+        # (id do grafo, versao) e grupos ja enviados aos VBOs
+        self._uploaded = None
+        self._uploaded_groups: Optional[Groups] = None
+        self.draw_calls = 0
+
+    def _batch(self, mesh_name: str) -> InstancedBatch:
+        batch = self.batches.get(mesh_name)
+        if batch is None:
+            batch = self.batches[mesh_name] = InstancedBatch(meshes.get_mesh(mesh_name))
+        return batch
+
+    def _same_groups(self, groups: Optional[Groups]) -> bool:
+        last = self._uploaded_groups
+        if groups is None or last is None:
+            return groups is last
+        if groups.keys() != last.keys():
+            return False
+        return all(groups[name][0] == last[name][0] and np.array_equal(groups[name][1], last[name][1])
+                   for name in groups)
+
+    def sync(self, graph: SceneGraph, groups: Optional[Groups] = None) -> None:
+        # Reenvia as instancias so quando o grafo (ou a versao dele) ou os
+        # grupos mudaram. Sem grupos, cada tipo desenha todas as suas instancias.
+        graph.update()
+        key = (id(graph), graph.version)
+        if key == self._uploaded and self._same_groups(groups):
+            return
+        chosen_groups = groups if groups is not None else {kind: (kind, None) for kind in KINDS}
+        for mesh_name, batch in self.batches.items():
+            if mesh_name not in chosen_groups:
+                batch.count = 0
+        for mesh_name, (kind, chosen) in chosen_groups.items():
+            if not meshes.has_mesh(mesh_name):
+                continue
+            models = graph.instances(kind)
+            colors = graph.instance_colors(kind)
+            if chosen is not None:
+                models, colors = models[chosen], colors[chosen]
+            self._batch(mesh_name).upload(models, colors)
+        self._uploaded = key
+        self._uploaded_groups = groups
+
+    def draw(self, graph: SceneGraph, shading_mode: str, light_pos, view_pos=(0.0, 0.0, 0.0),
+             groups: Optional[Groups] = None) -> None:
+        # Usa a matriz de modelo/visualizacao atual (camera + rotacao global da cena)
+        self.sync(graph, groups)
+
+        previous = glstate.current_program()
+        if shading_mode in shading.PHONG_MODES:
+            program = shading.lit_program(self.phong_program, _PHONG_VERTEX_SRC, ATTRIB_LOCATIONS)
+            program.use()
+            shading.apply_phong_uniforms(program, light_pos, view_pos)
+        else:
+            self.gouraud_program.use()
+
+        self.draw_calls = 0
+        for batch in self.batches.values():
+            if batch.count:
+                batch.draw()
+                self.draw_calls += 1
+
+        glstate.use_program(previous if previous is not None else 0)
+
+    def delete(self) -> None:
+        for batch in self.batches.values():
+            batch.delete()
+        self.batches.clear()
+        self.gouraud_program.delete()
+        self.phong_program.delete()
+        self._uploaded = None
+        self._uploaded_groups = None
+
+
+# Renderizador criado no primeiro uso (precisa de contexto e das malhas registradas)
+renderer: Optional[InstanceRenderer] = None
+
+
+def visible_groups(visible: Dict[str, np.ndarray]) -> Groups:
+    # Grupos de um resultado de culling (tipo -> indices), sem niveis de detalhe
+    return {kind: (kind, indices) for kind, indices in visible.items()}
+
+
+def draw_graph(graph: SceneGraph, shading_mode: str, light_pos, view_pos=(0.0, 0.0, 0.0),
+               groups: Optional[Groups] = None) -> None:
+    global renderer
+    if renderer is None:
+        renderer = InstanceRenderer()
+    renderer.draw(graph, shading_mode, light_pos, view_pos, groups)
+
+
+def release() -> None:
+    # Libera VAOs, buffers e programas (usar antes de destruir o contexto OpenGL)
+    global renderer
+    if renderer is not None:
+        renderer.delete()
+        renderer = None
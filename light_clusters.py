@@ -0,0 +1,173 @@
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Luzes pontuais distribuidas em clusters do volume de visualizacao
+# (Olsson, Billeter e Assarsson, "Clustered Deferred and Forward Shading", 2012).
+# A grade divide a tela em tiles e a profundidade em fatias exponenciais entre
+# near e far; cada luz (esfera de raio finito) vai para os clusters que ela
+# alcanca. assign_lights() faz tudo em lote, sem laco por luz:
+# 1. caixa conservadora de cada esfera em indices de cluster;
+# 2. expansao das caixas em pares (luz, cluster);
+# 3. teste esfera x caixa do cluster (espaco de camera) descarta pares falsos;
+# 4. ordenacao por cluster -> (offset, contagem) por cluster + lista de luzes.
+# O fragment shader (clustered_shading.py) acha o proprio cluster por
+# gl_FragCoord e profundidade e so avalia as luzes dessa lista.
+# Sem dependencia de OpenGL: matrizes na convencao de transforms.py.
+
+# Clusters em x (tiles), y (tiles) e z (fatias de profundidade)
+GRID = (16, 9, 24)
+
+# Maximo de luzes pontuais: o bloco uniforme de clustered_shading.py guarda
+# 2 vec4 por luz = 16 KB, o minimo garantido de GL_MAX_UNIFORM_BLOCK_SIZE.
+# Fica aqui (sem OpenGL) para main.py validar argumentos antes de importar o PyOpenGL.
+MAX_LIGHTS = 512
+
+
+class PointLights:
+    # Luzes pontuais em coordenadas de mundo. version aumenta a cada mudanca,
+    # para quem guarda o resultado da distribuicao em clusters.
+
+    def __init__(self, positions: np.ndarray, colors: np.ndarray, radii: np.ndarray) -> None:
+        self.version = 0
+        self.set(positions, colors, radii)
+
+    def set(self, positions: np.ndarray, colors: np.ndarray, radii: np.ndarray) -> None:
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(self.positions),)).copy()
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+def random_lights(count: int, center: Sequence[float] = (0.0, 0.0, 0.0), extent: float = 4.0,
+                  radius: Tuple[float, float] = (1.0, 2.0), seed: int = 0) -> PointLights:
+    # Luzes coloridas espalhadas num cubo de meia-aresta extent em torno de center
+    rng = np.random.default_rng(seed)
+    positions = np.asarray(center) + rng.uniform(-extent, extent, size=(count, 3))
+    colors = rng.uniform(0.2, 1.0, size=(count, 3))
+    colors *= 0.8 / colors.max(axis=1, keepdims=True)
+    radii = rng.uniform(radius[0], radius[1], size=count)
+    return PointLights(positions, colors, radii)
+
+
+class Clusters(NamedTuple):
+    grid: np.ndarray      # (X*Y*Z, 2) uint32: offset em indices e contagem, x mais rapido
+    indices: np.ndarray   # (M,) uint16: luzes de cada cluster, em sequencia
+    occupied: int         # clusters com ao menos uma luz
+
+
+def depth_params(dims: Sequence[int], near: float, far: float) -> Tuple[float, float]:
+    # Fatia de uma profundidade d (distancia a camera): floor(log(d) * escala + bias)
+    scale = dims[2] / np.log(far / near)
+    return float(scale), float(-np.log(near) * scale)
+
+
+def slice_depths(dims: Sequence[int], near: float, far: float) -> np.ndarray:
+    # Limites das fatias (Z + 1,), em progressao geometrica de near a far
+    return near * (far / near) ** (np.arange(dims[2] + 1) / dims[2])
+
+
+def _ndc(projection: np.ndarray, row: int, coord: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    # Coordenada normalizada (x: row 0, y: row 1) de um ponto de camera na
+    # profundidade depth (z = -depth); vale para perspectiva e ortografica
+    w = -projection[3, 2] * depth + projection[3, 3]
+    return (projection[row, row] * coord - projection[row, 2] * depth + projection[row, 3]) / w
+
+
+def _view_coord(projection: np.ndarray, row: int, ndc: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    # Inversa de _ndc(): coordenada de camera para um valor normalizado e profundidade
+    w = -projection[3, 2] * depth + projection[3, 3]
+    return (ndc * w + projection[row, 2] * depth - projection[row, 3]) / projection[row, row]
+
+
+def cluster_bounds(projection: np.ndarray, dims: Sequence[int], near: float,
+                   far: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Caixas (min, max) de cada cluster no espaco de camera, (X*Y*Z, 3), na
+    # mesma ordem da grade. As coordenadas x e y de camera sao lineares no
+    # valor normalizado e na profundidade, entao os extremos estao nos cantos.
+    nx, ny, nz = dims
+    depths = slice_depths(dims, near, far)
+    corners = []
+    for row, n in ((0, nx), (1, ny)):
+        edges = np.linspace(-1.0, 1.0, n + 1)
+        coords = _view_coord(projection, row, edges[:, None], depths[None, :])  # (n + 1, Z + 1)
+        four = np.stack((coords[:-1, :-1], coords[1:, :-1], coords[:-1, 1:], coords[1:, 1:]))
+        corners.append((four.min(axis=0), four.max(axis=0)))  # (n, Z)
+
+    (x_lo, x_hi), (y_lo, y_hi) = corners
+    shape = (nz, ny, nx)
+    lo = np.empty(shape + (3,))
+    hi = np.empty(shape + (3,))
+    lo[..., 0] = x_lo.T[:, None, :]
+    hi[..., 0] = x_hi.T[:, None, :]
+    lo[..., 1] = y_lo.T[:, :, None]
+    hi[..., 1] = y_hi.T[:, :, None]
+    lo[..., 2] = -depths[1:, None, None]
+    hi[..., 2] = -depths[:-1, None, None]
+    return lo.reshape(-1, 3), hi.reshape(-1, 3)
+
+
+def assign_lights(view_positions: np.ndarray, radii: np.ndarray, projection: np.ndarray,
+                  dims: Sequence[int], near: float, far: float,
+                  bounds: Tuple[np.ndarray, np.ndarray] = None) -> Clusters:
+    # Distribui luzes (posicoes no espaco de camera) pelos clusters.
+    # bounds: resultado de cluster_bounds() para reaproveitar entre frames.
+    nx, ny, nz = dims
+    total = nx * ny * nz
+    centers = np.asarray(view_positions, dtype=np.float64).reshape(-1, 3)
+    radii = np.asarray(radii, dtype=np.float64)
+
+    # 1. intervalo de profundidade e retangulo na tela de cada esfera
+    d_min = np.maximum(-centers[:, 2] - radii, near)
+    d_max = np.minimum(-centers[:, 2] + radii, far)
+    visible = d_min <= d_max
+    ranges = []
+    for row, n in ((0, nx), (1, ny)):
+        ndc = np.stack([_ndc(projection, row, centers[:, row] + sign * radii, depth)
+                        for sign in (-1.0, 1.0) for depth in (d_min, d_max)])
+        lo, hi = ndc.min(axis=0), ndc.max(axis=0)
+        visible &= (hi >= -1.0) & (lo <= 1.0)
+        ranges.append((np.clip(np.floor((lo + 1.0) * 0.5 * n), 0, n - 1).astype(np.int64),
+                       np.clip(np.floor((hi + 1.0) * 0.5 * n), 0, n - 1).astype(np.int64)))
+    scale, bias = depth_params(dims, near, far)
+    with np.errstate(divide="ignore"):
+        z0 = np.clip(np.floor(np.log(d_min) * scale + bias), 0, nz - 1).astype(np.int64)
+        z1 = np.clip(np.floor(np.log(np.maximum(d_max, near)) * scale + bias), 0, nz - 1).astype(np.int64)
+
+    lights = np.flatnonzero(visible)
+    (x0, x1), (y0, y1) = ranges
+    x0, y0, z0 = x0[lights], y0[lights], z0[lights]
+    sx = x1[lights] - x0 + 1
+    sy = y1[lights] - y0 + 1
+    sz = z1[lights] - z0 + 1
+
+    # 2. cada luz vira sx * sy * sz pares (luz, cluster)
+    counts = sx * sy * sz
+    owner = np.repeat(np.arange(len(lights)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    width = sx[owner]
+    plane = width * sy[owner]
+    cx = x0[owner] + local % width
+    cy = y0[owner] + (local % plane) // width
+    cz = z0[owner] + local // plane
+    cluster = (cz * ny + cy) * nx + cx
+
+    # 3. distancia do centro da esfera ate a caixa do cluster
+    lo, hi = bounds if bounds is not None else cluster_bounds(projection, dims, near, far)
+    light = lights[owner]
+    center = centers[light]
+    nearest = np.clip(center, lo[cluster], hi[cluster])
+    keep = ((nearest - center) ** 2).sum(axis=1) <= radii[light] ** 2
+    cluster = cluster[keep]
+    light = light[keep]
+
+    # 4. agrupa por cluster
+    order = np.argsort(cluster, kind="stable")
+    per_cluster = np.bincount(cluster, minlength=total)
+    grid = np.empty((total, 2), dtype=np.uint32)
+    grid[:, 0] = np.cumsum(per_cluster) - per_cluster
+    grid[:, 1] = per_cluster
+    return Clusters(grid, light[order].astype(np.uint16), int(np.count_nonzero(per_cluster)))
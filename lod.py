@@ -0,0 +1,268 @@
+import math
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from geometry import FLOATS_PER_VERTEX, smooth_normals
+
+# Niveis de detalhe (LOD).
+# Cada malha tem uma cadeia de niveis, do mais fino (0) ao mais grosseiro, e
+# cada nivel guarda o seu erro geometrico no espaco do objeto:
+# - formas procedurais (esfera, cilindro): um nivel por tesselacao, com o erro
+#   de corda r * (1 - cos(pi / slices));
+# - malhas importadas: decimacao por metrica de erro quadrico (QEM) com
+#   agrupamento de vertices em grade, totalmente vetorizada.
+# No desenho o erro e projetado em pixels com os parametros da projecao atual
+# (gluPerspective: fovy; glOrtho: meia-altura) e o nivel escolhido e o mais
+# grosseiro cujo erro na tela fica abaixo de MAX_PIXEL_ERROR. A histerese evita
+# alternar entre dois niveis quando o objeto esta perto do limite.
+# Sem dependencia de OpenGL: objects3d registra os niveis no registro de malhas.
+
+MAX_PIXEL_ERROR = 0.5
+
+# Fracao de folga em torno do limite: so engrossa abaixo de
+# MAX * (1 - HYSTERESIS) e so refina acima de MAX * (1 + HYSTERESIS)
+HYSTERESIS = 0.25
+
+# Tesselacoes (slices, stacks) de cada cadeia procedural; a primeira e a padrao
+SPHERE_LEVELS = ((40, 40), (24, 24), (16, 16), (10, 10), (6, 6))
+CYLINDER_LEVELS = ((32, 8), (20, 4), (12, 2), (8, 1))
+
+# Fracao de triangulos mantida em cada nivel decimado
+DECIMATION_RATIOS = (0.5, 0.25, 0.125, 0.0625)
+
+
+class LODLevel(NamedTuple):
+    mesh_name: str        # nome no registro de malhas (meshes.py)
+    error: float          # erro geometrico no espaco do objeto
+    triangles: int
+
+
+class LODChain:
+
+    def __init__(self, name: str, levels: Sequence[LODLevel]) -> None:
+        self.name = name
+        self.levels: List[LODLevel] = list(levels)
+        self.errors = np.array([level.error for level in self.levels])
+        # nivel atual do objeto desenhado sozinho (histerese)
+        self.current = 0
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def select(self, pixels_per_unit: float) -> LODLevel:
+        # Escolhe (com histerese) o nivel de um unico objeto
+        level = select_levels(self.errors, np.array([pixels_per_unit]), np.array([self.current]))[0]
+        self.current = int(level)
+        return self.levels[self.current]
+
+    def reset(self) -> None:
+        self.current = 0
+
+
+def chord_error(radius: float, slices: int) -> float:
+    # Distancia maxima entre o circulo e o poligono de `slices` lados inscrito
+    return radius * (1.0 - math.cos(math.pi / slices))
+
+
+def pixels_per_unit(projection: str, fovy: float, ortho_size: float, viewport_height: int,
+                    depth) -> np.ndarray:
+    # Quantos pixels (na vertical) ocupa uma unidade do mundo a uma dada
+    # profundidade (distancia ao longo do eixo de visao), para a projecao de
+    # setup_projection(): gluPerspective(fovy, ...) ou glOrtho(+-ortho_size)
+    half_height = viewport_height * 0.5
+    depth = np.asarray(depth, dtype=np.float64)
+    if projection == "perspective":
+        scale = half_height / math.tan(math.radians(fovy) * 0.5)
+        return scale / np.maximum(depth, 1e-6)
+    return np.full_like(depth, half_height / ortho_size)
+
+
+def select_levels(errors: np.ndarray, pixels_per_unit: np.ndarray, current: np.ndarray,
+                  max_error: float = MAX_PIXEL_ERROR, hysteresis: float = HYSTERESIS) -> np.ndarray:
+    # Nivel de cada objeto (vetorizado). errors: erro de cada nivel (crescente);
+    # pixels_per_unit e current: um valor por objeto.
+    screen = errors[None, :] * pixels_per_unit[:, None]
+    # mais grosseiro que ainda respeita o limite (o nivel 0 sempre vale)
+    def coarsest(limit: float) -> np.ndarray:
+        ok = screen <= limit
+        ok[:, 0] = True
+        return ok.shape[1] - 1 - np.argmax(ok[:, ::-1], axis=1)
+
+    target = coarsest(max_error)
+    relaxed = coarsest(max_error * (1.0 - hysteresis))
+    current = np.clip(current, 0, len(errors) - 1)
+    current_error = np.take_along_axis(screen, current[:, None], axis=1)[:, 0]
+
+    # Engrossa so ate onde o erro fica bem abaixo do limite; refina so se o
+    # nivel atual passar bem acima dele. Caso contrario mantem o nivel atual.
+    return np.where(target > current, np.maximum(relaxed, current),
+                    np.where(current_error > max_error * (1.0 + hysteresis), target, current))
+
+
+class LODSelector:
+    # Niveis atuais de muitos objetos (instancias do grafo de cena), com a
+    # histerese guardada por objeto
+
+    def __init__(self) -> None:
+        self._current: Dict[str, np.ndarray] = {}
+
+    def select(self, key: str, chain: LODChain, indices: np.ndarray, count: int,
+               pixels: np.ndarray) -> np.ndarray:
+        # indices: objetos avaliados (entre `count`); pixels: pixels por unidade de cada um
+        current = self._current.get(key)
+        if current is None or len(current) != count:
+            current = self._current[key] = np.zeros(count, dtype=np.int64)
+        levels = select_levels(chain.errors, pixels, current[indices])
+        current[indices] = levels
+        return levels
+
+    def reset(self) -> None:
+        self._current.clear()
+
+
+# ---------------------------------------------------------------------------
+# Decimacao por erro quadrico (QEM) com agrupamento em grade
+# ---------------------------------------------------------------------------
+
+def _face_planes(positions: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Plano (a, b, c, d) unitario e area de cada triangulo
+    p = positions[indices]
+    normal = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    area2 = np.linalg.norm(normal, axis=1)
+    valid = area2 > 1e-20
+    unit = np.zeros_like(normal)
+    unit[valid] = normal[valid] / area2[valid, None]
+    plane = np.hstack((unit, -np.einsum("ij,ij->i", unit, p[:, 0])[:, None]))
+    return plane, 0.5 * area2
+
+
+# Posicoes sao arredondadas para uma grade de 2^20 passos antes do
+# agrupamento: vertices duplicados em costuras (mesma posicao a menos de
+# erro de arredondamento) caem sempre no mesmo grupo, mesmo quando a borda
+# de uma celula passa exatamente sobre eles. Sem isso a costura abre um buraco.
+_SNAP_BITS = 20
+
+
+def _cluster(positions: np.ndarray, resolution: int) -> Tuple[np.ndarray, int]:
+    lo = positions.min(axis=0)
+    span = np.maximum(positions.max(axis=0) - lo, 1e-9)
+    snapped = np.round((positions - lo) / span.max() * (1 << _SNAP_BITS)).astype(np.int64)
+    cells = np.minimum(snapped * resolution >> _SNAP_BITS, resolution - 1)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    return cluster.ravel(), int(cluster.max()) + 1
+
+
+def _collapse(vertices: np.ndarray, indices: np.ndarray, planes: np.ndarray,
+              quadrics: np.ndarray, resolution: int):
+    positions = vertices[:, :3].astype(np.float64)
+    cluster, count = _cluster(positions, resolution)
+
+    # quadrica de cada grupo: soma das quadricas das faces de cada vertice
+    corner_cluster = cluster[indices].ravel()
+    q = np.zeros((count, 16))
+    for k in range(16):
+        q[:, k] = np.bincount(corner_cluster, np.repeat(quadrics[:, k // 4, k % 4], 3), count)
+    q = q.reshape(count, 4, 4)
+
+    weights = np.bincount(cluster, minlength=count).astype(np.float64)
+    mean = np.stack([np.bincount(cluster, positions[:, a], count) for a in range(3)], 1) / weights[:, None]
+
+    # posicao que minimiza o erro: (A + eps I) x = eps * media - b, onde eps
+    # regulariza grupos planos/degenerados puxando o ponto para a media
+    a = q[:, :3, :3]
+    b = q[:, :3, 3]
+    eps = 1e-6 * np.maximum(np.trace(a, axis1=1, axis2=2), 1e-12)
+    x = np.linalg.solve(a + eps[:, None, None] * np.eye(3), (eps[:, None] * mean - b)[..., None])[..., 0]
+
+    # erro geometrico: maior distancia entre o vertice novo e os planos das
+    # faces originais que ele substitui
+    homogeneous = np.hstack((x, np.ones((count, 1))))
+    corner_faces = np.repeat(np.arange(len(indices)), 3)
+    distance = np.abs(np.einsum("ij,ij->i", planes[corner_faces], homogeneous[corner_cluster]))
+    error = float(distance.max(initial=0.0))
+
+    new_indices = cluster[indices]
+    keep = ((new_indices[:, 0] != new_indices[:, 1]) & (new_indices[:, 1] != new_indices[:, 2])
+            & (new_indices[:, 0] != new_indices[:, 2]))
+    new_indices = new_indices[keep]
+    # remove triangulos repetidos (mesmos tres vertices)
+    _, first = np.unique(np.sort(new_indices, axis=1), axis=0, return_index=True)
+    new_indices = new_indices[np.sort(first)]
+
+    extra = vertices.shape[1] - 3
+    attrs = np.stack([np.bincount(cluster, vertices[:, 3 + a], count) for a in range(extra)], 1) / weights[:, None]
+    return x, attrs, new_indices, error
+
+
+def decimate(vertices: np.ndarray, indices: np.ndarray, target_triangles: int):
+    # Simplifica uma malha intercalada (posicao, normal, cor) ate cerca de
+    # target_triangles. Retorna (vertices, indices (M, 3), erro geometrico).
+    # A resolucao da grade e ajustada por busca binaria ate o numero de
+    # triangulos ficar o mais perto possivel do alvo, sem passar dele.
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    # quadrica (4x4) de cada triangulo: p p^T ponderada pela area
+    planes, areas = _face_planes(vertices[:, :3].astype(np.float64), indices)
+    quadrics = planes[:, :, None] * planes[:, None, :] * areas[:, None, None]
+
+    best = None
+    lo, hi = 2, 1024
+    while lo <= hi:
+        resolution = (lo + hi) // 2
+        result = _collapse(vertices, indices, planes, quadrics, resolution)
+        if len(result[2]) <= target_triangles:
+            best = result
+            lo = resolution + 1
+        else:
+            hi = resolution - 1
+    if best is None:
+        best = _collapse(vertices, indices, planes, quadrics, 2)
+
+    positions, attrs, new_indices, error = best
+    # so sobram os vertices usados
+    used, remap = np.unique(new_indices, return_inverse=True)
+    new_indices = remap.reshape(-1, 3)
+    positions = positions[used]
+    colors = attrs[used, 3:6]
+    normals = smooth_normals(positions, new_indices)
+
+    out = np.hstack((positions, normals, colors)).astype(np.float32)
+    return out, new_indices.astype(np.uint32), error
+
+
+def decimated_levels(vertices: np.ndarray, indices: np.ndarray,
+                     ratios: Sequence[float] = DECIMATION_RATIOS):
+    # [(vertices, indices, erro), ...] para cada fracao de triangulos, em
+    # ordem crescente de erro; niveis que nao reduzem mais sao descartados
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+    indices = np.asarray(indices).reshape(-1, 3)
+    levels = []
+    last = len(indices)
+    for ratio in ratios:
+        target = max(4, int(len(indices) * ratio))
+        out, out_indices, error = decimate(vertices, indices, target)
+        if len(out_indices) >= last or not len(out_indices):
+            continue
+        if levels:
+            error = max(error, levels[-1][2])
+        levels.append((out, out_indices, error))
+        last = len(out_indices)
+    return levels
+
+
+def level_name(name: str, level: int) -> str:
+    # Nome no registro de malhas; o nivel 0 usa o proprio nome do objeto
+    return name if level == 0 else f"{name}#lod{level}"
+
+
+def projected_depth(model_view: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    # Profundidade (distancia ao longo do eixo de visao) de pontos do modelo
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    return -(centers @ model_view[2, :3] + model_view[2, 3])
+
+
+def matrix_scale(matrices: np.ndarray) -> np.ndarray:
+    # Maior fator de escala de cada matriz (N, 4, 4) (norma das colunas 3x3)
+    return np.linalg.norm(matrices[:, :3, :3], axis=1).max(axis=1)
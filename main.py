@@ -1,26 +1,117 @@
-from OpenGL.GLUT import *
-import scene
+import argparse
+
+import gl_runtime
+import input_trace
+import light_clusters
+import vertex_formats
+
+# Os modulos que usam OpenGL (scene, objects3d, ...) so sao importados em
+# main(), depois de gl_runtime.select_profile(): as flags do perfil precisam
+# ser definidas antes do primeiro import do PyOpenGL.
 
 WIDTH = 800
 HEIGHT = 600
 
 def main():
+    parser = argparse.ArgumentParser(description="Trabalho 2 - TG3D e Modelos de Iluminacao")
+    parser.add_argument("--continuous", action="store_true",
+                        help="redesenha continuamente a ~60 FPS em vez de sob demanda")
+    parser.add_argument("--profile", action="store_true",
+                        help="mede tempos de CPU/GPU por etapa do frame (overlay com 'o')")
+    parser.add_argument("--profile-json", metavar="ARQUIVO",
+                        help="ao sair, grava os percentis de cada etapa em JSON (implica --profile)")
+    parser.add_argument("--model", metavar="ARQUIVO",
+                        help="importa uma malha OBJ ou PLY binario (tecla '5'); cache em ARQUIVO.mshcache")
+    parser.add_argument("--model-lod", action="store_true",
+                        help="gera niveis de detalhe decimados para o modelo importado")
+    parser.add_argument("--vertex-format", default="float32", metavar="FORMATO",
+                        help="layout dos vertices do modelo na GPU: float32, compact, half "
+                             "ou posicao,normal,cor (ver vertex_formats.py)")
+    parser.add_argument("--point-lights", type=int, default=0, metavar="N",
+                        help="luzes pontuais extras no modo phong (tecla 'm'; maximo %d)"
+                             % light_clusters.MAX_LIGHTS)
+    parser.add_argument("--capture", metavar="CAMINHO",
+                        help="grava os frames desenhados: diretorio de PNGs ou arquivo de video bruto "
+                             "(ver --capture-format); use --continuous para taxa constante")
+    parser.add_argument("--capture-format", choices=("png", "raw"), default="png",
+                        help="png: um PNG por frame; raw: RGB24 concatenado + CAMINHO.json")
+    parser.add_argument("--record-trace", metavar="ARQUIVO",
+                        help="grava teclado, mouse e reshape com os instantes de cada evento, para "
+                             "reproduzir a sessao com python -m benchmarks.replay")
+    parser.add_argument("--gl-profile", choices=gl_runtime.PROFILES, default=gl_runtime.default_profile(),
+                        help="release: sem glGetError por chamada; debug: checagem do PyOpenGL + "
+                             "callback GL_KHR_debug (padrao: TG3D_GL_PROFILE ou release)")
+    args = parser.parse_args()
+    try:
+        vertex_format = vertex_formats.parse_format(args.vertex_format)
+    except ValueError as error:
+        parser.error(str(error))
+    if not 0 <= args.point_lights <= light_clusters.MAX_LIGHTS:
+        parser.error(f"--point-lights deve estar entre 0 e {light_clusters.MAX_LIGHTS}")
+
+    gl_runtime.select_profile(args.gl_profile)
+    from OpenGL.GLUT import (GLUT_ACTION_GLUTMAINLOOP_RETURNS, GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_DEBUG,
+                             GLUT_DEPTH, GLUT_DOUBLE, GLUT_RGBA, glutCloseFunc, glutCreateWindow,
+                             glutDisplayFunc, glutInit, glutInitContextFlags, glutInitDisplayMode,
+                             glutInitWindowPosition, glutInitWindowSize, glutKeyboardFunc, glutMainLoop,
+                             glutMouseFunc, glutReshapeFunc, glutSetOption, glutSpecialFunc)
+    import capture
+    import objects3d
+    from profiler import frame_profiler
+    import scene
+    import scheduler
+
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_DEPTH)
+    if gl_runtime.debug_context() and bool(glutInitContextFlags):
+        glutInitContextFlags(GLUT_DEBUG)
     glutInitWindowSize(WIDTH, HEIGHT)
     glutInitWindowPosition(100, 100)
     glutCreateWindow(b"Trabalho 2 - TG3D e Modelos de Iluminacao")
 
     scene.init_gl(WIDTH, HEIGHT)
 
+    if args.model:
+        scene.current_object = objects3d.load_model(args.model, scene.MODEL_NAME, args.model_lod,
+                                                    vertex_format)
+    scene.set_point_light_count(args.point_lights)
+
+    # glutLeaveMainLoop() (ESC) volta para ca em vez de encerrar o processo
+    glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+
+    if args.profile or args.profile_json:
+        frame_profiler.enable()
+
+    # Callbacks de entrada passam por input_trace (anotados com --record-trace)
     glutDisplayFunc(scene.display)
-    glutReshapeFunc(scene.reshape)
-    glutKeyboardFunc(scene.keyboard)
-    glutSpecialFunc(scene.special_keys)
-    glutMouseFunc(scene.mouse)    # <-- mouse para clicar nos botoes
-    glutTimerFunc(16, scene.timer, 0)
+    glutReshapeFunc(input_trace.recorded(input_trace.RESHAPE, scene.reshape))
+    glutKeyboardFunc(input_trace.recorded(input_trace.KEYBOARD, scene.keyboard))
+    glutSpecialFunc(input_trace.recorded(input_trace.SPECIAL, scene.special_keys))
+    glutMouseFunc(input_trace.recorded(input_trace.MOUSE, scene.mouse))    # <-- mouse para clicar nos botoes
+    if bool(glutCloseFunc):
+        glutCloseFunc(scene.shutdown)
+
+    if args.capture:
+        capture.start(args.capture, args.capture_format)
+    if args.record_trace:
+        # estado inicial da cena (e do modelo importado) para a reproducao
+        state = input_trace.scene_state(scene)
+        if args.model:
+            state.update(model_lod=args.model_lod, vertex_format=args.vertex_format)
+        input_trace.start(args.record_trace, state)
+
+    # Redesenho sob demanda (padrao) ou continuo, ver scheduler.py
+    scheduler.start("continuous" if args.continuous else "on_demand")
 
     glutMainLoop()
+    input_trace.stop()
+
+    if args.profile_json:
+        frame_profiler.dump_json(args.profile_json)
+    if capture.last_summary is not None:
+        summary = capture.last_summary
+        print(f"captura: {summary['written']}/{summary['captured']} frames gravados, "
+              f"{summary['dropped']} perdidos, {summary['stalls']} esperas pela GPU")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,498 @@
+import hashlib
+import os
+import struct
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import mesh_opt
+from geometry import FLOATS_PER_VERTEX, interleave, smooth_normals
+
+# Importacao de malhas OBJ e PLY binario para o layout intercalado de
+# geometry.py (posicao + normal + cor, float32) com indices uint32 (M, 3).
+# - Os parsers trabalham sobre o arquivo inteiro como um array de bytes: linhas,
+#   tokens e numeros sao separados com operacoes vetorizadas do NumPy, sem criar
+#   objetos Python por vertice ou por face. O PLY binario e lido direto do
+#   arquivo mapeado em memoria com dtypes estruturados.
+# - O resultado vai para um cache binario versionado gravado ao lado do arquivo
+#   (modelo.obj -> modelo.obj.mshcache). Nas proximas vezes os arrays saem do
+#   cache com np.memmap e vao direto para glBufferData, sem copia nem parsing.
+#   O cache vale enquanto tamanho/mtime da fonte nao mudarem; se so o mtime
+#   mudou, o hash do conteudo decide.
+# - Antes de ir para o cache a malha passa por mesh_opt.optimize() (vertices
+#   soldados, triangulos na ordem do cache de vertices), que e caro demais para
+#   repetir a cada abertura de um modelo com milhoes de triangulos.
+# Sem dependencia de OpenGL: objects3d.load_model() registra a malha na GPU.
+
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".mshcache"
+
+# As malhas sao centralizadas e escaladas para caber numa esfera deste raio
+# (mesma escala dos objetos da cena); o cache ja guarda os vertices ajustados
+MODEL_RADIUS = 1.5
+
+# Cor usada quando o arquivo nao traz cor por vertice
+MODEL_COLOR = (0.75, 0.75, 0.75)
+
+# Cabecalho: magic, versao, tamanho da fonte, mtime (ns), hash da fonte,
+# numero de vertices, numero de triangulos, raio de ajuste
+_MAGIC = b"MSHC"
+_HEADER = struct.Struct("<4sIQq16sQQf")
+_HEADER_SIZE = 128
+
+_HASH_CHUNK = 8 * 1024 * 1024
+
+# Faces por bloco na leitura de PLYs com faces de tamanhos variados
+_JUMP_BLOCK = 32
+
+_NEWLINE = ord("\n")
+_SPACE = ord(" ")
+_SLASH = ord("/")
+_HASH = ord("#")
+
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
+
+# ---------------------------------------------------------------------------
+# Utilitarios comuns
+# ---------------------------------------------------------------------------
+
+def _fan_triangles(sizes: np.ndarray) -> np.ndarray:
+    # Triangulacao em leque de poligonos guardados em sequencia: para um
+    # poligono de n cantos que comeca em o, (o, o+i, o+i+1) com i = 1..n-2.
+    # Retorna (T, 3) com posicoes na lista de cantos.
+    sizes = np.asarray(sizes, dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    per_face = np.maximum(sizes - 2, 0)
+    first = np.repeat(starts, per_face)
+    local = np.arange(int(per_face.sum())) - np.repeat(np.cumsum(per_face) - per_face, per_face)
+    return np.stack((first, first + local + 1, first + local + 2), axis=1)
+
+
+def _fit(positions: np.ndarray, radius: float) -> np.ndarray:
+    # Centraliza na caixa envolvente e escala para a esfera de raio `radius`
+    if not len(positions):
+        return positions
+    center = (positions.min(axis=0) + positions.max(axis=0)) * 0.5
+    extent = np.sqrt(((positions - center) ** 2).sum(axis=1).max())
+    return (positions - center) * (radius / extent if extent > 0 else 1.0)
+
+
+def _assemble(positions: np.ndarray, normals: Optional[np.ndarray], colors,
+              indices: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    positions = _fit(np.asarray(positions, dtype=np.float64), radius)
+    if normals is None:
+        normals = smooth_normals(positions, indices)
+    return interleave(positions, normals, colors), np.ascontiguousarray(indices, dtype=np.uint32)
+
+
+# ---------------------------------------------------------------------------
+# OBJ
+# ---------------------------------------------------------------------------
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Posicoes de todos os trechos [starts, ends], concatenadas
+    lengths = ends + 1 - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(int(lengths.sum())) + offsets
+
+
+def _line_bytes(text: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Concatena os trechos text[starts:ends + 1] (cada um termina no '\n')
+    return text[_ranges(starts, ends)]
+
+
+def _token_counts(chunk: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Quantos tokens separados por espaco tem cada linha do trecho
+    blank = (chunk == _SPACE) | (chunk == _NEWLINE)
+    token_start = ~blank & np.concatenate(([True], blank[:-1]))
+    line_starts = np.cumsum(lengths) - lengths
+    return np.add.reduceat(token_start.astype(np.int64), line_starts)
+
+
+def _parse_numbers(chunk: np.ndarray, dtype, expected: int, what: str) -> np.ndarray:
+    try:
+        values = np.fromstring(chunk.tobytes(), dtype=dtype, sep=" ")
+    except ValueError:
+        # texto que nao e numero (o NumPy para no primeiro token invalido)
+        values = ()
+    if len(values) != expected:
+        raise ValueError(f"OBJ: {what} malformados")
+    return values
+
+
+def _gather(values: np.ndarray, counts: np.ndarray, columns: int) -> np.ndarray:
+    # Primeiros `columns` valores de cada linha, com `counts` valores por linha
+    starts = np.cumsum(counts) - counts
+    return values[starts[:, None] + np.arange(columns)]
+
+
+def _strip_comments(text: np.ndarray, ends: np.ndarray) -> None:
+    # Troca por espacos tudo de um '#' ate o fim da linha (comentario inteiro
+    # ou no fim de uma linha "v"/"f"); so percorre as linhas com '#'
+    hashes = np.flatnonzero(text == _HASH)
+    if not len(hashes):
+        return
+    line_end = ends[np.searchsorted(ends, hashes)]
+    first = np.concatenate(([True], line_end[1:] != line_end[:-1]))
+    text[_ranges(hashes[first], line_end[first] - 1)] = _SPACE
+
+
+def parse_obj(data: bytes, radius: float = MODEL_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+    # Suporta v (com cor opcional "v x y z r g b"), vn e f com v, v/vt, v//vn
+    # ou v/vt/vn (layout livre por canto), indices negativos, poligonos
+    # (triangulados em leque), comentarios e linhas indentadas.
+    text = np.frombuffer(data, dtype=np.uint8).copy()
+    text[(text == ord("\t")) | (text == ord("\r"))] = _SPACE
+    if not len(text) or text[-1] != _NEWLINE:
+        text = np.append(text, np.uint8(_NEWLINE))
+
+    ends = np.flatnonzero(text == _NEWLINE)
+    _strip_comments(text, ends)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # espacos no inicio da linha: avanca ate a palavra-chave (a linha so de
+    # espacos para no '\n')
+    indented = np.flatnonzero(text[starts] == _SPACE)
+    while len(indented):
+        starts[indented] += 1
+        indented = indented[text[starts[indented]] == _SPACE]
+    first = text[starts]
+    second = text[np.minimum(starts + 1, len(text) - 1)]
+    is_v = (first == ord("v")) & (second == _SPACE)
+    is_vn = (first == ord("v")) & (second == ord("n"))
+    is_f = (first == ord("f")) & (second == _SPACE)
+    if not is_v.any() or not is_f.any():
+        raise ValueError("OBJ sem vertices ou sem faces")
+
+    # vertices: 3 coordenadas (+ w ou + cor r g b)
+    chunk = _line_bytes(text, starts[is_v] + 2, ends[is_v])
+    counts = _token_counts(chunk, ends[is_v] + 1 - (starts[is_v] + 2))
+    values = _parse_numbers(chunk, np.float64, int(counts.sum()), "vertices")
+    positions = _gather(values, counts, 3)
+    colors = _gather(values[3:], counts, 3) if (counts >= 6).all() else MODEL_COLOR
+
+    normals = None
+    if is_vn.any():
+        chunk = _line_bytes(text, starts[is_vn] + 3, ends[is_vn])
+        counts = _token_counts(chunk, ends[is_vn] + 1 - (starts[is_vn] + 3))
+        normals = _gather(_parse_numbers(chunk, np.float64, int(counts.sum()), "normais"), counts, 3)
+
+    # faces: cantos por face e, em cada canto, 1 a 3 campos separados por '/'
+    face_starts, face_ends = starts[is_f] + 2, ends[is_f]
+    chunk = _line_bytes(text, face_starts, face_ends)
+    sizes = _token_counts(chunk, face_ends + 1 - face_starts)
+    corners = int(sizes.sum())
+    slashes = np.flatnonzero(chunk == _SLASH)
+    if len(slashes):
+        # "v//vn": campo vazio vira 0 (indice ausente, o OBJ conta a partir de 1)
+        empty = slashes[:-1][np.diff(slashes) == 1] + 1
+        chunk = np.insert(chunk, empty, np.uint8(ord("0")))
+        # "v/vt/": barra no fim do canto = ultimo campo ausente
+        slashes = np.flatnonzero(chunk == _SLASH)
+        trailing = slashes[(chunk[slashes + 1] == _SPACE) | (chunk[slashes + 1] == _NEWLINE)]
+        chunk[trailing] = _SPACE
+        # campos de cada canto: o layout pode mudar de uma face (ou canto) para
+        # outra, entao as barras sao contadas por token
+        blank = (chunk == _SPACE) | (chunk == _NEWLINE)
+        token = np.cumsum(~blank & np.concatenate(([True], blank[:-1]))) - 1
+        fields = np.bincount(token[chunk == _SLASH], minlength=corners) + 1
+        chunk[chunk == _SLASH] = _SPACE
+    else:
+        fields = np.ones(corners, dtype=np.int64)
+    if fields.max() > 3:
+        raise ValueError("OBJ: faces malformadas")
+    values = _parse_numbers(chunk, np.int64, int(fields.sum()), "faces")
+    # cantos sem vt/vn ficam com 0 nessas colunas
+    refs = np.zeros((corners, 3), dtype=np.int64)
+    column = np.arange(len(values)) - np.repeat(np.cumsum(fields) - fields, fields)
+    refs[np.repeat(np.arange(corners), fields), column] = values
+
+    # indices negativos contam a partir do ultimo elemento definido antes da face
+    line_index = np.flatnonzero(is_f)
+    v_before = np.repeat(np.cumsum(is_v)[line_index], sizes)
+    position_ref = np.where(refs[:, 0] < 0, refs[:, 0] + v_before, refs[:, 0] - 1)
+    triangles = _fan_triangles(sizes)
+
+    # normais do arquivo so quando todo canto referencia uma; senao sao
+    # calculadas para a malha inteira
+    if normals is not None and (refs[:, 2] != 0).all():
+        vn_before = np.repeat(np.cumsum(is_vn)[line_index], sizes)
+        normal_ref = np.where(refs[:, 2] < 0, refs[:, 2] + vn_before, refs[:, 2] - 1)
+        # cada par (posicao, normal) distinto vira um vertice
+        keys = position_ref * len(normals) + normal_ref
+        unique, inverse = np.unique(keys, return_inverse=True)
+        position_ref, normal_ref = unique // len(normals), unique % len(normals)
+        if not isinstance(colors, tuple):
+            colors = colors[position_ref]
+        return _assemble(positions[position_ref], normals[normal_ref], colors,
+                         inverse.reshape(-1)[triangles], radius)
+
+    return _assemble(positions, None, colors, position_ref[triangles], radius)
+
+
+# ---------------------------------------------------------------------------
+# PLY binario
+# ---------------------------------------------------------------------------
+
+def _ply_header(data: np.ndarray) -> Tuple[str, List[tuple], int]:
+    # (formato, [(elemento, quantidade, propriedades)], inicio dos dados)
+    marker = b"end_header"
+    head = bytes(data[:65536])
+    end = head.find(marker)
+    if not head.startswith(b"ply") or end < 0:
+        raise ValueError("Arquivo nao e um PLY")
+    body = end + len(marker)
+    body = head.index(b"\n", body) + 1
+
+    fmt = None
+    elements: List[tuple] = []
+    for line in head[:end].decode("ascii", "replace").splitlines():
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == "format":
+            fmt = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property" and elements:
+            if words[1] == "list":
+                elements[-1][2].append((words[4], _PLY_TYPES[words[2]], _PLY_TYPES[words[3]]))
+            else:
+                elements[-1][2].append((words[2], _PLY_TYPES[words[1]], None))
+    if fmt not in ("binary_little_endian", "binary_big_endian"):
+        raise ValueError(f"PLY: so o formato binario e suportado ({fmt})")
+    return fmt, elements, body
+
+
+def _ply_faces(data: np.ndarray, offset: int, count: int, props, order: str):
+    # Le um elemento com uma lista (faces). Caminho rapido: todas as listas
+    # com o mesmo tamanho viram um dtype estruturado de tamanho fixo.
+    # Retorna (cantos concatenados, tamanho de cada face, bytes consumidos).
+    position = next(i for i, (_, _, item) in enumerate(props) if item is not None)
+    list_name, count_type, _ = props[position]
+    prefix = offset + sum(np.dtype(dtype).itemsize for _, dtype, _ in props[:position])
+    first = int(data[prefix:prefix + np.dtype(count_type).itemsize].view(order + count_type)[0])
+
+    fields = []
+    for name, dtype, item in props:
+        if item is None:
+            fields.append((name, order + dtype))
+        else:
+            fields += [(name + "#n", order + dtype), (name, order + item, (first,))]
+    record = np.dtype(fields)
+    size = record.itemsize * count
+    if offset + size <= len(data):
+        faces = data[offset:offset + size].view(record)
+        if (faces[list_name + "#n"] == first).all():
+            return faces[list_name].reshape(-1).astype(np.int64), np.full(count, first), size
+
+    # Tamanhos variados (PLYs mistos): posicoes das faces por saltos dobrados
+    if len(props) != 1:
+        raise ValueError("PLY: faces com tamanhos variados e outras propriedades")
+    return _ply_variable_faces(data, offset, count, np.dtype(order + count_type),
+                               np.dtype(order + props[0][2]))
+
+
+def _read_at(data: np.ndarray, positions: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    # Um valor `dtype` em cada posicao (em bytes, sem alinhamento) de data
+    raw = data[positions[:, None] + np.arange(dtype.itemsize)]
+    return np.ascontiguousarray(raw).view(dtype).reshape(-1)
+
+
+def _ply_variable_faces(data: np.ndarray, offset: int, count: int, count_dtype: np.dtype,
+                        item_dtype: np.dtype):
+    # Faces "n i0 i1 ... i(n-1)" de tamanhos diferentes, sem laco por face.
+    # Para cada byte p da regiao, jump[p] e onde comecaria a face seguinte se
+    # uma face comecasse em p (uma tabela int64 por byte). Compondo jump
+    # consigo mesmo (saltos de 1, 2, 4... faces), a lista das primeiras 2^k
+    # faces, saltada 2^k faces, da as 2^k seguintes. Depois os cantos saem com
+    # np.repeat e os deslocamentos acumulados dos tamanhos, como no leque.
+    head, item = count_dtype.itemsize, item_dtype.itemsize
+    span = len(data) - offset - head + 1
+    if count <= 0 or span <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0
+    window = np.lib.stride_tricks.as_strided(data[offset:], shape=(span, head), strides=(1, 1))
+    lengths = np.ascontiguousarray(window).view(count_dtype).reshape(-1).astype(np.int64)
+    # posicoes fora da regiao (ou contagens invalidas) caem no sorvedouro `span`
+    jump = np.empty(span + 1, dtype=np.int64)
+    np.maximum(lengths, 0, out=jump[:span])
+    jump[:span] *= item
+    jump[:span] += np.arange(head, span + head)
+    np.minimum(jump, span, out=jump)
+    jump[span] = span
+    # Dobra so ate blocos de _JUMP_BLOCK faces: cada composicao percorre a
+    # tabela inteira, enquanto um bloco a mais e so um indice de _JUMP_BLOCK
+    # posicoes
+    starts = np.zeros(1, dtype=np.int64)
+    while len(starts) < min(count, _JUMP_BLOCK):
+        starts = np.concatenate((starts, jump[starts]))
+        jump = jump[jump]
+    blocks = [starts]
+    total = len(starts)
+    while total < count:
+        blocks.append(jump[blocks[-1]])
+        total += len(blocks[-1])
+    starts = np.concatenate(blocks)[:count]
+    if starts[-1] >= span:
+        raise ValueError("PLY: faces truncadas")
+    sizes = lengths[starts]
+    if (sizes < 0).any() or starts[-1] + head + sizes[-1] * item > len(data) - offset:
+        raise ValueError("PLY: faces truncadas")
+
+    # cantos: para cada face, head + i * item a partir do inicio dela
+    local = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    positions = offset + np.repeat(starts + head, sizes) + local * item
+    corners = _read_at(data, positions, item_dtype).astype(np.int64)
+    return corners, sizes, int(starts[-1] + head + sizes[-1] * item)
+
+
+def parse_ply(data, radius: float = MODEL_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+    # data: bytes ou array uint8 (ex.: np.memmap do arquivo)
+    data = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray)) else data
+    fmt, elements, offset = _ply_header(data)
+    order = "<" if fmt == "binary_little_endian" else ">"
+
+    vertices = faces = sizes = None
+    for name, count, props in elements:
+        if any(item is not None for _, _, item in props):
+            corners, face_sizes, size = _ply_faces(data, offset, count, props, order)
+            if name == "face":
+                faces, sizes = corners, face_sizes
+        else:
+            record = np.dtype([(prop, order + dtype) for prop, dtype, _ in props])
+            size = record.itemsize * count
+            if name == "vertex":
+                vertices = data[offset:offset + size].view(record)
+        offset += size
+    if vertices is None or faces is None:
+        raise ValueError("PLY sem vertices ou sem faces")
+
+    names = vertices.dtype.names
+    positions = np.stack([vertices[axis] for axis in "xyz"], axis=1).astype(np.float64)
+    normals = None
+    if all(axis in names for axis in ("nx", "ny", "nz")):
+        normals = np.stack([vertices[axis] for axis in ("nx", "ny", "nz")], axis=1)
+    colors = MODEL_COLOR
+    for channels in (("red", "green", "blue"), ("r", "g", "b"), ("diffuse_red", "diffuse_green", "diffuse_blue")):
+        if all(channel in names for channel in channels):
+            colors = np.stack([vertices[channel] for channel in channels], axis=1).astype(np.float32)
+            if vertices.dtype[channels[0]].kind in "ui":
+                colors /= 255.0
+            break
+
+    return _assemble(positions, normals, colors, faces[_fan_triangles(sizes)], radius)
+
+
+# ---------------------------------------------------------------------------
+# Cache binario
+# ---------------------------------------------------------------------------
+
+def cache_path(path: str) -> str:
+    return path + CACHE_SUFFIX
+
+
+def _file_hash(path: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _read_header(path: str) -> Optional[tuple]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) != _HEADER.size:
+        return None
+    header = _HEADER.unpack(raw)
+    return header if header[0] == _MAGIC else None
+
+
+def cache_is_valid(path: str, radius: float = MODEL_RADIUS) -> bool:
+    # O cache existe, e desta versao e corresponde ao conteudo atual da fonte
+    header = _read_header(cache_path(path))
+    if header is None:
+        return False
+    _, version, size, mtime_ns, digest, _, _, fit = header
+    stat = os.stat(path)
+    if version != CACHE_VERSION or size != stat.st_size or fit != np.float32(radius):
+        return False
+    if mtime_ns == stat.st_mtime_ns:
+        return True
+    # mtime mudou (copia, checkout...): compara o conteudo e atualiza o cabecalho
+    if _file_hash(path) != digest:
+        return False
+    try:
+        with open(cache_path(path), "r+b") as f:
+            f.write(_HEADER.pack(_MAGIC, version, size, stat.st_mtime_ns, digest, *header[5:]))
+    except OSError:
+        pass
+    return True
+
+
+def write_cache(path: str, vertices: np.ndarray, indices: np.ndarray,
+                radius: float = MODEL_RADIUS) -> None:
+    # Grava num arquivo temporario e troca de uma vez, para que uma leitura
+    # concorrente nunca veja um cache pela metade
+    stat = os.stat(path)
+    target = cache_path(path)
+    header = _HEADER.pack(_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns, _file_hash(path),
+                          len(vertices), len(indices), radius)
+    temp = f"{target}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(header.ljust(_HEADER_SIZE, b"\0"))
+        f.write(np.ascontiguousarray(vertices, dtype=np.float32).tobytes())
+        f.write(np.ascontiguousarray(indices, dtype=np.uint32).tobytes())
+    os.replace(temp, target)
+
+
+def read_cache(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Arrays mapeados do cache (somente leitura; as paginas so sao lidas
+    # quando glBufferData copia os dados para a GPU)
+    target = cache_path(path)
+    header = _read_header(target)
+    if header is None:
+        raise ValueError(f"{target} nao e um cache de malha")
+    vertex_count, triangle_count = header[5], header[6]
+    vertices = np.memmap(target, dtype=np.float32, mode="r", offset=_HEADER_SIZE,
+                         shape=(vertex_count, FLOATS_PER_VERTEX))
+    indices = np.memmap(target, dtype=np.uint32, mode="r",
+                        offset=_HEADER_SIZE + vertices.nbytes, shape=(triangle_count, 3))
+    return vertices, indices
+
+
+def parse_mesh(path: str, radius: float = MODEL_RADIUS,
+               optimized: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".obj":
+        with open(path, "rb") as f:
+            vertices, indices = parse_obj(f.read(), radius)
+    elif extension == ".ply":
+        vertices, indices = parse_ply(np.memmap(path, dtype=np.uint8, mode="r"), radius)
+    else:
+        raise ValueError(f"Formato de malha nao suportado: {path}")
+    return mesh_opt.optimize(vertices, indices) if optimized else (vertices, indices)
+
+
+def load_mesh(path: str, use_cache: bool = True,
+              radius: float = MODEL_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+    # (vertices (N, FLOATS_PER_VERTEX) float32, indices (M, 3) uint32).
+    # Com cache valido nao ha parsing: os arrays sao np.memmap do cache.
+    if use_cache and cache_is_valid(path, radius):
+        return read_cache(path)
+    vertices, indices = parse_mesh(path, radius)
+    if use_cache:
+        try:
+            write_cache(path, vertices, indices, radius)
+        except OSError:
+            # diretorio somente leitura: segue sem cache
+            pass
+    return vertices, indices
@@ -0,0 +1,168 @@
+import ctypes
+from typing import Dict, Optional
+
+import numpy as np
+from OpenGL.GL import *
+
+import vertex_formats
+from geometry import FLOATS_PER_VERTEX
+from vertex_formats import VertexFormat
+
+# Layout intercalado usado por todas as malhas do registro (ver geometry.py):
+# posicao (x, y, z) + normal (nx, ny, nz) + cor (r, g, b), tudo float32.
+STRIDE = FLOATS_PER_VERTEX * 4
+
+_NORMAL_OFFSET = ctypes.c_void_p(3 * 4)
+_COLOR_OFFSET = ctypes.c_void_p(6 * 4)
+
+# Malhas em formato compacto (vertex_formats.py) usam atributos genericos nestas
+# localizacoes, lidos pelos programas de decodificacao de shading.py. A posicao
+# fica no atributo 0, que e o que dispara o vertice no perfil de compatibilidade.
+VERTEX_FORMAT_ATTRIB_LOCATIONS = {
+    "aPosition": 0,
+    "aNormal": 4,
+    "aColor": 5,
+}
+
+_GL_TYPES = {
+    "float": GL_FLOAT,
+    "half": GL_HALF_FLOAT,
+    "short": GL_SHORT,
+    "int_2_10_10_10_rev": GL_INT_2_10_10_10_REV,
+    "ubyte": GL_UNSIGNED_BYTE,
+}
+
+
+class MeshBuffer:
+    # Malha ja enviada para a GPU: um VBO com os vertices intercalados,
+    # um EBO opcional com indices e um VAO que guarda os ponteiros de atributos.
+    # Depois de criada, desenhar a malha custa um unico glDrawArrays/glDrawElements.
+    # Com vertex_format (vertex_formats.py) os vertices vao quantizados para a
+    # GPU; encoding guarda o layout e a caixa usada para decodificar as posicoes.
+
+    def __init__(self, vertices: np.ndarray, indices: Optional[np.ndarray] = None,
+                 mode: int = GL_TRIANGLES, vertex_format: Optional[VertexFormat] = None) -> None:
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+
+        self.mode = mode
+        self.vertex_count = len(vertices)
+        self.index_count = 0
+        self.vbo = glGenBuffers(1)
+        self.ebo = None
+        self.vao = glGenVertexArrays(1) if bool(glGenVertexArrays) else None
+        self.encoding = None
+
+        if vertex_format is not None and vertex_format != vertex_formats.FULL:
+            encoded = vertex_formats.encode(vertices, vertex_format)
+            vertices = encoded.data
+            self.encoding = encoded._replace(data=None)
+        self.vertex_bytes = vertices.nbytes
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        if indices is not None:
+            indices = np.ascontiguousarray(indices, dtype=np.uint32).ravel()
+            self.index_count = len(indices)
+            self.ebo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        if self.vao is not None:
+            # O VAO captura os ponteiros e o EBO; no desenho basta religa-lo
+            glBindVertexArray(self.vao)
+            self.setup_arrays()
+            glBindVertexArray(0)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def setup_arrays(self) -> None:
+        # Aponta os arrays do pipeline fixo (gl_Vertex, gl_Normal, gl_Color)
+        # para o VBO. Tambem alimenta o shader Phong, que le esses mesmos atributos.
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self.encoding is not None:
+            self._setup_encoded_arrays()
+            return
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, STRIDE, None)
+        glNormalPointer(GL_FLOAT, STRIDE, _NORMAL_OFFSET)
+        glColorPointer(3, GL_FLOAT, STRIDE, _COLOR_OFFSET)
+        if self.ebo is not None:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+    def _setup_encoded_arrays(self) -> None:
+        # Formato compacto: atributos genericos (normalizados quando inteiros)
+        stride = self.encoding.stride
+        for attr in self.encoding.attributes:
+            location = VERTEX_FORMAT_ATTRIB_LOCATIONS[attr.name]
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, attr.components, _GL_TYPES[attr.type],
+                                  GL_TRUE if attr.normalized else GL_FALSE, stride,
+                                  ctypes.c_void_p(attr.offset))
+        if self.ebo is not None:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+    def draw(self) -> None:
+        if self.vao is not None:
+            glBindVertexArray(self.vao)
+        else:
+            glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+            self.setup_arrays()
+
+        if self.ebo is not None:
+            glDrawElements(self.mode, self.index_count, GL_UNSIGNED_INT, None)
+        else:
+            glDrawArrays(self.mode, 0, self.vertex_count)
+
+        if self.vao is not None:
+            glBindVertexArray(0)
+        else:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glPopClientAttrib()
+
+    def delete(self) -> None:
+        if self.vao is not None:
+            glDeleteVertexArrays(1, [self.vao])
+        buffers = [self.vbo] if self.ebo is None else [self.vbo, self.ebo]
+        glDeleteBuffers(len(buffers), buffers)
+        self.vao = self.vbo = self.ebo = None
+
+
+# Registro global de malhas, indexado pelo nome do objeto ("cube", "pyramid", ...)
+_meshes: Dict[str, MeshBuffer] = {}
+
+
+def register_mesh(name: str, vertices: np.ndarray, indices: Optional[np.ndarray] = None,
+                  mode: int = GL_TRIANGLES, vertex_format: Optional[VertexFormat] = None) -> MeshBuffer:
+    # Envia a malha para a GPU (uma unica vez) e guarda no registro.
+    # Registrar de novo o mesmo nome substitui e libera a malha anterior.
+    old = _meshes.pop(name, None)
+    if old is not None:
+        old.delete()
+    mesh = MeshBuffer(vertices, indices, mode, vertex_format)
+    _meshes[name] = mesh
+    return mesh
+
+
+def has_mesh(name: str) -> bool:
+    return name in _meshes
+
+
+def get_mesh(name: str) -> MeshBuffer:
+    return _meshes[name]
+
+
+def draw_mesh(name: str) -> None:
+    _meshes[name].draw()
+
+
+def delete_all() -> None:
+    # Libera todos os buffers (usar antes de destruir o contexto OpenGL)
+    for mesh in _meshes.values():
+        mesh.delete()
+    _meshes.clear()
+
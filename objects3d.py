@@ -1,10 +1,23 @@
+import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
+
+import glstate
+import lod
+import mesh_io
+import mesh_opt
+import meshes
+from geometry import (
+    CUBE_COLOR, PYRAMID_COLOR, CYLINDER_COLOR, SPHERE_COLOR,
+    CYLINDER_RADIUS, CYLINDER_HEIGHT, CYLINDER_DETAIL, SPHERE_RADIUS, SPHERE_DETAIL,
+    cube_vertex_data, pyramid_vertex_data, cylinder_vertex_data, sphere_vertex_data,
+    object_bounds as _default_bounds, vertex_bounds,
+)
 
 def draw_axes() -> None:
     # Desativa iluminacao para desenhar eixos com cor fixa
-    glDisable(GL_LIGHTING)
+    # (no modo phong ela ja esta desligada e nada e enviado ao driver)
+    was_lit = glstate.is_enabled(GL_LIGHTING)
+    glstate.disable(GL_LIGHTING)
     glBegin(GL_LINES)
 
     # X - vermelho
@@ -23,12 +36,13 @@ def draw_axes() -> None:
     glVertex3f(0.0, 0.0, 5.0)
 
     glEnd()
-    # Reativa iluminacao para o restante da cena
-    glEnable(GL_LIGHTING)
+    # Restaura a iluminacao apenas se ela estava ligada antes
+    if was_lit:
+        glstate.enable(GL_LIGHTING)
 
 
 def draw_cube() -> None:
-    glColor3f(0.8, 0.2, 0.2)
+    glColor3f(*CUBE_COLOR)
 
     # cubo centrado na origem, lado 2
     s = 1.0
@@ -81,7 +95,7 @@ def draw_cube() -> None:
 
 
 def draw_pyramid() -> None:
-    glColor3f(0.2, 0.7, 0.2)
+    glColor3f(*PYRAMID_COLOR)
 
     # pirâmide de base quadrada, centrada na origem
     s = 1.0
@@ -133,25 +147,161 @@ def draw_pyramid() -> None:
 
 
 def draw_cylinder() -> None:
-    glColor3f(0.2, 0.4, 0.8)
+    # GLU/GLUT so sao importados pelo modo imediato (o desenho normal usa VBOs)
+    from OpenGL.GLU import GLU_SMOOTH, gluCylinder, gluDeleteQuadric, gluDisk, gluNewQuadric, gluQuadricNormals
+
+    glColor3f(*CYLINDER_COLOR)
     quad = gluNewQuadric()
     gluQuadricNormals(quad, GLU_SMOOTH)
 
     # cilindro ao longo de y
     glPushMatrix()
     glRotatef(-90.0, 1.0, 0.0, 0.0)  # alinhar eixo com Z
-    gluCylinder(quad, 0.7, 0.7, 2.0, 32, 8)
+    gluCylinder(quad, CYLINDER_RADIUS, CYLINDER_RADIUS, CYLINDER_HEIGHT, *CYLINDER_DETAIL)
 
     # tampa de baixo
-    gluDisk(quad, 0.0, 0.7, 32, 1)
+    gluDisk(quad, 0.0, CYLINDER_RADIUS, CYLINDER_DETAIL[0], 1)
     # tampa de cima
-    glTranslatef(0.0, 0.0, 2.0)
-    gluDisk(quad, 0.0, 0.7, 32, 1)
+    glTranslatef(0.0, 0.0, CYLINDER_HEIGHT)
+    gluDisk(quad, 0.0, CYLINDER_RADIUS, CYLINDER_DETAIL[0], 1)
     glPopMatrix()
 
     gluDeleteQuadric(quad)
 
 
 def draw_sphere() -> None:
-    glColor3f(0.7, 0.7, 0.1)
-    glutSolidSphere(1.2, 40, 40)
+    from OpenGL.GLUT import glutSolidSphere
+
+    glColor3f(*SPHERE_COLOR)
+    glutSolidSphere(SPHERE_RADIUS, *SPHERE_DETAIL)
+
+
+# ---------------------------------------------------------------------------
+# Malhas em VBO (modo retido)
+#
+# As funcoes draw_* acima usam modo imediato (glBegin/glVertex/glEnd) e fazem
+# dezenas de chamadas ctypes por frame. geometry.py gera os mesmos vertices
+# como arrays NumPy, que sao enviados uma unica vez para a GPU em
+# init_meshes() e desenhados depois com uma unica chamada por objeto.
+# ---------------------------------------------------------------------------
+
+# Parametros com que cada quadrica esta atualmente na GPU: nome -> (slices, stacks)
+_uploaded_detail = {}
+
+# Caixa (min, max) no espaco do objeto de cada malha enviada, usada no culling
+_bounds = {}
+
+# Vertices e indices (na CPU) de cada malha de nivel 0, para o picking
+# (picking.py); so referencias aos arrays ja enviados, sem copia
+_triangles = {}
+
+
+def object_bounds(name: str):
+    # Volume envolvente (AABB) do objeto como ele esta na GPU
+    bounds = _bounds.get(name)
+    return bounds if bounds is not None else _default_bounds(name)
+
+
+def _register(name: str, vertices, indices=None, optimized: bool = False,
+              vertex_format=None, pickable: bool = True) -> None:
+    # Toda malha vai indexada e na ordem do cache de vertices (mesh_opt.py);
+    # optimized=True pula essa etapa (ex.: malhas do cache de mesh_io).
+    # vertex_format: layout compacto opcional (vertex_formats.py).
+    # pickable=False para niveis de LOD: o picking usa sempre o nivel 0.
+    if not optimized:
+        vertices, indices = mesh_opt.optimize(vertices, indices)
+    meshes.register_mesh(name, vertices, indices, vertex_format=vertex_format)
+    _bounds[name] = vertex_bounds(vertices)
+    if pickable:
+        _triangles[name] = (vertices, indices)
+
+
+def pick_triangles(name: str):
+    # (posicoes (N, 3), indices (M, 3)) da malha como ela esta na GPU
+    vertices, indices = _triangles[name]
+    return vertices[:, :3], indices
+
+
+# Cadeias de nivel de detalhe (lod.py) dos objetos que tem mais de um nivel
+lod_chains = {}
+
+# (slices, stacks) -> erro geometrico da tesselacao de cada forma procedural
+_TESSELLATION_ERRORS = {
+    "sphere": lambda slices, stacks: max(lod.chord_error(SPHERE_RADIUS, slices),
+                                         lod.chord_error(SPHERE_RADIUS, 2 * stacks)),
+    "cylinder": lambda slices, stacks: lod.chord_error(CYLINDER_RADIUS, slices),
+}
+
+
+def _tessellation_chain(name: str, details) -> None:
+    # Um nivel por tesselacao; o nivel 0 e a malha registrada por set_detail()
+    builder = cylinder_vertex_data if name == "cylinder" else sphere_vertex_data
+    error = _TESSELLATION_ERRORS[name]
+    levels = []
+    for i, (slices, stacks) in enumerate(details):
+        if i == 0:
+            slices, stacks = _uploaded_detail[name]
+        vertices, indices = builder(slices, stacks)
+        if i > 0:
+            _register(lod.level_name(name, i), vertices, indices, pickable=False)
+        levels.append(lod.LODLevel(lod.level_name(name, i), error(slices, stacks), len(indices)))
+    lod_chains[name] = lod.LODChain(name, levels)
+
+
+def register_lod_mesh(name: str, vertices, indices, optimized: bool = False,
+                      vertex_format=None) -> None:
+    # Registra uma malha qualquer (ex.: importada) com niveis decimados por QEM
+    _register(name, vertices, indices, optimized, vertex_format)
+    levels = [lod.LODLevel(name, 0.0, len(np.asarray(indices).reshape(-1, 3)))]
+    for i, (out, out_indices, error) in enumerate(lod.decimated_levels(vertices, indices), start=1):
+        _register(lod.level_name(name, i), out, out_indices, vertex_format=vertex_format, pickable=False)
+        levels.append(lod.LODLevel(lod.level_name(name, i), error, len(out_indices)))
+    if len(levels) > 1:
+        lod_chains[name] = lod.LODChain(name, levels)
+
+
+def load_model(path: str, name: str = "model", with_lod: bool = False,
+               vertex_format=None) -> str:
+    # Importa um OBJ/PLY (mesh_io, com cache em disco) e registra a malha com
+    # o nome dado. with_lod tambem gera os niveis decimados (lento para malhas
+    # muito grandes, por isso fica desligado por padrao). vertex_format escolhe
+    # um layout compacto (vertex_formats.VertexFormat) para a GPU.
+    vertices, indices = mesh_io.load_mesh(path)
+    lod_chains.pop(name, None)
+    if with_lod:
+        register_lod_mesh(name, vertices, indices, optimized=True, vertex_format=vertex_format)
+    else:
+        _register(name, vertices, indices, optimized=True, vertex_format=vertex_format)
+    return name
+
+
+def set_detail(name: str, slices: int, stacks: int) -> None:
+    # Troca a tesselacao de "cylinder" ou "sphere". A malha so e reenviada se os
+    # parametros mudaram, e a geracao em si passa pelo cache LRU de tessellation.py.
+    if _uploaded_detail.get(name) == (slices, stacks):
+        return
+
+    builder = cylinder_vertex_data if name == "cylinder" else sphere_vertex_data
+    vertices, indices = builder(slices, stacks)
+    _register(name, vertices, indices)
+    _uploaded_detail[name] = (slices, stacks)
+
+    # o nivel 0 da cadeia de LOD passa a ser a nova tesselacao
+    chain = lod_chains.get(name)
+    if chain is not None:
+        chain.levels[0] = lod.LODLevel(name, _TESSELLATION_ERRORS[name](slices, stacks), len(indices))
+        chain.errors[0] = chain.levels[0].error
+
+
+def init_meshes() -> None:
+    # Envia as malhas para a GPU; precisa de um contexto OpenGL ativo
+    _uploaded_detail.clear()
+    _register("cube", cube_vertex_data())
+    _register("pyramid", pyramid_vertex_data())
+    set_detail("cylinder", *CYLINDER_DETAIL)
+    set_detail("sphere", *SPHERE_DETAIL)
+
+    # niveis mais grosseiros das quadricas, escolhidos pelo tamanho na tela
+    lod_chains.clear()
+    _tessellation_chain("cylinder", lod.CYLINDER_LEVELS)
+    _tessellation_chain("sphere", lod.SPHERE_LEVELS)
@@ -0,0 +1,149 @@
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import bvh
+from scene_graph import SceneGraph
+
+# Picking por raio: o clique vira um raio (click_ray) que e testado contra os
+# triangulos das malhas da cena.
+# - Cada malha ganha, na primeira vez que e testada, um BVH sobre as caixas dos
+#   seus triangulos (bvh.BVH com folhas de LEAF_SIZE triangulos). O raio desce
+#   a arvore nivel a nivel com todos os nos ativos de uma vez, e so os
+#   triangulos das folhas atravessadas passam pelo teste de Moller-Trumbore,
+#   tambem vetorizado. Nenhum laco Python por no ou por triangulo.
+# - No grafo de cena (instancias) ha dois niveis: o BVH das instancias
+#   (bvh.SceneCuller) da as caixas atravessadas em ordem de distancia; o raio
+#   e levado ao espaco de cada instancia e testado no BVH da malha, parando
+#   quando a proxima caixa comeca depois do acerto mais proximo.
+# As matrizes afins preservam o parametro t do raio, entao a distancia e
+# sempre medida no espaco da camera.
+# Sem dependencia de OpenGL: as malhas vem de uma funcao nome -> (posicoes,
+# indices), como objects3d.pick_triangles.
+
+LEAF_SIZE = 4
+
+# Determinante abaixo disso: raio paralelo ao triangulo
+_EPSILON = 1e-12
+
+
+class PickHit(NamedTuple):
+    object: str                    # nome da malha ("cube", "model", ...)
+    instance: Optional[int]        # indice em graph.instances(object) ou None
+    triangle: int                  # linha de indices (M, 3) da malha
+    distance: float                # ao longo do raio, desde o plano near (espaco da camera)
+    barycentric: Tuple[float, float, float]  # pesos dos vertices do triangulo
+    point: Tuple[float, float, float]        # ponto atingido no espaco do modelo da cena
+
+
+def click_ray(x: float, y: float, width: int, height: int, projection: np.ndarray,
+              model_view: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Raio (origem no plano near, direcao) no espaco do modelo pelo centro do
+    # pixel (x, y) da janela (y de cima para baixo, como no GLUT). A direcao
+    # tem comprimento 1 no espaco da camera, entao t e distancia da camera.
+    ndc_x = 2.0 * (x + 0.5) / width - 1.0
+    ndc_y = 1.0 - 2.0 * (y + 0.5) / height
+    inv_projection = np.linalg.inv(projection)
+    near = inv_projection @ np.array([ndc_x, ndc_y, -1.0, 1.0])
+    far = inv_projection @ np.array([ndc_x, ndc_y, 1.0, 1.0])
+    near = near[:3] / near[3]
+    far = far[:3] / far[3]
+    direction = far - near
+    direction /= np.linalg.norm(direction)
+
+    inv_model_view = np.linalg.inv(model_view)
+    origin = inv_model_view[:3, :3] @ near + inv_model_view[:3, 3]
+    return origin, inv_model_view[:3, :3] @ direction
+
+
+def intersect_triangles(origin: np.ndarray, direction: np.ndarray, p0: np.ndarray, p1: np.ndarray,
+                        p2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Moller-Trumbore para N triangulos (dos dois lados): (t, u, v); t = inf
+    # onde o raio nao acerta. Baricentricas do ponto: (1 - u - v, u, v).
+    edge1 = p1 - p0
+    edge2 = p2 - p0
+    pvec = np.cross(direction, edge2)
+    det = np.einsum("ij,ij->i", edge1, pvec)
+    valid = np.abs(det) > _EPSILON
+    inv_det = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+    tvec = origin - p0
+    u = np.einsum("ij,ij->i", tvec, pvec) * inv_det
+    qvec = np.cross(tvec, edge1)
+    v = qvec @ direction * inv_det
+    t = np.einsum("ij,ij->i", edge2, qvec) * inv_det
+    valid &= (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= 0.0)
+    return np.where(valid, t, np.inf), u, v
+
+
+class MeshBVH:
+    # BVH dos triangulos de uma malha (espaco do objeto)
+
+    def __init__(self, positions: np.ndarray, indices: np.ndarray, leaf_size: int = LEAF_SIZE) -> None:
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        corners = self.positions[self.indices]
+        self.bvh = bvh.BVH(corners.min(axis=1), corners.max(axis=1), leaf_size)
+
+    def intersect(self, origin: np.ndarray, direction: np.ndarray,
+                  t_max: float = np.inf) -> Optional[Tuple[int, float, float, float]]:
+        # (triangulo, t, u, v) do acerto mais proximo antes de t_max, ou None
+        candidates, _ = self.bvh.intersect_ray(origin, direction, t_max)
+        if not len(candidates):
+            return None
+        corners = self.positions[self.indices[candidates]]
+        t, u, v = intersect_triangles(origin, direction, corners[:, 0], corners[:, 1], corners[:, 2])
+        best = int(np.argmin(t))
+        if not t[best] < t_max:
+            return None
+        return int(candidates[best]), float(t[best]), float(u[best]), float(v[best])
+
+
+class Picker:
+    # Guarda os BVHs das malhas e do grafo de cena entre cliques.
+    # triangles(nome) -> (posicoes (N, 3), indices (M, 3)); se devolver arrays
+    # novos (malha registrada de novo), o BVH daquela malha e reconstruido.
+
+    def __init__(self, triangles: Callable[[str], Tuple[np.ndarray, np.ndarray]],
+                 local_bounds: Callable[[str], Tuple[np.ndarray, np.ndarray]]) -> None:
+        self.triangles = triangles
+        self.local_bounds = local_bounds
+        self._meshes: Dict[str, Tuple[np.ndarray, MeshBVH]] = {}
+        self._culler: Optional[bvh.SceneCuller] = None
+
+    def mesh_bvh(self, name: str) -> MeshBVH:
+        positions, indices = self.triangles(name)
+        cached = self._meshes.get(name)
+        if cached is None or cached[0] is not indices:
+            cached = (indices, MeshBVH(positions, indices))
+            self._meshes[name] = cached
+        return cached[1]
+
+    def pick_mesh(self, name: str, origin: np.ndarray, direction: np.ndarray) -> Optional[PickHit]:
+        # Raio no espaco do objeto (objeto unico da cena)
+        hit = self.mesh_bvh(name).intersect(origin, direction)
+        if hit is None:
+            return None
+        triangle, t, u, v = hit
+        point = origin + t * direction
+        return PickHit(name, None, triangle, t, (1.0 - u - v, u, v), tuple(float(c) for c in point))
+
+    def pick_graph(self, graph: SceneGraph, origin: np.ndarray, direction: np.ndarray) -> Optional[PickHit]:
+        # Raio no espaco do grafo: instancias em ordem de distancia da caixa
+        if self._culler is None or self._culler.graph is not graph:
+            self._culler = bvh.SceneCuller(graph, self.local_bounds)
+        best = None
+        best_t = np.inf
+        for kind, instance, t_enter in self._culler.intersect_ray(origin, direction):
+            if t_enter > best_t:
+                break
+            inverse = np.linalg.inv(graph.instances(kind)[instance])
+            local_origin = inverse[:3, :3] @ origin + inverse[:3, 3]
+            hit = self.mesh_bvh(kind).intersect(local_origin, inverse[:3, :3] @ direction, best_t)
+            if hit is not None:
+                best = (kind, instance, hit)
+                best_t = hit[1]
+        if best is None:
+            return None
+        kind, instance, (triangle, t, u, v) = best
+        point = origin + t * direction
+        return PickHit(kind, instance, triangle, t, (1.0 - u - v, u, v), tuple(float(c) for c in point))
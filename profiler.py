@@ -0,0 +1,190 @@
+import contextlib
+import ctypes
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v as _raw_get_query_ui64
+
+# Profiler por estagio do frame.
+# - CPU: time.perf_counter() ao redor de cada estagio.
+# - GPU: consultas GL_TIME_ELAPSED. Cada frame usa um conjunto de consultas de
+#   um anel (ring); o resultado so e lido RING_SIZE - 1 frames depois e apenas
+#   se GL_QUERY_RESULT_AVAILABLE ja for verdadeiro, entao a CPU nunca espera a GPU.
+# Os tempos ficam em janelas deslizantes para calcular p50/p95/p99.
+# Estagios aninhados sao medidos so na CPU (GL_TIME_ELAPSED nao pode aninhar).
+
+RING_SIZE = 4
+WINDOW = 300
+
+# Alguns drivers devolvem lixo na primeira consulta de tempo; amostras acima
+# deste valor (em segundos) sao descartadas
+MAX_GPU_SAMPLE = 10.0
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+
+    def __init__(self, window: int = WINDOW, ring_size: int = RING_SIZE, gpu: bool = True) -> None:
+        self.enabled = False
+        self.show_overlay = False
+        self.window = window
+        self.ring_size = ring_size
+        self.use_gpu = gpu
+
+        # estagio -> janela de tempos (segundos)
+        self.cpu_times: Dict[str, Deque[float]] = {}
+        self.gpu_times: Dict[str, Deque[float]] = {}
+        self.frames = 0
+        self.gpu_dropped = 0
+
+        self._frame_start = 0.0
+        self._gpu_active = False
+        # anel: para cada slot, lista de (estagio, id da consulta) pendentes
+        self._ring: List[List] = [[] for _ in range(ring_size)]
+        self._free_queries: List[int] = []
+        self._slot = 0
+
+    # -- ciclo do frame ---------------------------------------------------
+
+    def enable(self, on: bool = True) -> None:
+        self.enabled = on
+        if on and self.use_gpu and not bool(glGenQueries):
+            # sem suporte a consultas de tempo: mede so a CPU
+            self.use_gpu = False
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._frame_start = time.perf_counter()
+        self._collect(self._slot)
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._record(self.cpu_times, "frame", time.perf_counter() - self._frame_start)
+        self.frames += 1
+        self._slot = (self._slot + 1) % self.ring_size
+        # le (sem bloquear) os resultados que ja estiverem prontos
+        for offset in range(1, self.ring_size):
+            self._collect((self._slot + offset) % self.ring_size, final=False)
+
+    def stage(self, name: str):
+        # Uso: with profiler.stage("clear"): ...
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        query = None
+        if self.use_gpu and not self._gpu_active:
+            query = self._free_queries.pop() if self._free_queries else int(glGenQueries(1)[0])
+            glBeginQuery(GL_TIME_ELAPSED, query)
+            self._gpu_active = True
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if query is not None:
+                glEndQuery(GL_TIME_ELAPSED)
+                self._gpu_active = False
+                self._ring[self._slot].append((name, query))
+            self._record(self.cpu_times, name, elapsed)
+
+    # -- consultas de GPU -------------------------------------------------
+
+    def _collect(self, slot: int, final: bool = True) -> None:
+        # Le as consultas do slot que ja tem resultado. Se final = True o slot vai
+        # ser reutilizado agora: o que ainda nao ficou pronto e descartado.
+        pending = []
+        for name, query in self._ring[slot]:
+            if glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+                value = ctypes.c_uint64()
+                _raw_get_query_ui64(query, GL_QUERY_RESULT, ctypes.byref(value))
+                seconds = value.value * 1e-9
+                if seconds < MAX_GPU_SAMPLE:
+                    self._record(self.gpu_times, name, seconds)
+                self._free_queries.append(query)
+            elif final:
+                self.gpu_dropped += 1
+                self._free_queries.append(query)
+            else:
+                pending.append((name, query))
+        self._ring[slot] = pending
+
+    # -- estatisticas -----------------------------------------------------
+
+    def _record(self, table: Dict[str, Deque[float]], name: str, seconds: float) -> None:
+        samples = table.get(name)
+        if samples is None:
+            samples = table[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    @staticmethod
+    def _stats(samples: Deque[float]) -> Dict[str, float]:
+        data = np.fromiter(samples, dtype=np.float64) * 1e3
+        p50, p95, p99 = np.percentile(data, PERCENTILES)
+        return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "mean_ms": float(data.mean()), "samples": len(data)}
+
+    def summary(self) -> Dict[str, Dict[str, Optional[Dict[str, float]]]]:
+        # estagio -> {"cpu": estatisticas, "gpu": estatisticas ou None}
+        result = {}
+        for name, samples in self.cpu_times.items():
+            gpu = self.gpu_times.get(name)
+            result[name] = {
+                "cpu": self._stats(samples),
+                "gpu": self._stats(gpu) if gpu else None,
+            }
+        return result
+
+    def overlay_lines(self) -> List[str]:
+        # Linhas de texto do overlay: "estagio  cpu p50/p95  gpu p50/p95" em ms
+        lines = [f"frames {self.frames}  (ms p50/p95)"]
+        for name, stats in self.summary().items():
+            cpu = stats["cpu"]
+            text = f"{name:<8} cpu {cpu['p50_ms']:.2f}/{cpu['p95_ms']:.2f}"
+            if stats["gpu"] is not None:
+                gpu = stats["gpu"]
+                text += f"  gpu {gpu['p50_ms']:.2f}/{gpu['p95_ms']:.2f}"
+            lines.append(text)
+        return lines
+
+    def dump_json(self, path: str) -> None:
+        data = {
+            "frames": self.frames,
+            "window": self.window,
+            "gpu_timing": self.use_gpu,
+            "gpu_dropped": self.gpu_dropped,
+            "stages": self.summary(),
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def reset(self) -> None:
+        self.cpu_times.clear()
+        self.gpu_times.clear()
+        self.frames = 0
+        self.gpu_dropped = 0
+
+    def release(self) -> None:
+        # Apaga as consultas de tempo, pendentes ou livres (antes de destruir o
+        # contexto OpenGL): os nomes nao valem num contexto novo
+        queries = [query for slot in self._ring for _, query in slot] + self._free_queries
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self._ring = [[] for _ in range(self.ring_size)]
+        self._free_queries = []
+        self._slot = 0
+        self._gpu_active = False
+
+
+# Instancia usada por scene.py
+frame_profiler = FrameProfiler()
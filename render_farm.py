@@ -0,0 +1,256 @@
+# Renderizacao em lote de uma grade de parametros da cena (objeto, shading,
+# projecao, angulos e distancia da camera) para imagens de documentacao e de
+# regressao, sem janela.
+# - A grade e expandida em jobs com nome deterministico; cada job vira um PNG.
+# - Os jobs sao distribuidos num pool de processos (multiprocessing "spawn":
+#   contexto OpenGL e fork nao combinam). Cada processo cria um unico contexto
+#   headless (HeadlessRenderer) na inicializacao e o reaproveita em todos os
+#   seus jobs; o PNG tambem e codificado no processo do job.
+# - O llvmpipe usa uma thread por nucleo em cada contexto; com varios
+#   processos isso so disputa os mesmos nucleos, entao cada processo usa
+#   LP_NUM_THREADS=1 quando ha mais de um (se a variavel nao estiver definida)
+#   e o paralelismo fica todo nos processos.
+# - manifest.jsonl (no diretorio de saida) recebe uma linha por imagem pronta,
+#   gravada so pelo processo principal, com as configuracoes da renderizacao
+#   (tamanho e backend). Rodando de novo o mesmo comando, jobs que ja estao no
+#   manifesto com as mesmas configuracoes e cuja imagem existe sao pulados
+#   (retomada apos interrupcao); mudando o tamanho ou o backend as imagens sao
+#   refeitas. As imagens sao gravadas num arquivo temporario e renomeadas,
+#   entao uma interrupcao nunca deixa um PNG pela metade.
+# - Cada job comeca sem a histerese de LOD dos jobs anteriores do processo:
+#   a imagem nao depende da ordem em que o pool distribui os jobs.
+#
+# Uso (a partir da raiz do projeto):
+#     python render_farm.py --out renders/ [--workers 4]
+#     python render_farm.py --out renders/ --objects sphere,cube --shadings phong \
+#         --angle-x 0:90:30 --angle-y=-45,0,45 --eye-z 6,8
+# (valores negativos no inicio da lista precisam de "=", como em --angle-y=-45,0,45)
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import headless
+
+MANIFEST = "manifest.jsonl"
+
+PROJECTIONS = ("perspective", "orthographic")
+
+# Valores padrao da grade: os da cena ao abrir a janela
+DEFAULT_ANGLE_X = (20.0,)
+DEFAULT_ANGLE_Y = (-30.0,)
+DEFAULT_EYE_Z = (8.0,)
+
+# Renderer do processo (criado em _init_worker)
+_renderer: Optional[headless.HeadlessRenderer] = None
+_out_dir = ""
+
+
+def parse_values(spec: str) -> List[float]:
+    # "a,b,c" ou faixa "inicio:fim:passo" (fim incluido)
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0.0:
+            raise ValueError(f"Passo deve ser positivo: {spec}")
+        count = int((stop - start) / step + 1e-9) + 1
+        return [round(start + i * step, 6) for i in range(max(count, 0))]
+    return [float(part) for part in spec.split(",") if part]
+
+
+def job_name(job: Dict[str, object]) -> str:
+    return (f"{job['object']}_{job['shading']}_{job['projection'][:5]}"
+            f"_ax{job['angle_x']:g}_ay{job['angle_y']:g}_ez{job['eye_z']:g}")
+
+
+def expand_grid(objects: Sequence[str], shadings: Sequence[str], projections: Sequence[str],
+                angle_x: Sequence[float], angle_y: Sequence[float],
+                eye_z: Sequence[float]) -> List[Dict[str, object]]:
+    # Produto cartesiano em ordem de shading: jobs seguidos de um processo
+    # tendem a repetir o modo e evitar trocas de programa
+    jobs = []
+    for shading_mode, obj, projection, ax, ay, ez in itertools.product(
+            shadings, objects, projections, angle_x, angle_y, eye_z):
+        job = {"object": obj, "shading": shading_mode, "projection": projection,
+               "angle_x": ax, "angle_y": ay, "eye_z": ez}
+        job["name"] = job_name(job)
+        jobs.append(job)
+    return jobs
+
+
+def render_settings(width: int, height: int, backend: str) -> Dict[str, object]:
+    # Configuracoes que mudam os pixels sem mudar o nome do job
+    return {"width": width, "height": height, "backend": backend}
+
+
+def read_manifest(out_dir: str, settings: Optional[Dict[str, object]] = None) -> Dict[str, Dict[str, object]]:
+    # nome do job -> linha do manifesto, so para imagens que ainda existem e,
+    # com `settings`, que foram renderizadas com essas configuracoes
+    latest = {}
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # ultima linha cortada por uma interrupcao
+            continue
+        # a ultima linha de cada job descreve o arquivo que esta no disco
+        latest[entry["name"]] = entry
+    done = {}
+    for name, entry in latest.items():
+        if settings and any(entry.get(key) != value for key, value in settings.items()):
+            continue
+        if os.path.exists(os.path.join(out_dir, entry["file"])):
+            done[name] = entry
+    return done
+
+
+# -- processos do pool --------------------------------------------------------
+
+def _init_worker(width: int, height: int, backend: str, profile: Optional[str], out_dir: str,
+                 single_thread: bool) -> None:
+    global _renderer, _out_dir
+    # Ctrl+C e tratado so no processo principal (que termina o pool)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if single_thread:
+        os.environ.setdefault("LP_NUM_THREADS", "1")
+    _renderer = headless.HeadlessRenderer(width, height, backend, profile)
+    _out_dir = out_dir
+
+
+def _render_job(job: Dict[str, object]) -> Dict[str, object]:
+    import images
+    import scene
+
+    start = time.perf_counter()
+    scene.reset_lod()
+    scene.projection = job["projection"]
+    scene.angle_x = job["angle_x"]
+    scene.angle_y = job["angle_y"]
+    scene.eye_z = job["eye_z"]
+    pixels = _renderer.render(job["object"], job["shading"])
+    render_ms = (time.perf_counter() - start) * 1e3
+
+    filename = job["name"] + ".png"
+    path = os.path.join(_out_dir, filename)
+    temp = f"{path}.{os.getpid()}.tmp"
+    images.write_png(temp, pixels)
+    os.replace(temp, path)
+
+    return dict(job, file=filename, worker=os.getpid(), render_ms=render_ms,
+                total_ms=(time.perf_counter() - start) * 1e3,
+                digest=hashlib.blake2b(pixels.tobytes(), digest_size=8).hexdigest())
+
+
+# -- processo principal -------------------------------------------------------
+
+def run(jobs: Iterable[Dict[str, object]], out_dir: str, workers: int, width: int = 800,
+        height: int = 600, backend: str = "egl", profile: Optional[str] = None,
+        verbose: bool = True) -> Dict[str, object]:
+    # Renderiza os jobs que ainda nao estao no manifesto; devolve um resumo
+    os.makedirs(out_dir, exist_ok=True)
+    # PNGs temporarios de processos interrompidos no meio da gravacao
+    for name in os.listdir(out_dir):
+        if name.endswith(".tmp"):
+            os.remove(os.path.join(out_dir, name))
+    settings = render_settings(width, height, backend)
+    done = read_manifest(out_dir, settings)
+    jobs = list(jobs)
+    pending = [job for job in jobs if job["name"] not in done]
+    skipped = len(jobs) - len(pending)
+    if verbose:
+        print(f"{len(pending)} imagens a renderizar ({skipped} ja prontas) com {workers} processos")
+
+    start = time.perf_counter()
+    rendered = 0
+    if pending:
+        context = multiprocessing.get_context("spawn")
+        workers = max(1, min(workers, len(pending)))
+        pool = context.Pool(workers, _init_worker,
+                            (width, height, backend, profile, out_dir, workers > 1))
+        try:
+            with open(os.path.join(out_dir, MANIFEST), "a") as manifest:
+                for entry in pool.imap_unordered(_render_job, pending):
+                    entry.update(settings)
+                    manifest.write(json.dumps(entry) + "\n")
+                    manifest.flush()
+                    rendered += 1
+                    if verbose:
+                        print(f"[{rendered}/{len(pending)}] {entry['file']}  {entry['render_ms']:.1f} ms")
+            pool.close()
+        except KeyboardInterrupt:
+            print(f"Interrompido: {rendered} imagens no manifesto; rode o mesmo comando para continuar")
+            raise
+        finally:
+            pool.terminate()
+            pool.join()
+    elapsed = time.perf_counter() - start
+
+    return {"rendered": rendered, "skipped": skipped, "workers": workers, "elapsed_s": elapsed,
+            "images_per_s": rendered / elapsed if elapsed > 0.0 else 0.0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Renderizacao em lote de uma grade de parametros da cena")
+    parser.add_argument("--out", required=True, help="diretorio das imagens e do manifest.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", choices=headless.BACKENDS, default=os.environ.get("PYOPENGL_PLATFORM", "egl"))
+    parser.add_argument("--gl-profile", choices=("release", "debug"))
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--objects", help="lista separada por virgulas (padrao: todos os botoes da UI)")
+    parser.add_argument("--shadings", help="lista separada por virgulas (padrao: todos os botoes da UI)")
+    parser.add_argument("--projections", default=",".join(PROJECTIONS))
+    parser.add_argument("--angle-x", default=",".join(f"{v:g}" for v in DEFAULT_ANGLE_X),
+                        help="valores em graus: a,b,c ou inicio:fim:passo")
+    parser.add_argument("--angle-y", default=",".join(f"{v:g}" for v in DEFAULT_ANGLE_Y))
+    parser.add_argument("--eye-z", default=",".join(f"{v:g}" for v in DEFAULT_EYE_Z))
+    parser.add_argument("--dry-run", action="store_true", help="so lista os jobs pendentes")
+    args = parser.parse_args()
+
+    # os nomes validos vem da UI; o backend precisa estar definido antes do import
+    headless.select_backend(args.backend)
+    import ui
+    valid_objects = [oid for oid, _ in ui.OBJECT_BUTTONS]
+    valid_shadings = [sid for sid, _ in ui.SHADING_BUTTONS]
+
+    def choices(spec: Optional[str], valid: Sequence[str], label: str) -> List[str]:
+        values = spec.split(",") if spec else list(valid)
+        for value in values:
+            if value not in valid:
+                parser.error(f"{label} invalido: {value} (opcoes: {', '.join(valid)})")
+        return values
+
+    try:
+        grid = [parse_values(args.angle_x), parse_values(args.angle_y), parse_values(args.eye_z)]
+    except ValueError as error:
+        parser.error(str(error))
+    jobs = expand_grid(choices(args.objects, valid_objects, "objeto"),
+                       choices(args.shadings, valid_shadings, "shading"),
+                       choices(args.projections, PROJECTIONS, "projecao"), *grid)
+
+    if args.dry_run:
+        done = read_manifest(args.out, render_settings(args.width, args.height, args.backend))
+        for job in jobs:
+            if job["name"] not in done:
+                print(job["name"])
+        return
+
+    try:
+        summary = run(jobs, args.out, args.workers, args.width, args.height, args.backend, args.gl_profile)
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+    print(f"{summary['rendered']} imagens em {summary['elapsed_s']:.1f} s "
+          f"({summary['images_per_s']:.1f} imagens/s, {summary['skipped']} retomadas do manifesto)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,26 @@
 from typing import Literal
 from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
-
+import numpy as np
+
+import bvh
+import capture
+import clustered_shading
+import deferred
+import font_atlas
+import gl_runtime
+import glstate
+import input_trace
+import instancing
+import light_clusters
+import lod
+import meshes
 import objects3d
+import picking
+from profiler import frame_profiler
+import scene_graph
+import scheduler
 import shading
+import transforms
 import ui
 
 # Dimensoes iniciais da janela (em pixels).
@@ -24,8 +40,8 @@ angle_z = 0.0
 # - eye: posicao da camera (de onde estamos olhando)
 # - center: ponto para onde a camera esta apontando
 # - up: vetor "para cima" que define a orientacao da camera
-# Esses valores sao usados em apply_camera(), que chama gluLookAt(...)
-# para montar a matriz de visualizacao antes de desenhar a cena.
+# Esses valores sao usados em view_matrix() (equivalente a gluLookAt(...),
+# em NumPy), carregada por apply_camera() antes de desenhar a cena.
 eye_x = 0.0
 eye_y = 0.0
 eye_z = 8.0
@@ -39,46 +55,115 @@ up_y = 1.0
 up_z = 0.0
 
 # Modo de projecao usado para desenhar a cena:
-# - "perspective": usa gluPerspective(), com efeito de profundidade (objetos distantes menores)
-# - "orthographic": usa glOrtho(), sem perspectiva (tamanhos constantes)
+# - "perspective": como gluPerspective(), com efeito de profundidade (objetos distantes menores)
+# - "orthographic": como glOrtho(), sem perspectiva (tamanhos constantes)
 # Esta variavel e lida em setup_projection() para configurar a matriz de projecao
 # e pode ser alternada em keyboard() (tecla 'p'), afetando como os objetos de objects3d.py
 # sao projetados e exibidos na janela.
 projection: Literal["perspective", "orthographic"] = "perspective"
 
+# Parametros das projecoes usadas em setup_projection():
+# campo de visao vertical (graus) da perspectiva, planos near/far
+# e meia-altura do volume de visualizacao ortografico
+FOVY = 45.0
+NEAR = 0.1
+FAR = 100.0
+ORTHO_SIZE = 6.0
+
+# Distancia em que o objeto e colocado a frente da camera em display()
+OBJECT_DISTANCE = 5.0
+
 # objeto inicial selecionado pelos botoes
 current_object = "cube"
 
+# Nome no registro de malhas do modelo importado com main.py --model
+# (objects3d.load_model); selecionado pela tecla '5'
+MODEL_NAME = "model"
+
 # modelo inicial de iluminacao selecionado
 current_shading = "gouraud"
 
 light_pos = (4.0, 4.0, 4.0)
 
+# Luzes pontuais extras do modo phong (tecla 'm' alterna entre as quantidades
+# de POINT_LIGHT_COUNTS), espalhadas em torno dos objetos e distribuidas em
+# clusters por clustered_shading.py; None = so a luz principal (light_pos)
+point_lights = None
+POINT_LIGHT_COUNTS = (0, 64, 256, 512)
+_clustered = None
+
+# Grafo de cena desenhado com instancias (tecla 'i' alterna a grade de
+# demonstracao); enquanto estiver ativo substitui o objeto unico
+instanced_scene = None
+INSTANCE_DEMO_COUNT = 4000
+
+# Culling por frustum (tecla 'k' liga/desliga). O BVH do grafo de cena fica em
+# _culler; cull_stats guarda objetos testados/descartados/desenhados no frame.
+culling_enabled = True
+_culler = None
+cull_stats = {}
+
+# Niveis de detalhe (tecla 'l' liga/desliga): cada objeto com cadeia de LOD
+# (objects3d.lod_chains) e desenhado no nivel mais grosseiro cujo erro
+# projetado fica abaixo de lod.MAX_PIXEL_ERROR. _lod_selector guarda o nivel
+# de cada instancia do grafo; lod_stats conta objetos desenhados por nivel.
+lod_enabled = True
+_lod_selector = lod.LODSelector()
+lod_stats = {}
+
+# Picking (clique fora da barra de botoes): raio pela camera testado contra os
+# triangulos do objeto ou das instancias (picking.py). last_pick guarda o
+# ultimo resultado (picking.PickHit ou None se o clique nao acertou nada).
+_picker = None
+last_pick = None
+
+# Desenha a barra de botoes (ui.py) sobre a cena. O modo headless desliga,
+# ja que o texto dos botoes depende de fontes do GLUT.
+show_ui = True
+
+# Arquivo gravado pela tecla 'j' com os tempos por etapa do profiler
+PROFILE_JSON_PATH = "profile.json"
+
+# Velocidade da rotacao automatica em torno de Y (graus por segundo),
+# ligada/desligada pela tecla 'r' como uma animacao do scheduler
+AUTO_ROTATE_SPEED = 45.0
+
 def init_gl(w: int, h: int) -> None:
     # Atualiza largura e altura globais da janela (usadas na projecao e na UI)
     global width, height
     width, height = w, h
 
+    # Estado sombra comeca desconhecido para este contexto
+    glstate.invalidate()
+
+    # Perfil debug: mensagens de GL_KHR_debug (erros, avisos) via callback
+    gl_runtime.install_debug_output()
+
     # Habilita teste de profundidade (controla quais objetos aparecem na frente)
-    glEnable(GL_DEPTH_TEST)
+    glstate.enable(GL_DEPTH_TEST)
 
     # Define cor de fundo usada em glClear() dentro de display()
     glClearColor(0.1, 0.1, 0.1, 1.0)
 
     # Habilita sistema de iluminacao fixa e a luz GL_LIGHT0
     # Usado nos modos de sombreamento flat e gouraud
-    glEnable(GL_LIGHTING)
-    glEnable(GL_LIGHT0)
+    glstate.enable(GL_LIGHTING)
+    glstate.enable(GL_LIGHT0)
 
     # Permite que glColor defina componentes ambiente e difusa do material
-    glEnable(GL_COLOR_MATERIAL)
+    glstate.enable(GL_COLOR_MATERIAL)
     glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
 
     # Configura componentes difusa e especular da luz GL_LIGHT0
     glLightfv(GL_LIGHT0, GL_DIFFUSE,  (1.0, 1.0, 1.0, 1.0))
     glLightfv(GL_LIGHT0, GL_SPECULAR, (1.0, 1.0, 1.0, 1.0))
 
-    # Compila e linka o shader Phong definido em shading.py
+    # Envia as malhas dos objetos (VBO/VAO) para a GPU uma unica vez
+    objects3d.init_meshes()
+
+    # Compila de uma vez todas as variantes de shader (ou as carrega do cache
+    # de binarios em disco) e cria o programa Phong definido em shading.py
+    shading.precompile_variants()
     shading.init_phong_shader()
 
     # Configura a matriz de projecao inicial (perspective ou orthographic)
@@ -87,92 +172,343 @@ def init_gl(w: int, h: int) -> None:
     # Ajusta o modo de sombreamento inicial (flat, gouraud ou phong)
     shading.set_shading_mode(current_shading)
 
-def setup_projection() -> None:
-    # Seleciona a matriz de projecao e zera seu conteudo
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-
+def _build_projection(mode: str, w: int, h: int) -> np.ndarray:
     # Calcula proporcao largura/altura da janela para evitar distorcao
-    aspect = width / float(height) if height > 0 else 1.0
+    aspect = w / float(h) if h > 0 else 1.0
 
-    if projection == "perspective":
+    if mode == "perspective":
         # Projecao em perspectiva: objetos mais distantes parecem menores
-        gluPerspective(45.0, aspect, 0.1, 100.0)
-    else:
-        # Projecao ortografica: sem efeito de perspectiva
-        size = 6.0
-        glOrtho(-size * aspect, size * aspect, -size, size, 0.1, 100.0)
+        return transforms.perspective(FOVY, aspect, NEAR, FAR)
+    # Projecao ortografica: sem efeito de perspectiva
+    size = ORTHO_SIZE
+    return transforms.ortho(-size * aspect, size * aspect, -size, size, NEAR, FAR)
+
+def _build_model(ax: float, ay: float, az: float) -> np.ndarray:
+    # Transformacao global dos objetos: translacao para afastar no eixo Z e
+    # rotacoes controladas por teclado (antes glTranslatef + 3 glRotatef)
+    return (transforms.translate(0.0, 0.0, -OBJECT_DISTANCE)
+            @ transforms.rotate(ax, 1.0, 0.0, 0.0)
+            @ transforms.rotate(ay, 0.0, 1.0, 0.0)
+            @ transforms.rotate(az, 0.0, 0.0, 1.0))
+
+def _build_model_view(view_version: int, model_version: int) -> np.ndarray:
+    return _view_matrix.matrix @ _model_matrix.matrix
+
+# Matrizes da cena montadas em NumPy (transforms.py) e guardadas em cache:
+# so sao recalculadas quando a camera, a projecao/janela ou os angulos mudam
+_projection_matrix = transforms.CachedMatrix(_build_projection)
+_view_matrix = transforms.CachedMatrix(transforms.look_at)
+_model_matrix = transforms.CachedMatrix(_build_model)
+_model_view_matrix = transforms.CachedMatrix(_build_model_view)
+
+# Versao da projecao carregada em GL_PROJECTION (recarregada so quando muda)
+_loaded_projection = -1
+
+def projection_matrix() -> np.ndarray:
+    return _projection_matrix.get(projection, width, height)
+
+def view_matrix() -> np.ndarray:
+    return _view_matrix.get((eye_x, eye_y, eye_z), (center_x, center_y, center_z), (up_x, up_y, up_z))
+
+def model_view_matrix() -> np.ndarray:
+    # visualizacao @ modelo dos objetos da cena
+    view_matrix()
+    _model_matrix.get(angle_x, angle_y, angle_z)
+    return _model_view_matrix.get(_view_matrix.version, _model_matrix.version)
+
+def setup_projection(force: bool = True) -> None:
+    global _loaded_projection
+    proj = projection_matrix()
+    if not force and _projection_matrix.version == _loaded_projection:
+        return
+    _loaded_projection = _projection_matrix.version
+
+    # Carrega a projecao (perspective ou orthographic) no pipeline fixo
+    glstate.matrix_mode(GL_PROJECTION)
+    glLoadMatrixd(proj.T)
 
     # Volta para a matriz de modelo/visualizacao usada em apply_camera() e display()
-    glMatrixMode(GL_MODELVIEW)
+    glstate.matrix_mode(GL_MODELVIEW)
     glLoadIdentity()
 
 def apply_camera() -> None:
-    # Reseta a matriz de modelo/visualizacao antes de posicionar a camera
-    glLoadIdentity()
-
-    # Define a matriz de visualizacao com gluLookAt
-    gluLookAt(
-        eye_x, eye_y, eye_z,
-        center_x, center_y, center_z,
-        up_x, up_y, up_z
-    )
+    # Carrega a matriz de visualizacao (look_at em NumPy, no lugar de gluLookAt)
+    glLoadMatrixd(view_matrix().T)
 
 def display() -> None:
-    # Limpa o framebuffer de cor e o buffer de profundidade
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-    # Aplica a camera (matriz de visualizacao definida em apply_camera())
-    apply_camera()
-
-    # Define posicao da luz GL_LIGHT0 no espaco da camera
-    # (usa light_pos global que pode ser lida em shading.py)
-    glLightfv(GL_LIGHT0, GL_POSITION, (light_pos[0], light_pos[1], light_pos[2], 1.0))
-
-    # Prepara o modo de sombreamento atual (flat, gouraud ou phong).
-    # Em shading.prepare_for_frame() sao configurados:
-    # - pipeline fixo (flat/gouraud) OU
-    # - shader programavel (phong), com uniforms de luz e camera.
-    shading.prepare_for_frame(
-        shading_mode=current_shading,
-        light_pos=light_pos,
-        view_pos=(0.0, 0.0, 0.0),
-    )
-
-    # Transformacao global aplicada a todos os objetos desenhados em draw_scene_objects():
-    # translacao para afastar no eixo Z e rotacoes controladas por teclado.
-    glTranslatef(0.0, 0.0, -5.0)
-    glRotatef(angle_x, 1.0, 0.0, 0.0)
-    glRotatef(angle_y, 0.0, 1.0, 0.0)
-    glRotatef(angle_z, 0.0, 0.0, 1.0)
-
-    # Desenha eixos e o objeto 3D escolhido (cubo, piramide, cilindro ou esfera)
-    # definidos em objects3d.py
-    draw_scene_objects()
-
-    # Finaliza configuracoes de shading para este frame, se necessario
-    shading.finish_frame()
+    # Desenha o frame no back buffer da janela.
+    # GLUT so e importado pelas funcoes chamadas pela janela (main.py): o modo
+    # headless nunca carrega o modulo.
+    from OpenGL.GLUT import glutSwapBuffers
 
-    # Desenha a interface 2D (barra de botoes) em modo ortografico,
-    # definida no modulo ui.py
-    ui.draw_ui(width, height, current_object, current_shading)
+    frame_profiler.begin_frame()
+    _draw_frame()
+
+    # Gravacao (--capture): copia assincrona do back buffer para um PBO
+    if capture.recorder is not None:
+        with frame_profiler.stage("capture"):
+            capture.recorder.capture(width, height)
 
     # Troca os buffers (double buffering) exibindo o frame pronto na tela
-    glutSwapBuffers()
+    with frame_profiler.stage("swap"):
+        glutSwapBuffers()
+    frame_profiler.end_frame()
+
+    # Avisa o scheduler que o frame pedido ja foi desenhado
+    scheduler.frame_presented()
+
+def shutdown() -> None:
+    # Fim da janela (ESC ou fechar): termina a gravacao enquanto o contexto
+    # OpenGL ainda existe, e fecha o arquivo de interacao (--record-trace)
+    capture.stop()
+    input_trace.stop()
+
+def release_gl() -> None:
+    # Libera os objetos OpenGL que os modulos guardam entre frames (programas,
+    # VAOs, G-buffer, texturas). Usado antes de destruir o contexto, para que
+    # um contexto novo no mesmo processo (headless, replay) comece do zero em
+    # vez de herdar nomes do contexto anterior.
+    global _clustered
+    instancing.release()
+    deferred.release()
+    if _clustered is not None:
+        _clustered.delete()
+        _clustered = None
+    shading.point_lighting = None
+    shading.release_vertex_format_programs()
+    shading.release_phong_shader()
+    ui.release()
+    font_atlas.release()
+    frame_profiler.release()
+
+def render_frame() -> None:
+    # Desenha um frame completo no framebuffer atual, sem trocar buffers.
+    # Usado pelo modo headless (FBO); display() faz o mesmo e troca os buffers.
+    frame_profiler.begin_frame()
+    _draw_frame()
+    frame_profiler.end_frame()
+
+def _draw_frame() -> None:
+    # Cada etapa e medida pelo profiler (CPU e GPU) quando ele esta ligado
+
+    # Limpa o framebuffer de cor e o buffer de profundidade
+    with frame_profiler.stage("clear"):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    with frame_profiler.stage("prepare"):
+        # Projecao recarregada so se mudou (janela, tecla 'p') e camera
+        # (matriz de visualizacao definida em apply_camera())
+        setup_projection(force=False)
+        apply_camera()
+
+        # Define posicao da luz GL_LIGHT0 no espaco da camera
+        # (usa light_pos global que pode ser lida em shading.py)
+        glLightfv(GL_LIGHT0, GL_POSITION, (light_pos[0], light_pos[1], light_pos[2], 1.0))
+
+        # Matrizes dos objetos para os shaders (uniforms uModelView, ...)
+        shading.set_matrices(projection_matrix(), model_view_matrix())
+
+        # Luzes pontuais (modos phong e deferred) nos clusters da visao atual
+        _update_point_lights()
+
+        # Modo deferred: os objetos vao para o G-buffer (deferred.py) e a
+        # iluminacao e calculada depois, uma vez por pixel
+        if current_shading == "deferred":
+            deferred.begin_frame(width, height)
+
+        # Prepara o modo de sombreamento atual (flat, gouraud ou phong).
+        # Em shading.prepare_for_frame() sao configurados:
+        # - pipeline fixo (flat/gouraud) OU
+        # - shader programavel (phong), com uniforms de luz e camera.
+        shading.prepare_for_frame(
+            shading_mode=current_shading,
+            light_pos=light_pos,
+            view_pos=(0.0, 0.0, 0.0),
+        )
+
+    with frame_profiler.stage("objects"):
+        # Transformacao global aplicada a todos os objetos desenhados em draw_scene_objects():
+        # visualizacao @ translacao em Z @ rotacoes, ja calculada em model_view_matrix()
+        glLoadMatrixd(model_view_matrix().T)
+
+        # Desenha eixos e o objeto 3D escolhido (cubo, piramide, cilindro ou esfera)
+        # definidos em objects3d.py
+        draw_scene_objects()
+
+        # Finaliza configuracoes de shading para este frame, se necessario
+        shading.finish_frame()
+
+    # Modo deferred: ilumina os pixels do G-buffer no framebuffer de destino
+    if current_shading == "deferred":
+        with frame_profiler.stage("resolve"):
+            deferred.resolve(light_pos, (0.0, 0.0, 0.0), shading.point_lighting)
+
+    # Desenha a interface 2D (barra de botoes) em modo ortografico,
+    # definida no modulo ui.py, e o overlay do profiler (tecla 'o')
+    if show_ui:
+        with frame_profiler.stage("ui"):
+            ui.draw_ui(width, height, current_object, current_shading)
+            if frame_profiler.show_overlay:
+                lines = frame_profiler.overlay_lines()
+                if cull_stats:
+                    lines.append("cull  {objects_tested} testados  {culled} fora  {drawn} desenhados"
+                                 .format(**cull_stats))
+                if shading.point_lighting is not None:
+                    lines.append("luzes {lights} pontuais  {pairs} pares  {occupied}/{clusters} clusters"
+                                 .format(**_clustered.stats))
+                # Contadores do frame anterior (fechados no fim de _draw_frame)
+                lines.append("unif  {uploads} enviados  {skipped} evitados  {programs} programas"
+                             .format(**shading.uniform_stats()))
+                lines.append("gl    {issued} emitidas  {filtered} filtradas"
+                             .format(**glstate.frame_report()["total"]))
+                if capture.recorder is not None:
+                    lines.append(capture.recorder.overlay_line())
+                if last_pick is not None:
+                    lines.append("pick  {} {}tri {}  dist {:.2f}".format(
+                        last_pick.object,
+                        "" if last_pick.instance is None else f"#{last_pick.instance} ",
+                        last_pick.triangle, last_pick.distance))
+                if lod_stats:
+                    lines.append("lod   " + "  ".join(f"n{level}: {count}"
+                                                      for level, count in sorted(lod_stats.items())))
+                ui.draw_overlay(width, height, lines)
+
+    # Fecha os contadores de uniforms (shading.uniform_stats()) e o relatorio de
+    # chamadas de estado emitidas/filtradas (glstate.frame_report()) deste frame
+    shading.end_frame()
+    glstate.end_frame()
+
+def _update_point_lights() -> None:
+    global _clustered
+    active = current_shading in shading.PHONG_MODES and point_lights is not None and len(point_lights) > 0
+    if active:
+        if _clustered is None:
+            _clustered = clustered_shading.ClusteredLighting()
+        _clustered.update(point_lights, view_matrix(), projection_matrix(), (width, height), NEAR, FAR)
+    shading.point_lighting = _clustered if active else None
+
+def set_point_light_count(count: int) -> None:
+    # Troca as luzes pontuais por `count` luzes aleatorias em torno dos objetos
+    global point_lights
+    if count <= 0:
+        point_lights = None
+        return
+    point_lights = light_clusters.random_lights(count, (0.0, 0.0, -OBJECT_DISTANCE), extent=4.5)
+
+def reset_lod() -> None:
+    # Esquece o nivel atual de cada objeto (histerese): o proximo frame escolhe
+    # os niveis so pela distancia, como no primeiro frame
+    for chain in objects3d.lod_chains.values():
+        chain.reset()
+    _lod_selector.reset()
+
+def current_matrices():
+    # (projecao, modelo/visualizacao dos objetos) no cache de matrizes, sem
+    # ler de volta do driver com glGetFloatv
+    return projection_matrix(), model_view_matrix()
+
+def current_frustum() -> bvh.Frustum:
+    # Frustum no espaco do modelo atual
+    proj, model_view = current_matrices()
+    return bvh.Frustum.from_matrix(proj @ model_view)
+
+def _pixels_per_unit(depth):
+    # Pixels por unidade do mundo a uma profundidade, na projecao atual
+    return lod.pixels_per_unit(projection, FOVY, ORTHO_SIZE, height, depth)
+
+def _instance_groups(graph, visible, model_view) -> dict:
+    # Divide as instancias (visiveis) de cada tipo entre os niveis de detalhe:
+    # nome da malha -> (tipo, indices), para instancing.draw_graph()
+    groups = {}
+    for kind in scene_graph.KINDS:
+        models = graph.instances(kind)
+        indices = visible[kind] if visible is not None else np.arange(len(models))
+        chain = objects3d.lod_chains.get(kind)
+        if chain is None or not len(indices):
+            groups[kind] = (kind, indices)
+            lod_stats[0] = lod_stats.get(0, 0) + len(indices)
+            continue
+        chosen = models[indices]
+        depth = lod.projected_depth(model_view, chosen[:, :3, 3])
+        pixels = _pixels_per_unit(depth) * lod.matrix_scale(chosen)
+        levels = _lod_selector.select(kind, chain, indices, len(models), pixels)
+        for level in np.unique(levels):
+            level = int(level)
+            groups[chain.levels[level].mesh_name] = (kind, indices[levels == level])
+            lod_stats[level] = lod_stats.get(level, 0) + int((levels == level).sum())
+    return groups
 
 def draw_scene_objects() -> None:
+    global _culler, cull_stats, lod_stats
+
     # eixos para referencia
     objects3d.draw_axes()
 
-    # apenas um objeto por vez, escolhido pelos botoes
-    if current_object == "cube":
-        objects3d.draw_cube()
-    elif current_object == "pyramid":
-        objects3d.draw_pyramid()
-    elif current_object == "cylinder":
-        objects3d.draw_cylinder()
-    elif current_object == "sphere":
-        objects3d.draw_sphere()
+    frustum = current_frustum() if culling_enabled else None
+    lod_stats = {}
+
+    # grafo de cena: uma chamada instanciada por malha (tipo e nivel de
+    # detalhe), so com as instancias que o BVH encontrou dentro do frustum
+    if instanced_scene is not None:
+        visible = None
+        if frustum is not None:
+            if _culler is None or _culler.graph is not instanced_scene:
+                _culler = bvh.SceneCuller(instanced_scene, objects3d.object_bounds)
+            visible = _culler.visible(frustum)
+            cull_stats = _culler.stats
+        else:
+            cull_stats = {}
+        if lod_enabled:
+            groups = _instance_groups(instanced_scene, visible, current_matrices()[1])
+        else:
+            groups = instancing.visible_groups(visible) if visible is not None else None
+        instancing.draw_graph(instanced_scene, current_shading, light_pos, groups=groups)
+        return
+
+    # apenas um objeto por vez, escolhido pelos botoes.
+    # Todos os objetos ficam no registro de malhas (VBO) criado em
+    # objects3d.init_meshes() e sao desenhados com uma unica chamada.
+    if not meshes.has_mesh(current_object):
+        return
+    if frustum is not None:
+        lo, hi = objects3d.object_bounds(current_object)
+        outside, _ = frustum.classify(np.asarray(lo)[None], np.asarray(hi)[None])
+        drawn = int(not outside[0])
+        cull_stats = {"objects": 1, "nodes_tested": 0, "objects_tested": 1,
+                      "culled": 1 - drawn, "drawn": drawn}
+        if not drawn:
+            return
+    else:
+        cull_stats = {}
+
+    mesh_name = current_object
+    chain = objects3d.lod_chains.get(current_object)
+    if lod_enabled and chain is not None:
+        # profundidade do centro do objeto (origem do modelo)
+        depth = lod.projected_depth(current_matrices()[1], np.zeros(3))[0]
+        level = chain.select(float(_pixels_per_unit(depth)))
+        mesh_name = level.mesh_name
+        lod_stats = {chain.levels.index(level): 1}
+
+    mesh = meshes.get_mesh(mesh_name)
+    if mesh.encoding is not None:
+        # formato compacto: decodificado pelos programas de shading.py
+        shading.draw_encoded_mesh(mesh, current_shading, light_pos, (0.0, 0.0, 0.0))
+    else:
+        mesh.draw()
+
+def pick(x: int, y: int):
+    # Objeto e triangulo sob o pixel (x, y) da janela (y de cima para baixo),
+    # na camera e projecao atuais: picking.PickHit ou None
+    global _picker
+    if _picker is None:
+        _picker = picking.Picker(objects3d.pick_triangles, objects3d.object_bounds)
+    origin, direction = picking.click_ray(x, y, width, height, *current_matrices())
+    if instanced_scene is not None:
+        return _picker.pick_graph(instanced_scene, origin, direction)
+    if not meshes.has_mesh(current_object):
+        return None
+    return _picker.pick_mesh(current_object, origin, direction)
 
 def reshape(w: int, h: int) -> None:
     # Atualiza dimensoes globais da janela (usadas na projecao e na UI)
@@ -184,20 +520,22 @@ def reshape(w: int, h: int) -> None:
 
     # Recalcula a matriz de projecao com o novo aspecto largura/altura
     setup_projection()
+    scheduler.request_redraw("reshape")
 
-def timer(value: int) -> None:
-    # Solicita redesenho da cena (chama display() no proximo ciclo do GLUT)
-    glutPostRedisplay()
-
-    # Agenda nova chamada do timer em ~16 ms (60 FPS)
-    glutTimerFunc(16, timer, 0)
+def _auto_rotate(dt: float) -> bool:
+    # Passo da animacao de rotacao automatica (chamado pelo scheduler)
+    global angle_y
+    angle_y = (angle_y + AUTO_ROTATE_SPEED * dt) % 360.0
+    return True
 
 def keyboard(key: bytes, x: int, y: int) -> None:
-    global projection, current_object, current_shading
+    global projection, current_object, current_shading, instanced_scene, culling_enabled, lod_enabled
     global eye_z, angle_x, angle_y, angle_z
 
     # ESC
     if key == b'\x1b':
+        from OpenGL.GLUT import glutLeaveMainLoop
+        shutdown()
         glutLeaveMainLoop()
         return
 
@@ -237,6 +575,49 @@ def keyboard(key: bytes, x: int, y: int) -> None:
         current_object = "cylinder"
     elif key == b'4':
         current_object = "sphere"
+    elif key == b'5' and meshes.has_mesh(MODEL_NAME):
+        current_object = MODEL_NAME
+
+    # grade de milhares de primitivas desenhadas por instancias
+    if key in (b'i', b'I'):
+        if instanced_scene is None:
+            instanced_scene = scene_graph.demo_grid(INSTANCE_DEMO_COUNT)
+        else:
+            instanced_scene = None
+        _lod_selector.reset()
+
+    # culling por frustum (BVH) ligado/desligado
+    if key in (b'k', b'K'):
+        culling_enabled = not culling_enabled
+
+    # quantidade de luzes pontuais do modo phong (0 -> 64 -> 256 -> 512)
+    if key in (b'm', b'M'):
+        count = len(point_lights) if point_lights is not None else 0
+        following = [n for n in POINT_LIGHT_COUNTS if n > count]
+        set_point_light_count(following[0] if following else 0)
+
+    # niveis de detalhe ligados/desligados
+    if key in (b'l', b'L'):
+        lod_enabled = not lod_enabled
+
+    # rotacao automatica (animacao): mantem o scheduler redesenhando
+    if key in (b'r', b'R'):
+        if scheduler.is_animating("auto_rotate"):
+            scheduler.stop_animation("auto_rotate")
+        else:
+            scheduler.start_animation("auto_rotate", _auto_rotate)
+
+    # alterna entre redesenho sob demanda e continuo (~60 FPS)
+    if key in (b'c', b'C'):
+        scheduler.toggle_mode()
+
+    # overlay do profiler (liga a medicao junto) e dump dos tempos em JSON
+    if key in (b'o', b'O'):
+        frame_profiler.show_overlay = not frame_profiler.show_overlay
+        if frame_profiler.show_overlay:
+            frame_profiler.enable()
+    if key in (b'j', b'J') and frame_profiler.enabled:
+        frame_profiler.dump_json(PROFILE_JSON_PATH)
 
     # atalhos opcionais para shading
     if key in (b'f', b'F'):
@@ -249,12 +630,14 @@ def keyboard(key: bytes, x: int, y: int) -> None:
         current_shading = "phong"
         shading.set_shading_mode(current_shading)
 
-    glutPostRedisplay()
+    scheduler.request_redraw("input")
 
 
 def special_keys(key: int, x: int, y: int) -> None:
     # da a opcao para o usuario usar as setas do teclado
     global angle_x, angle_y, angle_z
+    from OpenGL.GLUT import (GLUT_KEY_DOWN, GLUT_KEY_LEFT, GLUT_KEY_PAGE_DOWN, GLUT_KEY_PAGE_UP,
+                             GLUT_KEY_RIGHT, GLUT_KEY_UP)
 
     if key == GLUT_KEY_UP:
         angle_x += 5.0
@@ -269,11 +652,13 @@ def special_keys(key: int, x: int, y: int) -> None:
     elif key == GLUT_KEY_PAGE_DOWN:
         angle_z -= 5.0
 
-    glutPostRedisplay()
+    scheduler.request_redraw("input")
 
 def mouse(button: int, state: int, x: int, y: int) -> None:
-    # Trata cliques do mouse sobre a barra de botoes da UI
-    global current_object, current_shading
+    # Trata cliques do mouse sobre a barra de botoes da UI; fora dela, o
+    # clique seleciona o objeto/triangulo atingido (pick)
+    global current_object, current_shading, last_pick
+    from OpenGL.GLUT import GLUT_DOWN, GLUT_LEFT_BUTTON
 
     if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
         # Verifica se o clique caiu em algum botao definido em ui.py
@@ -286,6 +671,8 @@ def mouse(button: int, state: int, x: int, y: int) -> None:
             # Troca o modo de sombreamento e atualiza o estado em shading.py
             current_shading = value
             shading.set_shading_mode(current_shading)
+        elif not (show_ui and y < ui.BAR_HEIGHT):
+            last_pick = pick(x, y)
 
         # Solicita redesenho para refletir a troca na tela
-        glutPostRedisplay()
+        scheduler.request_redraw("input")
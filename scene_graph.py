@@ -0,0 +1,213 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+import transforms
+
+# Grafo de cena com os dados de todos os nos em arrays NumPy contiguos.
+# Cada no tem uma matriz local (4x4, convencao de transforms.py: p' = M @ p),
+# um pai opcional, um tipo de primitiva ("cube", "pyramid", ... ou None para
+# nos de agrupamento) e uma cor. update() calcula as matrizes de mundo nivel a
+# nivel da hierarquia com produtos de matrizes em lote (sem laco por no) e
+# separa as instancias de cada tipo, prontas para o desenho instanciado
+# (ver instancing.py). Sem dependencia de OpenGL.
+
+# Tipos de primitiva desenhaveis (nomes do registro de malhas em meshes.py)
+KINDS = ("cube", "pyramid", "cylinder", "sphere")
+
+_NO_KIND = -1
+_INITIAL_CAPACITY = 64
+
+
+class SceneGraph:
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY) -> None:
+        self.count = 0
+        self._local = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self._world = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self._parent = np.full(capacity, -1, dtype=np.int64)
+        self._depth = np.zeros(capacity, dtype=np.int64)
+        self._kind = np.full(capacity, _NO_KIND, dtype=np.int8)
+        self._color = np.ones((capacity, 3), dtype=np.float32)
+
+        # Mudou alguma matriz (recalcular mundo) / mudou a estrutura (reagrupar)
+        self._transforms_dirty = False
+        self._topology_dirty = False
+        self._colors_dirty = False
+        # Versao incrementada a cada update() que altera as instancias;
+        # o renderizador so reenvia os buffers quando ela muda
+        self.version = 0
+        # Incrementada quando nos sao adicionados/removidos ou mudam de tipo
+        self.topology_version = 0
+
+        self._levels: List[np.ndarray] = []
+        self._kind_nodes: Dict[str, np.ndarray] = {}
+        self._instances: Dict[str, np.ndarray] = {}
+        self._colors: Dict[str, np.ndarray] = {}
+
+    # -- construcao ---------------------------------------------------------
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.count + extra
+        capacity = len(self._parent)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        def grow(array: np.ndarray, fill) -> np.ndarray:
+            bigger = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            bigger[:self.count] = array[:self.count]
+            bigger[self.count:] = fill
+            return bigger
+
+        self._local = grow(self._local, 0.0)
+        self._world = grow(self._world, 0.0)
+        self._parent = grow(self._parent, -1)
+        self._depth = grow(self._depth, 0)
+        self._kind = grow(self._kind, _NO_KIND)
+        self._color = grow(self._color, 1.0)
+
+    def add(self, kind: Optional[str] = None, transform: Optional[np.ndarray] = None,
+            color: Sequence[float] = (1.0, 1.0, 1.0), parent: int = -1) -> int:
+        # Adiciona um no e retorna seu indice. kind None cria um no de agrupamento
+        ids = self.add_many(kind, None if transform is None else np.asarray(transform)[None],
+                            np.asarray(color, dtype=np.float32)[None], parent, count=1)
+        return int(ids[0])
+
+    def add_many(self, kind: Optional[str], transforms: Optional[np.ndarray] = None,
+                 colors: Optional[np.ndarray] = None, parent=-1,
+                 count: Optional[int] = None) -> np.ndarray:
+        # Adiciona varios nos do mesmo tipo de uma vez.
+        # transforms: (N, 4, 4) ou None (identidade); colors: (N, 3), (3,) ou None;
+        # parent: indice unico ou array (N,). Retorna os indices criados.
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Tipo de primitiva desconhecido: {kind}")
+        if count is None:
+            if transforms is None:
+                raise ValueError("Informe transforms ou count")
+            count = len(transforms)
+
+        self._reserve(count)
+        ids = np.arange(self.count, self.count + count)
+        parents = np.broadcast_to(np.asarray(parent, dtype=np.int64), (count,))
+        if np.any(parents >= self.count):
+            raise ValueError("O pai precisa existir antes do filho")
+
+        if transforms is None:
+            self._local[ids] = np.eye(4, dtype=np.float32)
+        else:
+            self._local[ids] = np.asarray(transforms, dtype=np.float32).reshape(count, 4, 4)
+        if colors is not None:
+            self._color[ids] = np.broadcast_to(np.asarray(colors, dtype=np.float32), (count, 3))
+        self._parent[ids] = parents
+        self._depth[ids] = np.where(parents >= 0, self._depth[np.maximum(parents, 0)] + 1, 0)
+        self._kind[ids] = _NO_KIND if kind is None else KINDS.index(kind)
+
+        self.count += count
+        self._topology_dirty = True
+        self._transforms_dirty = True
+        return ids
+
+    def clear(self) -> None:
+        self.count = 0
+        self._topology_dirty = True
+        self._transforms_dirty = True
+
+    # -- edicao ---------------------------------------------------------------
+
+    def set_transform(self, node: int, transform: np.ndarray) -> None:
+        self._local[node] = transform
+        self._transforms_dirty = True
+
+    def set_transforms(self, nodes: np.ndarray, transforms: np.ndarray) -> None:
+        self._local[nodes] = transforms
+        self._transforms_dirty = True
+
+    def set_colors(self, nodes: np.ndarray, colors: np.ndarray) -> None:
+        self._color[nodes] = colors
+        self._colors_dirty = True
+
+    def local(self, node: int) -> np.ndarray:
+        return self._local[node].copy()
+
+    def world(self, node: int) -> np.ndarray:
+        self.update()
+        return self._world[node].copy()
+
+    # -- atualizacao ----------------------------------------------------------
+
+    def _rebuild_topology(self) -> None:
+        n = self.count
+        depth = self._depth[:n]
+        max_depth = int(depth.max()) if n else -1
+        # Indices de cada nivel da hierarquia (pais sempre num nivel anterior)
+        order = np.argsort(depth, kind="stable")
+        bounds = np.searchsorted(depth[order], np.arange(max_depth + 2))
+        self._levels = [order[bounds[d]:bounds[d + 1]] for d in range(max_depth + 1)]
+
+        kinds = self._kind[:n]
+        self._kind_nodes = {name: np.flatnonzero(kinds == k) for k, name in enumerate(KINDS)}
+        self.topology_version += 1
+
+    def update(self) -> bool:
+        # Recalcula o que estiver sujo; retorna True se as instancias mudaram
+        if not (self._transforms_dirty or self._topology_dirty or self._colors_dirty):
+            return False
+        if self._topology_dirty:
+            self._rebuild_topology()
+
+        if self._levels:
+            roots = self._levels[0]
+            self._world[roots] = self._local[roots]
+            for level in self._levels[1:]:
+                self._world[level] = self._world[self._parent[level]] @ self._local[level]
+
+        for name, nodes in self._kind_nodes.items():
+            self._instances[name] = self._world[nodes]
+            self._colors[name] = self._color[nodes]
+
+        self._transforms_dirty = False
+        self._topology_dirty = False
+        self._colors_dirty = False
+        self.version += 1
+        return True
+
+    def instances(self, kind: str) -> np.ndarray:
+        # Matrizes de mundo (N, 4, 4) das instancias de um tipo
+        self.update()
+        return self._instances.get(kind, np.zeros((0, 4, 4), dtype=np.float32))
+
+    def instance_colors(self, kind: str) -> np.ndarray:
+        self.update()
+        return self._colors.get(kind, np.zeros((0, 3), dtype=np.float32))
+
+    def instance_counts(self) -> Dict[str, int]:
+        self.update()
+        return {name: len(nodes) for name, nodes in self._kind_nodes.items()}
+
+
+def demo_grid(count: int = 4000, spacing: float = 0.6, seed: int = 0) -> SceneGraph:
+    # Grade de primitivas misturadas (tecla 'i' em scene.py), todas filhas de
+    # um no raiz: girar a raiz move a grade inteira com um unico set_transform
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(count ** (1.0 / 3.0)))
+    cells = np.indices((side, side, side)).reshape(3, -1).T[:count]
+    offsets = (cells - (side - 1) / 2.0) * spacing
+
+    # translate @ rotate(angulo, eixo Y) @ scale uniforme, montadas em lote
+    scales = rng.uniform(0.08, 0.18, size=count)
+    angles = rng.uniform(0.0, 360.0, size=count)
+    matrices = transforms.compose(transforms.translate_many(offsets),
+                                  transforms.rotate_many(angles, (0.0, 1.0, 0.0)),
+                                  transforms.scale_many(scales))
+    colors = rng.uniform(0.2, 1.0, size=(count, 3))
+    kinds = rng.integers(0, len(KINDS), size=count)
+
+    graph = SceneGraph(capacity=count + 1)
+    root = graph.add(None)
+    for k, name in enumerate(KINDS):
+        chosen = kinds == k
+        if chosen.any():
+            graph.add_many(name, matrices[chosen], colors[chosen], parent=root)
+    return graph
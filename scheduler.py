@@ -0,0 +1,148 @@
+import time
+from typing import Callable, Dict
+
+import input_trace
+
+# Agendador de redesenho.
+# - "on_demand" (padrao): so pede um novo frame quando algo muda (entrada do
+#   usuario, reshape, troca de objeto/shading) ou enquanto ha animacao ativa.
+#   Com a cena parada nenhum timer fica armado e o GLUT dorme esperando eventos.
+# - "continuous": comportamento antigo, redesenha a cada FRAME_INTERVAL_MS.
+
+FRAME_INTERVAL_MS = 16
+
+mode = "on_demand"
+
+# Sem janela GLUT (modo headless): quem chama desenha os frames diretamente,
+# entao pedidos de redesenho so sao contabilizados e nenhum timer e armado
+offscreen = False
+
+# Ja existe um glutPostRedisplay pendente que ainda nao virou frame
+_redraw_pending = False
+# Ja existe um glutTimerFunc armado
+_timer_armed = False
+_last_tick = 0.0
+
+# Animacoes ativas: nome -> funcao step(dt) que avanca o estado.
+# step retorna False quando a animacao terminou.
+_animations: Dict[str, Callable[[float], bool]] = {}
+
+# Estatisticas: frames desenhados e pedidos de redesenho por motivo
+frames_drawn = 0
+redraw_requests: Dict[str, int] = {}
+
+# Medidor de uso de CPU do processo (tempo de CPU / tempo de relogio)
+_cpu_start = time.process_time()
+_wall_start = time.perf_counter()
+
+
+def set_mode(new_mode: str) -> None:
+    global mode
+    if new_mode not in ("on_demand", "continuous"):
+        raise ValueError(f"Modo de agendamento invalido: {new_mode}")
+    mode = new_mode
+    _update_timer()
+    request_redraw("mode")
+
+
+def toggle_mode() -> None:
+    set_mode("continuous" if mode == "on_demand" else "on_demand")
+
+
+def request_redraw(reason: str = "input") -> None:
+    # Pede um novo frame; varios pedidos antes do proximo display() viram um so
+    global _redraw_pending
+    redraw_requests[reason] = redraw_requests.get(reason, 0) + 1
+    if not _redraw_pending:
+        _redraw_pending = True
+        if not offscreen:
+            from OpenGL.GLUT import glutPostRedisplay
+            glutPostRedisplay()
+
+
+def frame_presented() -> None:
+    # Chamado ao fim de cada display(): libera o proximo pedido de redesenho
+    global _redraw_pending, frames_drawn
+    _redraw_pending = False
+    frames_drawn += 1
+    input_trace.record(input_trace.FRAME)
+
+
+def start_animation(name: str, step: Callable[[float], bool]) -> None:
+    # Registra uma animacao; enquanto houver alguma, o timer continua armado
+    global _last_tick
+    if not _animations and not _timer_armed:
+        _last_tick = time.perf_counter()
+    _animations[name] = step
+    _update_timer()
+
+
+def stop_animation(name: str) -> None:
+    _animations.pop(name, None)
+
+
+def stop_all_animations() -> None:
+    _animations.clear()
+
+
+def is_animating(name: str) -> bool:
+    return name in _animations
+
+
+def _needs_timer() -> bool:
+    return mode == "continuous" or bool(_animations)
+
+
+def _update_timer() -> None:
+    global _timer_armed
+    if _needs_timer() and not _timer_armed and not offscreen:
+        _timer_armed = True
+        from OpenGL.GLUT import glutTimerFunc
+        glutTimerFunc(FRAME_INTERVAL_MS, _tick, 0)
+
+
+def _tick(value: int) -> None:
+    global _timer_armed, _last_tick
+    _timer_armed = False
+
+    now = time.perf_counter()
+    dt = now - _last_tick
+    _last_tick = now
+
+    # --record-trace: o dt gravado faz a reproducao avancar igual
+    input_trace.record(input_trace.TICK, dt=dt)
+    advance(dt)
+
+    if _needs_timer():
+        request_redraw("animation" if _animations else "continuous")
+        _update_timer()
+
+
+def advance(dt: float) -> None:
+    # Avanca as animacoes ativas em dt segundos e remove as que terminaram.
+    # Chamado pelo timer ou, na reproducao de input_trace.py, com os dt gravados.
+    for name, step in list(_animations.items()):
+        if step(dt) is False:
+            _animations.pop(name, None)
+
+
+def start(initial_mode: str = "on_demand") -> None:
+    # Chamado uma vez em main.py, antes de glutMainLoop()
+    global _last_tick
+    _last_tick = time.perf_counter()
+    reset_cpu_meter()
+    set_mode(initial_mode)
+
+
+def reset_cpu_meter() -> None:
+    global _cpu_start, _wall_start
+    _cpu_start = time.process_time()
+    _wall_start = time.perf_counter()
+
+
+def cpu_usage() -> float:
+    # Fracao de um nucleo usada pelo processo desde reset_cpu_meter() (0.0 a 1.0+)
+    wall = time.perf_counter() - _wall_start
+    if wall <= 0.0:
+        return 0.0
+    return (time.process_time() - _cpu_start) / wall
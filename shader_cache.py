@@ -0,0 +1,256 @@
+import ctypes
+import hashlib
+import os
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from OpenGL.GL import *
+from OpenGL.error import GLError
+
+# Compilacao e cache dos programas GLSL (usado por shading.ShaderProgram).
+# - precompile(): recebe todas as variantes conhecidas (shading.program_variants())
+#   e compila as que faltam de uma vez: todos os glCompileShader e glLinkProgram
+#   sao emitidos antes de qualquer consulta de status, entao com
+#   GL_KHR_parallel_shader_compile (glMaxShaderCompilerThreadsKHR) o driver
+#   compila em varias threads; sem a extensao o resultado e o mesmo, em serie.
+# - Cada programa linkado e gravado em disco com glGetProgramBinary, numa
+#   chave que combina as fontes, as localizacoes de atributos e o driver
+#   (fabricante, renderer e versao). Na proxima execucao glProgramBinary
+#   carrega o programa sem compilar; se o driver recusar o binario (outra
+#   versao, formato que ele nao anuncia em GL_PROGRAM_BINARY_FORMATS, arquivo
+#   corrompido) o arquivo e apagado e o programa e compilado das fontes.
+# - program_handle() entrega um programa: pre-compilado, do disco ou, em
+#   ultimo caso, compilado na hora.
+
+# Diretorio dos binarios (TG3D_SHADER_CACHE muda o local; vazio desliga o disco)
+CACHE_DIR = os.environ.get("TG3D_SHADER_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "tg3d", "shaders"))
+
+# Arquivo: MAGIC + formato do binario (uint32 little endian) + binario do driver
+MAGIC = b"TGSB"
+
+Variant = Tuple[str, str, Optional[Dict[str, int]]]
+
+# Contadores desde o inicio do processo (ou do ultimo reset_stats())
+stats: Dict[str, float] = {}
+
+# chave -> programa linkado por precompile() e ainda nao entregue
+_ready: Dict[str, int] = {}
+_driver: Optional[str] = None
+# formatos de binario aceitos pelo driver (GL_PROGRAM_BINARY_FORMATS)
+_binary_formats: Optional[FrozenSet[int]] = None
+_parallel: Optional[bool] = None
+
+
+def reset_stats() -> None:
+    stats.update(binary_hits=0, binary_rejected=0, compiled=0, saved=0, precompile_ms=0.0)
+
+
+reset_stats()
+
+
+def _driver_string() -> str:
+    global _driver
+    if _driver is None:
+        parts = [glGetString(name) or b"" for name in
+                 (GL_VENDOR, GL_RENDERER, GL_VERSION, GL_SHADING_LANGUAGE_VERSION)]
+        _driver = "|".join(p.decode(errors="replace") for p in parts)
+    return _driver
+
+
+def variant_key(vertex_src: str, fragment_src: str,
+                attrib_locations: Optional[Dict[str, int]] = None) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in (_driver_string(), vertex_src, fragment_src, repr(sorted((attrib_locations or {}).items()))):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _disk_enabled() -> bool:
+    global _binary_formats
+    if not CACHE_DIR:
+        return False
+    if _binary_formats is None:
+        count = int(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS))
+        formats = (GLint * max(count, 1))()
+        if count > 0:
+            glGetIntegerv(GL_PROGRAM_BINARY_FORMATS, formats)
+        _binary_formats = frozenset(int(f) & 0xFFFFFFFF for f in formats[:count])
+    return bool(_binary_formats)
+
+
+def _enable_parallel() -> None:
+    # Deixa o driver escolher o numero de threads de compilacao
+    global _parallel
+    if _parallel is not None:
+        return
+    _parallel = False
+    try:
+        from OpenGL.GL.KHR.parallel_shader_compile import glMaxShaderCompilerThreadsKHR
+        if bool(glMaxShaderCompilerThreadsKHR):
+            glMaxShaderCompilerThreadsKHR(0xFFFFFFFF)
+            _parallel = True
+    except ImportError:
+        pass
+
+
+def parallel_compile() -> bool:
+    # True se GL_KHR_parallel_shader_compile esta em uso
+    _enable_parallel()
+    return _parallel
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key + ".bin")
+
+
+def _load_binary(key: str) -> Optional[int]:
+    if not _disk_enabled():
+        return None
+    try:
+        with open(_path(key), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    program = glCreateProgram()
+    if data[:4] == MAGIC and len(data) > 8:
+        binary_format = int.from_bytes(data[4:8], "little")
+        # Formato fora da lista do driver daria GL_INVALID_ENUM (GLError no
+        # perfil debug); mesmo com formato valido o driver ainda pode gerar erro
+        if binary_format in _binary_formats:
+            try:
+                glProgramBinary(program, binary_format, data[8:], len(data) - 8)
+                linked = glGetProgramiv(program, GL_LINK_STATUS) == GL_TRUE
+            except GLError:
+                linked = False
+            if linked:
+                stats["binary_hits"] += 1
+                return program
+
+    # recusado pelo driver: apaga e compila das fontes
+    glDeleteProgram(program)
+    stats["binary_rejected"] += 1
+    try:
+        os.remove(_path(key))
+    except OSError:
+        pass
+    return None
+
+
+def _save_binary(key: str, program: int) -> None:
+    if not _disk_enabled():
+        return
+    size = int(glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH))
+    if size <= 0:
+        return
+    buffer = (ctypes.c_ubyte * size)()
+    length = ctypes.c_int()
+    binary_format = ctypes.c_uint()
+    glGetProgramBinary(program, size, ctypes.byref(length), ctypes.byref(binary_format), buffer)
+
+    # grava num temporario e renomeia: leitores nunca veem arquivo pela metade
+    path = _path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(MAGIC + int(binary_format.value).to_bytes(4, "little"))
+            f.write(bytes(buffer)[:length.value])
+        os.replace(temp, path)
+        stats["saved"] += 1
+    except OSError:
+        pass
+
+
+def _compile_batch(variants: List[Variant]) -> List[int]:
+    # Compila e linka varios programas: emite todo o trabalho antes de
+    # consultar qualquer status, para o driver poder paralelizar
+    _enable_parallel()
+    started = []
+    for vertex_src, fragment_src, attrib_locations in variants:
+        shaders = []
+        for source, shader_type in ((vertex_src, GL_VERTEX_SHADER), (fragment_src, GL_FRAGMENT_SHADER)):
+            shader = glCreateShader(shader_type)
+            glShaderSource(shader, source)
+            glCompileShader(shader)
+            shaders.append(shader)
+        started.append(shaders)
+
+    programs = []
+    for (vertex_src, fragment_src, attrib_locations), shaders in zip(variants, started):
+        program = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program, shader)
+        # Localizacoes fixas para atributos genericos (precisam vir antes do link),
+        # para que varios programas compartilhem o mesmo VAO
+        for name, location in (attrib_locations or {}).items():
+            glBindAttribLocation(program, location, name)
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+        glLinkProgram(program)
+        programs.append(program)
+
+    # So agora espera: cada consulta bloqueia ate aquele programa ficar pronto
+    error = None
+    for program, shaders in zip(programs, started):
+        if error is None and glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            for shader in shaders:
+                if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
+                    error = f"Erro compilando shader: {glGetShaderInfoLog(shader).decode()}"
+                    break
+            else:
+                error = f"Erro linkando programa: {glGetProgramInfoLog(program).decode()}"
+        # Depois do link os objetos shader nao sao mais necessarios
+        for shader in shaders:
+            glDetachShader(program, shader)
+            glDeleteShader(shader)
+
+    if error is not None:
+        for program in programs:
+            glDeleteProgram(program)
+        raise RuntimeError(error)
+    stats["compiled"] += len(programs)
+    return programs
+
+
+def precompile(variants: Iterable[Variant]) -> None:
+    # Deixa prontos (do disco ou compilados em lote) os programas das variantes
+    start = time.perf_counter()
+    missing: Dict[str, Variant] = {}
+    for variant in variants:
+        key = variant_key(*variant)
+        if key in _ready or key in missing:
+            continue
+        program = _load_binary(key)
+        if program is not None:
+            _ready[key] = program
+        else:
+            missing[key] = variant
+
+    if missing:
+        for key, program in zip(missing, _compile_batch(list(missing.values()))):
+            _save_binary(key, program)
+            _ready[key] = program
+    stats["precompile_ms"] += (time.perf_counter() - start) * 1e3
+
+
+def program_handle(vertex_src: str, fragment_src: str,
+                   attrib_locations: Optional[Dict[str, int]] = None) -> int:
+    # Programa linkado para as fontes; cada chamada entrega um programa proprio
+    key = variant_key(vertex_src, fragment_src, attrib_locations)
+    program = _ready.pop(key, None)
+    if program is None:
+        program = _load_binary(key)
+    if program is None:
+        program = _compile_batch([(vertex_src, fragment_src, attrib_locations)])[0]
+        _save_binary(key, program)
+    return program
+
+
+def release() -> None:
+    # Libera os programas pre-compilados que nao foram usados (antes de
+    # destruir o contexto OpenGL)
+    for program in _ready.values():
+        glDeleteProgram(program)
+    _ready.clear()
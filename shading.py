@@ -1,74 +1,174 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from OpenGL.GL import *
 
+import glstate
+import meshes
+import shader_cache
+
 # Modo de sombreamento atual usado pelo modulo shading
-# Pode ser "flat", "gouraud" ou "phong"; inicia em "gouraud"
+# Pode ser "flat", "gouraud", "phong" ou "deferred"; inicia em "gouraud"
 current_mode = "gouraud"
 
-# Identificador do programa de shader Phong (GL handle)
+# Modos que desenham com os vertex shaders Phong (iluminacao por pixel);
+# "deferred" grava o G-buffer com eles e ilumina depois (deferred.py)
+PHONG_MODES = ("phong", "deferred")
+
+# Programa de shader Phong (ShaderProgram, ver abaixo)
 # Sera definido em init_phong_shader() e usado quando current_mode == "phong"
 phong_program = None
 
-def compile_shader(source: str, shader_type: int) -> int:
-    # Cria um objeto shader OpenGL do tipo indicado (vertex ou fragment)
-    shader = glCreateShader(shader_type)
+# Matrizes do frame para os shaders Phong (uniforms uProjection, uModelView e
+# uNormalMatrix), ja transpostas para a ordem de colunas do GLSL.
+# Definidas por set_matrices() (scene.py) antes do desenho.
+_matrix_uniforms: Dict[str, np.ndarray] = {}
 
-    # Associa o codigo fonte GLSL ao shader e solicita a compilacao
-    glShaderSource(shader, source)
-    glCompileShader(shader)
+# Luzes pontuais extras (clustered_shading.ClusteredLighting) somadas pelos
+# programas Phong quando definido (scene.py); None = so a luz principal
+point_lighting = None
 
-    # Verifica se a compilacao foi bem-sucedida
-    status = glGetShaderiv(shader, GL_COMPILE_STATUS)
-    if status != GL_TRUE:
-        log = glGetShaderInfoLog(shader).decode()
-        raise RuntimeError(f"Erro compilando shader: {log}")
+# G-buffer do modo "deferred" (deferred.DeferredRenderer), definido por
+# deferred.begin_frame()
+deferred_renderer = None
 
-    # Retorna o identificador do shader compilado para uso em init_phong_shader()
-    return shader
+# Variantes de programa conhecidas, compiladas juntas por precompile_variants():
+# pares (vertex, fragment) avulsos e, para os programas Phong, o produto de
+# todos os vertex shaders Phong registrados por todos os fragment shaders que
+# os acompanham (forward, luzes pontuais, G-buffer). Cada modulo registra as
+# suas fontes ao ser importado.
+_variants: List[shader_cache.Variant] = []
+_phong_vertex_sources: List[Tuple[str, Optional[Dict[str, int]]]] = []
+_phong_fragment_sources: List[str] = []
 
-def link_program(vs: int, fs: int) -> int:
-    # Cria um programa OpenGL vazio
-    prog = glCreateProgram()
+# Funcao glUniform* usada para cada tipo GLSL refletido por glGetActiveUniform
+_UNIFORM_SETTERS = {
+    GL_FLOAT: glUniform1f,
+    GL_FLOAT_VEC2: glUniform2f,
+    GL_FLOAT_VEC3: glUniform3f,
+    GL_FLOAT_VEC4: glUniform4f,
+    GL_INT: glUniform1i,
+    GL_INT_VEC2: glUniform2i,
+    GL_INT_VEC3: glUniform3i,
+    GL_INT_VEC4: glUniform4i,
+    GL_BOOL: glUniform1i,
+    GL_SAMPLER_2D: glUniform1i,
+    GL_UNSIGNED_INT_SAMPLER_BUFFER: glUniform1i,
+}
 
-    # Anexa o vertex shader (vs) e o fragment shader (fs) ao programa
-    glAttachShader(prog, vs)
-    glAttachShader(prog, fs)
+# Todos os ShaderProgram vivos (Phong, instanciados, decodificacao, clustered,
+# deferred): end_frame() fecha os contadores de cada um e uniform_stats()
+# soma os resultados. Cada programa entra ao ser criado e sai em delete().
+_live_programs: List["ShaderProgram"] = []
 
-    # Faz o link do programa combinando os dois shaders
-    glLinkProgram(prog)
+# Tipos matriciais: enviados como array float32 com glUniformMatrix*fv
+_MATRIX_SETTERS = {
+    GL_FLOAT_MAT3: glUniformMatrix3fv,
+    GL_FLOAT_MAT4: glUniformMatrix4fv,
+}
 
-    # Verifica se o link foi bem-sucedido
-    status = glGetProgramiv(prog, GL_LINK_STATUS)
-    if status != GL_TRUE:
-        log = glGetProgramInfoLog(prog).decode()
-        raise RuntimeError(f"Erro linkando programa: {log}")
 
-    # Retorna o handle do programa para uso em init_phong_shader()
-    return prog
+class ShaderProgram:
+    # Programa GLSL ja compilado e linkado, com os uniforms refletidos uma unica
+    # vez (glGetActiveUniform) logo apos o link. set_uniform() usa as localizacoes
+    # em cache e pula o glUniform* quando o valor e igual ao ultimo enviado.
 
-def init_phong_shader() -> None:
-    global phong_program
+    def __init__(self, vertex_src: str, fragment_src: str,
+                 attrib_locations: Optional[Dict[str, int]] = None) -> None:
+        # Ja compilado por precompile_variants(), carregado do cache em disco
+        # ou, em ultimo caso, compilado agora (shader_cache.py)
+        self.handle = shader_cache.program_handle(vertex_src, fragment_src, attrib_locations)
 
-    # Codigo fonte do vertex shader Phong:
-    # calcula posicao em view space, normal e cor do vertice (vColor)
-    # que serao usadas no fragment shader.
-    vertex_src = """
-    varying vec3 vNormal;
-    varying vec3 vFragPos;
-    varying vec3 vColor;
+        # nome -> (localizacao, tipo GLSL)
+        self.uniforms: Dict[str, Tuple[int, int]] = {}
+        # nome -> ultimo valor enviado
+        self._last_values: Dict[str, object] = {}
 
-    void main() {
-        vec4 posView = gl_ModelViewMatrix * gl_Vertex;
-        vFragPos = posView.xyz;
-        vNormal = normalize(gl_NormalMatrix * gl_Normal);
-        vColor = gl_Color.rgb;  // cor vinda do glColor3f no codigo em Python
-        gl_Position = gl_ProjectionMatrix * posView;
-    }
-    """
+        # Contadores do frame atual e do ultimo frame fechado em end_frame()
+        self.uploads = 0
+        self.skipped = 0
+        self.last_frame_uploads = 0
+        self.last_frame_skipped = 0
+
+        self._reflect_uniforms()
+        _live_programs.append(self)
+
+    def _reflect_uniforms(self) -> None:
+        count = glGetProgramiv(self.handle, GL_ACTIVE_UNIFORMS)
+        for index in range(count):
+            name, size, utype = glGetActiveUniform(self.handle, index)
+            name = name.decode() if isinstance(name, bytes) else name
+
+            # uniforms embutidos (gl_ModelViewMatrix, ...) nao tem localizacao
+            if name.startswith("gl_"):
+                continue
+
+            # arrays aparecem como "nome[0]"; guardamos pelo nome base
+            if name.endswith("[0]"):
+                name = name[:-3]
+
+            # membros de blocos (uniform buffer objects) tambem nao
+            location = glGetUniformLocation(self.handle, name)
+            if location < 0:
+                continue
+            self.uniforms[name] = (location, int(utype))
+
+    def use(self) -> None:
+        glstate.use_program(self.handle)
+
+    def has_uniform(self, name: str) -> bool:
+        return name in self.uniforms
+
+    def set_uniform(self, name: str, *values) -> bool:
+        # Envia o uniform se o valor mudou; retorna True se houve glUniform*.
+        # O programa precisa estar ativo (use()) antes da chamada.
+        entry = self.uniforms.get(name)
+        if entry is None:
+            # uniform inexistente ou removido pelo compilador: nada a fazer
+            return False
+        location, utype = entry
+
+        matrix_setter = _MATRIX_SETTERS.get(utype)
+        if matrix_setter is not None:
+            data = np.ascontiguousarray(values[0], dtype=np.float32)
+            key = data.tobytes()
+        else:
+            key = values
+
+        if self._last_values.get(name) == key:
+            self.skipped += 1
+            return False
+
+        if matrix_setter is not None:
+            matrix_setter(location, 1, GL_FALSE, data)
+        else:
+            _UNIFORM_SETTERS[utype](location, *values)
+
+        self._last_values[name] = key
+        self.uploads += 1
+        return True
+
+    def end_frame(self) -> None:
+        # Fecha os contadores do frame (shading.end_frame() chama para todo programa vivo)
+        self.last_frame_uploads = self.uploads
+        self.last_frame_skipped = self.skipped
+        self.uploads = 0
+        self.skipped = 0
 
-    # Codigo fonte do fragment shader Phong:
-    # aplica iluminacao ambiente, difusa e especular,
-    # usando vColor como cor base do material.
-    fragment_src = """
+    def delete(self) -> None:
+        if self in _live_programs:
+            _live_programs.remove(self)
+        glDeleteProgram(self.handle)
+        self.handle = 0
+        self.uniforms.clear()
+        self._last_values.clear()
+
+
+# Codigo fonte do fragment shader Phong:
+# aplica iluminacao ambiente, difusa e especular,
+# usando vColor como cor base do material.
+# Compartilhado com os programas instanciados de instancing.py.
+PHONG_FRAGMENT_SRC = """
     varying vec3 vNormal;
     varying vec3 vFragPos;
     varying vec3 vColor;
@@ -102,14 +202,91 @@ def init_phong_shader() -> None:
     }
     """
 
-    # Compila vertex e fragment shader a partir das strings GLSL acima
-    vs = compile_shader(vertex_src, GL_VERTEX_SHADER)
-    fs = compile_shader(fragment_src, GL_FRAGMENT_SHADER)
+# Iluminacao por vertice equivalente ao pipeline fixo da cena (GL_LIGHT0 com
+# GL_COLOR_MATERIAL, sem especular no material). Usada pelos programas que
+# substituem o pipeline fixo nos modos flat/gouraud (instancing.py e formatos
+# compactos abaixo); o resultado vai em gl_FrontColor, entao glShadeModel vale.
+GOURAUD_LIGHTING_SRC = """
+    vec4 gouraudColor(vec3 posView, vec3 N, vec3 color) {
+        vec3 L = normalize(gl_LightSource[0].position.xyz - posView);
+        vec3 ambient = (gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb) * color;
+        vec3 diffuse = max(dot(N, L), 0.0) * gl_LightSource[0].diffuse.rgb * color;
+        return vec4(clamp(ambient + diffuse, 0.0, 1.0), 1.0);
+    }
+"""
+
+# Matrizes usadas pelos vertex shaders Phong no lugar de gl_ModelViewMatrix,
+# gl_NormalMatrix e gl_ProjectionMatrix (ver set_matrices())
+MATRIX_UNIFORMS_SRC = """
+    uniform mat4 uModelView;
+    uniform mat4 uProjection;
+    uniform mat3 uNormalMatrix;
+"""
+
+# Codigo fonte do vertex shader Phong:
+# calcula posicao em view space, normal e cor do vertice (vColor)
+# que serao usadas no fragment shader.
+PHONG_VERTEX_SRC = MATRIX_UNIFORMS_SRC + """
+    varying vec3 vNormal;
+    varying vec3 vFragPos;
+    varying vec3 vColor;
+
+    void main() {
+        vec4 posView = uModelView * gl_Vertex;
+        vFragPos = posView.xyz;
+        vNormal = normalize(uNormalMatrix * gl_Normal);
+        vColor = gl_Color.rgb;  // cor vinda do glColor3f no codigo em Python
+        gl_Position = uProjection * posView;
+    }
+    """
+
+def release_phong_shader() -> None:
+    # Libera o programa Phong (antes de destruir o contexto OpenGL)
+    global phong_program
+    if phong_program is not None:
+        phong_program.delete()
+        phong_program = None
+
+def init_phong_shader() -> None:
+    global phong_program
 
-    # Faz o link dos dois shaders em um programa unico.
-    # O handle resultante e guardado em phong_program e usado
+    # Compila e linka os dois shaders em um programa unico, refletindo os uniforms.
+    # O programa e guardado em phong_program e usado
     # em set_shading_mode() e prepare_for_frame() quando o modo for "phong".
-    phong_program = link_program(vs, fs)
+    phong_program = ShaderProgram(PHONG_VERTEX_SRC, PHONG_FRAGMENT_SRC)
+
+def lit_program(program: ShaderProgram, vertex_src: str,
+                attrib_locations: Optional[Dict[str, int]] = None) -> ShaderProgram:
+    # Programa a usar com um vertex shader Phong: no modo deferred a variante
+    # que grava o G-buffer (deferred.py); com luzes pontuais ativas a variante
+    # com o fragment shader de clustered_shading.py; senao o proprio programa
+    if current_mode == "deferred" and deferred_renderer is not None:
+        return deferred_renderer.program(vertex_src, attrib_locations)
+    if point_lighting is None:
+        return program
+    return point_lighting.program(vertex_src, attrib_locations)
+
+def register_variant(vertex_src: str, fragment_src: str,
+                     attrib_locations: Optional[Dict[str, int]] = None) -> None:
+    _variants.append((vertex_src, fragment_src, attrib_locations))
+
+def register_phong_vertex(vertex_src: str, attrib_locations: Optional[Dict[str, int]] = None) -> None:
+    # Vertex shader usado com lit_program(): combina com todo fragment shader Phong
+    _phong_vertex_sources.append((vertex_src, attrib_locations))
+
+def register_phong_fragment(fragment_src: str) -> None:
+    _phong_fragment_sources.append(fragment_src)
+
+def program_variants() -> List[shader_cache.Variant]:
+    phong = [(vs, fs, attribs) for vs, attribs in _phong_vertex_sources
+             for fs in _phong_fragment_sources]
+    return _variants + phong
+
+def precompile_variants() -> None:
+    # Compila de uma vez (em paralelo quando o driver permite) todos os
+    # programas registrados, ou os carrega do cache em disco; os ShaderProgram
+    # criados depois so pegam o programa pronto
+    shader_cache.precompile(program_variants())
 
 def set_shading_mode(mode: str) -> None:
     # Atualiza o modo de sombreamento atual (flat, gouraud ou phong)
@@ -117,56 +294,201 @@ def set_shading_mode(mode: str) -> None:
     current_mode = mode
 
     if mode in ("flat", "gouraud"):
-        # Volta para o pipeline fixo (sem shader programavel)
-        glUseProgram(0)
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
+        # Volta para o pipeline fixo (sem shader programavel).
+        # glstate descarta as chamadas que nao mudam nada no estado atual.
+        glstate.use_program(0)
+        glstate.enable(GL_LIGHTING)
+        glstate.enable(GL_LIGHT0)
 
         # Define modelo de sombreamento do OpenGL:
         # FLAT  -> cor constante por face
         # SMOOTH -> interpolacao por vertice (Gouraud)
         if mode == "flat":
-            glShadeModel(GL_FLAT)
+            glstate.shade_model(GL_FLAT)
         else:
-            glShadeModel(GL_SMOOTH)
+            glstate.shade_model(GL_SMOOTH)
 
-    elif mode == "phong":
+    elif mode in PHONG_MODES:
         # Desliga iluminacao fixa e ativa o programa Phong
-        glDisable(GL_LIGHTING)
-        glUseProgram(phong_program)
+        glstate.disable(GL_LIGHTING)
+        phong_program.use()
 
 def prepare_for_frame(shading_mode: str, light_pos, view_pos) -> None:
-    if shading_mode == "phong":
+    if shading_mode in PHONG_MODES:
         # Ativa o programa de shader Phong para este frame
-        glUseProgram(phong_program)
-
-        # Parametros padrao do modelo de iluminacao Phong
-        specular = (1.0, 1.0, 1.0)
-        shininess = 32.0
-        ambient_strength = 0.2
-        diffuse_strength = 0.8
-
-        # Localiza os uniforms no programa Phong
-        loc_light = glGetUniformLocation(phong_program, b"uLightPos")
-        loc_view = glGetUniformLocation(phong_program, b"uViewPos")
-        loc_spec = glGetUniformLocation(phong_program, b"uSpecularColor")
-        loc_shine = glGetUniformLocation(phong_program, b"uShininess")
-        loc_ambs = glGetUniformLocation(phong_program, b"uAmbientStrength")
-        loc_diffs = glGetUniformLocation(phong_program, b"uDiffuseStrength")
-
-        # Envia posicao da luz, da camera e parametros de iluminacao ao shader
-        glUniform3f(loc_light, float(light_pos[0]), float(light_pos[1]), float(light_pos[2]))
-        glUniform3f(loc_view, float(view_pos[0]), float(view_pos[1]), float(view_pos[2]))
-        glUniform3f(loc_spec, float(specular[0]), float(specular[1]), float(specular[2]))
-        glUniform1f(loc_shine, float(shininess))
-        glUniform1f(loc_ambs, float(ambient_strength))
-        glUniform1f(loc_diffs, float(diffuse_strength))
+        program = lit_program(phong_program, PHONG_VERTEX_SRC)
+        program.use()
+
+        apply_phong_uniforms(program, light_pos, view_pos)
     else:
         # Para flat/gouraud, garante uso do pipeline fixo (sem shader)
-        glUseProgram(0)
+        glstate.use_program(0)
+
+def set_matrices(projection: np.ndarray, model_view: np.ndarray) -> None:
+    # Projecao e modelo/visualizacao (convencao de transforms.py) usadas pelos
+    # shaders Phong. A matriz de normais e a inversa transposta da parte 3x3:
+    # transposta para o GLSL ela volta a ser simplesmente a inversa.
+    _matrix_uniforms["uProjection"] = np.ascontiguousarray(projection.T, dtype=np.float32)
+    _matrix_uniforms["uModelView"] = np.ascontiguousarray(model_view.T, dtype=np.float32)
+    _matrix_uniforms["uNormalMatrix"] = np.ascontiguousarray(
+        np.linalg.inv(model_view[:3, :3]), dtype=np.float32)
+
+def apply_matrix_uniforms(prog: ShaderProgram) -> None:
+    # Envia as matrizes de set_matrices() ao programa ativo; set_uniform()
+    # pula as que nao mudaram desde o ultimo envio
+    for name, matrix in _matrix_uniforms.items():
+        prog.set_uniform(name, matrix)
+
+def apply_phong_uniforms(prog: ShaderProgram, light_pos, view_pos) -> None:
+    # Parametros padrao do modelo de iluminacao Phong
+    specular = (1.0, 1.0, 1.0)
+    shininess = 32.0
+    ambient_strength = 0.2
+    diffuse_strength = 0.8
+
+    # Envia posicao da luz, da camera e parametros de iluminacao ao shader
+    # (que precisa estar ativo). As localizacoes ja estao em cache e valores
+    # repetidos nao sao reenviados.
+    prog.set_uniform("uLightPos", float(light_pos[0]), float(light_pos[1]), float(light_pos[2]))
+    prog.set_uniform("uViewPos", float(view_pos[0]), float(view_pos[1]), float(view_pos[2]))
+    prog.set_uniform("uSpecularColor", float(specular[0]), float(specular[1]), float(specular[2]))
+    prog.set_uniform("uShininess", float(shininess))
+    prog.set_uniform("uAmbientStrength", float(ambient_strength))
+    prog.set_uniform("uDiffuseStrength", float(diffuse_strength))
+    apply_matrix_uniforms(prog)
+    if point_lighting is not None and prog.has_uniform("uClusterGrid"):
+        point_lighting.apply_uniforms(prog)
 
 def finish_frame() -> None:
     # Para modos que nao usam shader explicito, garante que nenhum programa
     # permaneça ativo apos o desenho (seguranca de estado)
-    if current_mode != "phong":
-        glUseProgram(0)
+    if current_mode not in PHONG_MODES:
+        glstate.use_program(0)
+
+def end_frame() -> None:
+    # Fecha os contadores de uniforms enviados/evitados deste frame em todos os
+    # programas vivos, inclusive os que nao foram usados (zeram para o proximo).
+    # Chamado no fim do frame, depois do resolve do modo deferred.
+    for program in _live_programs:
+        program.end_frame()
+
+
+# Decodificacao dos formatos compactos de vertex_formats.py no vertex shader.
+# Posicao: offset + valor * escala (caixa da malha); normal octaedrica quando
+# NORMAL_OCT esta definido, senao ja vem em xyz (float ou 10-10-10-2
+# normalizado pelo proprio GL); cor em rgb (float ou uint8 normalizado).
+_DECODE_SRC = """
+    attribute vec4 aPosition;
+    attribute vec4 aNormal;
+    attribute vec4 aColor;
+
+    uniform vec3 uPositionOffset;
+    uniform vec3 uPositionScale;
+
+    vec4 decodePosition() {
+        return vec4(uPositionOffset + aPosition.xyz * uPositionScale, 1.0);
+    }
+
+    vec3 decodeNormal() {
+    #ifdef NORMAL_OCT
+        vec3 n = vec3(aNormal.xy, 1.0 - abs(aNormal.x) - abs(aNormal.y));
+        float t = max(-n.z, 0.0);
+        n.x += n.x >= 0.0 ? -t : t;
+        n.y += n.y >= 0.0 ? -t : t;
+        return normalize(n);
+    #else
+        return aNormal.xyz;
+    #endif
+    }
+"""
+
+_DECODE_PHONG_VERTEX_SRC = _DECODE_SRC + MATRIX_UNIFORMS_SRC + """
+    varying vec3 vNormal;
+    varying vec3 vFragPos;
+    varying vec3 vColor;
+
+    void main() {
+        vec4 posView = uModelView * decodePosition();
+        vFragPos = posView.xyz;
+        vNormal = normalize(uNormalMatrix * decodeNormal());
+        vColor = aColor.rgb;
+        gl_Position = uProjection * posView;
+    }
+"""
+
+_DECODE_GOURAUD_VERTEX_SRC = _DECODE_SRC + GOURAUD_LIGHTING_SRC + """
+    void main() {
+        vec4 posView = gl_ModelViewMatrix * decodePosition();
+        vec3 N = normalize(gl_NormalMatrix * decodeNormal());
+        gl_FrontColor = gouraudColor(posView.xyz, N, aColor.rgb);
+        gl_Position = gl_ProjectionMatrix * posView;
+    }
+"""
+
+# Fragment shader dos programas que calculam a cor por vertice (gouraudColor)
+GOURAUD_FRAGMENT_SRC = """
+    void main() {
+        gl_FragColor = gl_Color;
+    }
+"""
+
+# (phong?, formato da normal) -> programa de decodificacao, criados no primeiro uso
+_decode_programs: Dict[Tuple[bool, str], ShaderProgram] = {}
+
+def vertex_format_program(shading_mode: str, normal_format: str) -> ShaderProgram:
+    phong = shading_mode in PHONG_MODES
+    key = (phong, normal_format)
+    defines = "#define NORMAL_OCT\n" if normal_format == "oct" else ""
+    program = _decode_programs.get(key)
+    if program is None:
+        if phong:
+            program = ShaderProgram(defines + _DECODE_PHONG_VERTEX_SRC, PHONG_FRAGMENT_SRC,
+                                    meshes.VERTEX_FORMAT_ATTRIB_LOCATIONS)
+        else:
+            program = ShaderProgram(defines + _DECODE_GOURAUD_VERTEX_SRC, GOURAUD_FRAGMENT_SRC,
+                                    meshes.VERTEX_FORMAT_ATTRIB_LOCATIONS)
+        _decode_programs[key] = program
+    if phong:
+        return lit_program(program, defines + _DECODE_PHONG_VERTEX_SRC,
+                           meshes.VERTEX_FORMAT_ATTRIB_LOCATIONS)
+    return program
+
+def draw_encoded_mesh(mesh, shading_mode: str, light_pos, view_pos) -> None:
+    # Desenha uma malha em formato compacto com o programa que decodifica o
+    # formato dela, no modo de sombreamento atual; depois restaura o programa
+    encoding = mesh.encoding
+    program = vertex_format_program(shading_mode, encoding.format.normal)
+    previous = glstate.current_program()
+    program.use()
+    if shading_mode in PHONG_MODES:
+        apply_phong_uniforms(program, light_pos, view_pos)
+    program.set_uniform("uPositionOffset", *(float(v) for v in encoding.position_offset))
+    program.set_uniform("uPositionScale", *(float(v) for v in encoding.position_scale))
+    mesh.draw()
+    glstate.use_program(previous if previous is not None else 0)
+
+def release_vertex_format_programs() -> None:
+    # Libera os programas de decodificacao (antes de destruir o contexto OpenGL)
+    for program in _decode_programs.values():
+        program.delete()
+    _decode_programs.clear()
+
+
+def uniform_stats() -> Dict[str, int]:
+    # Quantos glUniform* os programas vivos fizeram e quantos evitaram no
+    # ultimo frame, somados
+    return {
+        "programs": len(_live_programs),
+        "uploads": sum(program.last_frame_uploads for program in _live_programs),
+        "skipped": sum(program.last_frame_skipped for program in _live_programs),
+    }
+
+
+# Variantes deste modulo: Phong e os programas de decodificacao dos formatos
+# compactos (vertex_formats.py) com normal octaedrica ou nao
+register_phong_vertex(PHONG_VERTEX_SRC)
+register_phong_fragment(PHONG_FRAGMENT_SRC)
+for _defines in ("", "#define NORMAL_OCT\n"):
+    register_phong_vertex(_defines + _DECODE_PHONG_VERTEX_SRC, meshes.VERTEX_FORMAT_ATTRIB_LOCATIONS)
+    register_variant(_defines + _DECODE_GOURAUD_VERTEX_SRC, GOURAUD_FRAGMENT_SRC,
+                     meshes.VERTEX_FORMAT_ATTRIB_LOCATIONS)
@@ -0,0 +1,419 @@
+# Renderizador em software (so NumPy) que reproduz o pipeline da cena:
+# camera de gluLookAt, projecao perspectiva/ortografica de setup_projection(),
+# iluminacao fixa do GL_LIGHT0 (flat e gouraud) e o shader Phong de
+# shading.init_phong_shader(). Os triangulos sao rasterizados em lotes com
+# operacoes vetorizadas (sem lacos por pixel em Python).
+#
+# Serve como imagem de referencia (golden image) para testes de regressao e
+# como alternativa em maquinas sem OpenGL utilizavel: este modulo nao importa
+# PyOpenGL.
+#
+# Uso (a partir da raiz do projeto):
+#     python software_renderer.py --out frames/      um PNG por (objeto, shading)
+#     python software_renderer.py --compare-gl       compara com o render via GL (headless)
+#
+# Limitacoes conhecidas: nao ha recorte contra o plano near (triangulos com
+# vertice atras da camera sao descartados) e os eixos sao sempre desenhados
+# sem iluminacao, mesmo no modo phong.
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import geometry
+import transforms
+
+# Quantidade maxima de pixels candidatos avaliados de uma vez em um lote
+# (triangulos x area da caixa envolvente); limita o uso de memoria
+BATCH_PIXELS = 1 << 21
+
+# Cor de fundo de init_gl() (glClearColor)
+CLEAR_COLOR = (0.1, 0.1, 0.1)
+
+# Iluminacao fixa: ambiente global padrao do OpenGL (GL_LIGHT_MODEL_AMBIENT).
+# GL_LIGHT0 tem difusa branca e o material nao tem especular (padrao do GL).
+GLOBAL_AMBIENT = 0.2
+
+# Parametros do shader Phong (mesmos de shading.prepare_for_frame())
+PHONG_SPECULAR = (1.0, 1.0, 1.0)
+PHONG_SHININESS = 32.0
+PHONG_AMBIENT = 0.2
+PHONG_DIFFUSE = 0.8
+
+
+@dataclass
+class SceneView:
+    # Estado da cena necessario para renderizar um frame.
+    # Os valores padrao sao os valores iniciais de scene.py.
+    width: int = 800
+    height: int = 600
+    object: str = "cube"
+    shading: str = "gouraud"
+    projection: str = "perspective"
+    angle_x: float = 20.0
+    angle_y: float = -30.0
+    angle_z: float = 0.0
+    eye: Tuple[float, float, float] = (0.0, 0.0, 8.0)
+    center: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    up: Tuple[float, float, float] = (0.0, 1.0, 0.0)
+    light_pos: Tuple[float, float, float] = (4.0, 4.0, 4.0)
+    fovy: float = 45.0
+    near: float = 0.1
+    far: float = 100.0
+    ortho_size: float = 6.0
+    object_distance: float = 5.0
+    show_axes: bool = True
+
+    @classmethod
+    def from_scene(cls, scene) -> "SceneView":
+        # Copia o estado atual do modulo scene (exige PyOpenGL, ja que scene o importa)
+        return cls(
+            width=scene.width, height=scene.height,
+            object=scene.current_object, shading=scene.current_shading,
+            projection=scene.projection,
+            angle_x=scene.angle_x, angle_y=scene.angle_y, angle_z=scene.angle_z,
+            eye=(scene.eye_x, scene.eye_y, scene.eye_z),
+            center=(scene.center_x, scene.center_y, scene.center_z),
+            up=(scene.up_x, scene.up_y, scene.up_z),
+            light_pos=tuple(scene.light_pos),
+            fovy=scene.FOVY, near=scene.NEAR, far=scene.FAR,
+            ortho_size=scene.ORTHO_SIZE, object_distance=scene.OBJECT_DISTANCE,
+        )
+
+    def projection_matrix(self) -> np.ndarray:
+        aspect = self.width / float(self.height) if self.height > 0 else 1.0
+        if self.projection == "perspective":
+            return transforms.perspective(self.fovy, aspect, self.near, self.far)
+        size = self.ortho_size
+        return transforms.ortho(-size * aspect, size * aspect, -size, size, self.near, self.far)
+
+    def view_matrix(self) -> np.ndarray:
+        return transforms.look_at(self.eye, self.center, self.up)
+
+    def model_matrix(self) -> np.ndarray:
+        # Mesma sequencia de display(): translacao e tres rotacoes
+        return (transforms.translate(0.0, 0.0, -self.object_distance)
+                @ transforms.rotate(self.angle_x, 1.0, 0.0, 0.0)
+                @ transforms.rotate(self.angle_y, 0.0, 1.0, 0.0)
+                @ transforms.rotate(self.angle_z, 0.0, 0.0, 1.0))
+
+
+class SoftwareRenderer:
+    # Buffers de cor e profundidade em NumPy + rasterizacao de triangulos e linhas
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.color = np.empty((height, width, 3), dtype=np.float32)
+        self.depth = np.empty(height * width, dtype=np.float32)
+        self.triangles_drawn = 0
+        self.clear()
+
+    def clear(self, color: Sequence[float] = CLEAR_COLOR) -> None:
+        self.color[:] = color
+        self.depth[:] = 1.0
+
+    def image(self) -> np.ndarray:
+        # (altura, largura, 3) uint8 com a linha 0 no topo, como Framebuffer.read_pixels()
+        rgb = np.clip(np.rint(self.color * 255.0), 0, 255).astype(np.uint8)
+        return rgb[::-1].copy()
+
+    def _to_screen(self, clip: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # clip (N, 4) -> x, y em pixels (origem embaixo), z em [0, 1] e 1/w
+        inv_w = 1.0 / clip[:, 3]
+        x = (clip[:, 0] * inv_w + 1.0) * 0.5 * self.width
+        y = (clip[:, 1] * inv_w + 1.0) * 0.5 * self.height
+        z = (clip[:, 2] * inv_w + 1.0) * 0.5
+        return x, y, z, inv_w
+
+    def _depth_resolve(self, pix: np.ndarray, z: np.ndarray) -> np.ndarray:
+        # Indices dos fragmentos que passam no teste GL_LESS: o mais proximo
+        # de cada pixel no lote, e so se for mais proximo que o z-buffer
+        order = np.lexsort((z, pix))
+        pix_sorted = pix[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pix_sorted[1:] != pix_sorted[:-1]
+        winners = order[first]
+        return winners[z[winners] < self.depth[pix[winners]]]
+
+    def draw_triangles(self, clip: np.ndarray, indices: np.ndarray, shade) -> None:
+        # clip: (N, 4) vertices em coordenadas de recorte; indices: (M, 3).
+        # shade(tri, bary) recebe, para cada fragmento visivel, o triangulo e as
+        # coordenadas baricentricas corrigidas por perspectiva (F, 3) e devolve cores (F, 3).
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        x, y, z, inv_w = self._to_screen(clip)
+
+        # descarta triangulos com vertice atras da camera (sem recorte near)
+        keep = (clip[indices, 3] > 1e-6).all(axis=1)
+
+        tx, ty = x[indices], y[indices]
+        area = (tx[:, 1] - tx[:, 0]) * (ty[:, 2] - ty[:, 0]) - (tx[:, 2] - tx[:, 0]) * (ty[:, 1] - ty[:, 0])
+        keep &= np.abs(area) > 1e-12
+
+        # caixa envolvente em pixels (centros de pixel em i + 0.5)
+        x0 = np.maximum(np.ceil(tx.min(axis=1) - 0.5), 0).astype(np.int64)
+        x1 = np.minimum(np.floor(tx.max(axis=1) - 0.5), self.width - 1).astype(np.int64)
+        y0 = np.maximum(np.ceil(ty.min(axis=1) - 0.5), 0).astype(np.int64)
+        y1 = np.minimum(np.floor(ty.max(axis=1) - 0.5), self.height - 1).astype(np.int64)
+        keep &= (x1 >= x0) & (y1 >= y0)
+
+        tris = np.nonzero(keep)[0]
+        if len(tris) == 0:
+            return
+        self.triangles_drawn += len(tris)
+
+        # Lotes de triangulos com caixas de tamanho parecido
+        side = np.maximum(x1[tris] - x0[tris], y1[tris] - y0[tris]) + 1
+        order = np.argsort(side, kind="stable")
+        tris, side = tris[order], side[order]
+
+        start = 0
+        while start < len(tris):
+            count = max(1, BATCH_PIXELS // int(side[start]) ** 2)
+            while count > 1 and count * int(side[min(start + count, len(tris)) - 1]) ** 2 > BATCH_PIXELS:
+                count //= 2
+            batch = tris[start:start + count]
+            start += count
+            self._raster_batch(batch, indices[batch], tx[batch], ty[batch], area[batch],
+                               x0[batch], x1[batch], y0[batch], y1[batch], z, inv_w, shade)
+
+    def _raster_batch(self, batch, idx, tx, ty, area, x0, x1, y0, y1, z, inv_w, shade) -> None:
+        bw = int((x1 - x0).max()) + 1
+        bh = int((y1 - y0).max()) + 1
+
+        # grade (T, bh, bw) de centros de pixel dentro da caixa de cada triangulo
+        px = x0[:, None, None] + np.arange(bw)[None, None, :]
+        py = y0[:, None, None] + np.arange(bh)[None, :, None]
+        valid = (px <= x1[:, None, None]) & (py <= y1[:, None, None])
+        cx = px + 0.5
+        cy = py + 0.5
+
+        def edge(i: int, j: int) -> np.ndarray:
+            ax, ay = tx[:, i, None, None], ty[:, i, None, None]
+            bx, by = tx[:, j, None, None], ty[:, j, None, None]
+            return ((bx - ax) * (cy - ay) - (by - ay) * (cx - ax)) / area[:, None, None]
+
+        l0 = edge(1, 2)
+        l1 = edge(2, 0)
+        l2 = edge(0, 1)
+        inside = valid & (l0 >= 0.0) & (l1 >= 0.0) & (l2 >= 0.0)
+
+        t, iy, ix = np.nonzero(inside)
+        if len(t) == 0:
+            return
+        lam = np.stack((l0[t, iy, ix], l1[t, iy, ix], l2[t, iy, ix]), axis=1)
+        vid = idx[t]
+
+        # profundidade e linear em espaco de tela; atributos usam correcao de perspectiva
+        frag_z = (lam * z[vid]).sum(axis=1)
+        in_range = (frag_z >= 0.0) & (frag_z <= 1.0)
+
+        pix = py[t, iy, 0] * self.width + px[t, 0, ix]
+        pix, frag_z, lam, vid, t = pix[in_range], frag_z[in_range], lam[in_range], vid[in_range], t[in_range]
+
+        winners = self._depth_resolve(pix, frag_z)
+        if len(winners) == 0:
+            return
+
+        bary = lam[winners] * inv_w[vid[winners]]
+        bary /= bary.sum(axis=1, keepdims=True)
+
+        colors = shade(batch[t[winners]], bary)
+        pix = pix[winners]
+        self.depth[pix] = frag_z[winners]
+        self.color.reshape(-1, 3)[pix] = colors
+
+    def draw_lines(self, clip: np.ndarray, colors: np.ndarray) -> None:
+        # clip: (2 * L, 4) pares de pontos; colors: (L, 3). Linhas sem iluminacao.
+        x, y, z, _ = self._to_screen(clip)
+        for i in range(len(colors)):
+            a, b = 2 * i, 2 * i + 1
+            if clip[a, 3] <= 1e-6 or clip[b, 3] <= 1e-6:
+                continue
+            # amostra nos centros de pixel ao longo do eixo principal (como a regra
+            # "diamond exit" do GL): uma amostra por coluna (ou linha) atravessada
+            dx, dy = x[b] - x[a], y[b] - y[a]
+            major, minor = (x, y) if abs(dx) >= abs(dy) else (y, x)
+            lo, hi = sorted((major[a], major[b]))
+            centers = np.arange(np.ceil(lo - 0.5), np.ceil(hi - 0.5)) + 0.5
+            if len(centers) == 0:
+                continue
+            s = (centers - major[a]) / (major[b] - major[a])
+            m = np.floor(centers).astype(np.int64)
+            # coordenada exatamente na borda entre pixels fica com o pixel de baixo/esquerda
+            n = (np.ceil(minor[a] + (minor[b] - minor[a]) * s) - 1).astype(np.int64)
+            lx, ly = (m, n) if abs(dx) >= abs(dy) else (n, m)
+            lz = z[a] + (z[b] - z[a]) * s
+
+            ok = (lx >= 0) & (lx < self.width) & (ly >= 0) & (ly < self.height) & (lz >= 0.0) & (lz <= 1.0)
+            pix = ly[ok] * self.width + lx[ok]
+            lz = lz[ok]
+            winners = self._depth_resolve(pix, lz)
+            self.depth[pix[winners]] = lz[winners]
+            self.color.reshape(-1, 3)[pix[winners]] = colors[i]
+
+
+# ---------------------------------------------------------------------------
+# Modelos de iluminacao
+# ---------------------------------------------------------------------------
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(n > 0.0, n, 1.0)
+
+
+def fixed_function_lighting(pos_eye: np.ndarray, normal_eye: np.ndarray, color: np.ndarray,
+                            light_eye: np.ndarray) -> np.ndarray:
+    # Iluminacao por vertice do pipeline fixo com GL_COLOR_MATERIAL e GL_LIGHT0:
+    # ambiente global * cor + max(N.L, 0) * cor (sem especular no material).
+    # Assim como no GL sem GL_NORMALIZE, a normal transformada nao e renormalizada.
+    L = _normalize(light_eye[None, :] - pos_eye)
+    ndotl = np.maximum((normal_eye * L).sum(axis=1, keepdims=True), 0.0)
+    return np.clip(GLOBAL_AMBIENT * color + ndotl * color, 0.0, 1.0)
+
+
+def phong_lighting(frag_pos: np.ndarray, normal: np.ndarray, color: np.ndarray,
+                   light_pos: np.ndarray, view_pos: np.ndarray = np.zeros(3)) -> np.ndarray:
+    # Mesmo calculo do fragment shader Phong de shading.init_phong_shader()
+    N = _normalize(normal)
+    L = _normalize(light_pos[None, :] - frag_pos)
+    V = _normalize(view_pos[None, :] - frag_pos)
+    ndotl = (N * L).sum(axis=1, keepdims=True)
+    R = 2.0 * ndotl * N - L                     # reflect(-L, N)
+
+    diff = np.maximum(ndotl, 0.0)
+    spec = np.where(diff > 0.0, np.maximum((R * V).sum(axis=1, keepdims=True), 0.0) ** PHONG_SHININESS, 0.0)
+
+    result = (PHONG_AMBIENT * color + diff * PHONG_DIFFUSE * color
+              + spec * np.asarray(PHONG_SPECULAR)[None, :])
+    return np.clip(result, 0.0, 1.0)
+
+
+# ---------------------------------------------------------------------------
+# Cena
+# ---------------------------------------------------------------------------
+
+def render_mesh(renderer: SoftwareRenderer, view: SceneView, vertices: np.ndarray,
+                indices: Optional[np.ndarray] = None) -> None:
+    # Desenha uma malha no layout intercalado de geometry.py com o modelo de view.shading
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, geometry.FLOATS_PER_VERTEX)
+    if indices is None:
+        indices = np.arange(len(vertices))
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+
+    view_m = view.view_matrix()
+    mv = view_m @ view.model_matrix()
+    proj = view.projection_matrix()
+
+    pos_eye = transforms.transform_points(mv, vertices[:, 0:3])
+    clip = pos_eye @ proj.T
+    pos_eye = pos_eye[:, :3]
+    normal_eye = vertices[:, 3:6] @ transforms.normal_matrix(mv).T
+    base_color = vertices[:, 6:9]
+
+    if view.shading in ("phong", "deferred"):
+        # uLightPos e enviado sem transformacao (ja considerado espaco de camera)
+        light = np.asarray(view.light_pos, dtype=np.float64)
+
+        def shade(tri: np.ndarray, bary: np.ndarray) -> np.ndarray:
+            vid = indices[tri]
+            w = bary[:, :, None]
+            n = (_normalize(normal_eye)[vid] * w).sum(axis=1)
+            p = (pos_eye[vid] * w).sum(axis=1)
+            c = (base_color[vid] * w).sum(axis=1)
+            return phong_lighting(p, n, c, light)
+    else:
+        # GL_LIGHT0 e posicionada depois de apply_camera(): so a matriz de camera se aplica
+        light_eye = (view_m @ np.append(np.asarray(view.light_pos, dtype=np.float64), 1.0))[:3]
+        vertex_color = fixed_function_lighting(pos_eye, normal_eye, base_color, light_eye)
+
+        if view.shading == "flat":
+            def shade(tri: np.ndarray, bary: np.ndarray) -> np.ndarray:
+                # cor do vertice provocante (ultimo vertice do triangulo)
+                return vertex_color[indices[tri, 2]]
+        else:
+            def shade(tri: np.ndarray, bary: np.ndarray) -> np.ndarray:
+                return (vertex_color[indices[tri]] * bary[:, :, None]).sum(axis=1)
+
+    renderer.draw_triangles(clip, indices, shade)
+
+
+def render_axes(renderer: SoftwareRenderer, view: SceneView) -> None:
+    mvp = view.projection_matrix() @ view.view_matrix() @ view.model_matrix()
+    points = np.array([p for start, end, _ in geometry.AXES for p in (start, end)], dtype=np.float64)
+    colors = np.array([c for _, _, c in geometry.AXES], dtype=np.float32)
+    renderer.draw_lines(transforms.transform_points(mvp, points), colors)
+
+
+def render(view: SceneView, renderer: Optional[SoftwareRenderer] = None) -> np.ndarray:
+    # Renderiza um frame completo (eixos + objeto atual) e devolve RGB uint8
+    if renderer is None or (renderer.width, renderer.height) != (view.width, view.height):
+        renderer = SoftwareRenderer(view.width, view.height)
+    renderer.clear()
+
+    if view.show_axes:
+        render_axes(renderer, view)
+    vertices, indices = geometry.vertex_data(view.object)
+    render_mesh(renderer, view, vertices, indices)
+    return renderer.image()
+
+
+def all_views() -> Sequence[Tuple[str, str]]:
+    objects = ("cube", "pyramid", "cylinder", "sphere")
+    shadings = ("flat", "gouraud", "phong")
+    return [(o, s) for o in objects for s in shadings]
+
+
+def _compare_with_gl(width: int, height: int) -> Dict[str, Dict[str, float]]:
+    # Renderiza cada (objeto, shading) nos dois caminhos e mede a diferenca
+    from headless import HeadlessRenderer
+    from images import image_diff
+
+    gl = HeadlessRenderer(width, height)
+    import scene
+
+    # Este renderizador desenha sempre a malha completa: o caminho GL tambem,
+    # sem os niveis de detalhe (ligados por padrao) nem histerese anterior
+    lod_enabled = scene.lod_enabled
+    scene.lod_enabled = False
+    scene.reset_lod()
+    results = {}
+    try:
+        for obj, shading_mode in all_views():
+            reference = gl.render(obj, shading_mode)
+            ours = render(SceneView(width=width, height=height, object=obj, shading=shading_mode))
+            results[f"{obj}/{shading_mode}"] = image_diff(reference, ours)
+    finally:
+        scene.lod_enabled = lod_enabled
+        gl.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Renderizador de referencia em NumPy")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--out", help="diretorio onde salvar um PNG por (objeto, shading)")
+    parser.add_argument("--compare-gl", action="store_true",
+                        help="compara com o render OpenGL headless e imprime as diferencas")
+    args = parser.parse_args()
+
+    if args.compare_gl:
+        print(f"{'objeto/shading':<20}{'max':>6}{'media':>8}{'% pixels':>10}")
+        for name, diff in _compare_with_gl(args.width, args.height).items():
+            print(f"{name:<20}{diff['max']:>6}{diff['mean']:>8.3f}{diff['mismatch'] * 100:>9.2f}%")
+        return
+
+    from images import write_png
+
+    out = args.out or "."
+    os.makedirs(out, exist_ok=True)
+    for obj, shading_mode in all_views():
+        view = SceneView(width=args.width, height=args.height, object=obj, shading=shading_mode)
+        write_png(os.path.join(out, f"{obj}_{shading_mode}.png"), render(view))
+
+
+if __name__ == "__main__":
+    main()
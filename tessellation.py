@@ -0,0 +1,225 @@
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Tuple
+
+import numpy as np
+
+# Geradores vetorizados (NumPy) de malhas indexadas para as quadricas que antes
+# eram tesseladas a cada frame por gluCylinder/gluDisk/glutSolidSphere.
+# Todas as formas seguem a convencao da GLU: eixo principal em +Z, base em z = 0,
+# triangulos em sentido anti-horario vistos de fora.
+
+
+class TessellatedMesh(NamedTuple):
+    positions: np.ndarray   # (N, 3) float32
+    normals: np.ndarray     # (N, 3) float32
+    indices: np.ndarray     # (M, 3) uint32
+
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.normals.nbytes + self.indices.nbytes
+
+
+def _grid_indices(rows: int, cols: int) -> np.ndarray:
+    # Indices de uma grade (rows + 1) x (cols + 1) de vertices, dois triangulos por celula.
+    # Cada celula (i, j) tem cantos a = (i, j), b = (i, j+1), c = (i+1, j+1), d = (i+1, j).
+    # Os dois triangulos terminam em a, o vertice que provoca a cor de cada quad
+    # do GL_QUAD_STRIP de gluCylinder, para o sombreamento flat ficar igual.
+    i, j = np.meshgrid(np.arange(rows), np.arange(cols), indexing="ij")
+    a = i * (cols + 1) + j
+    b = a + 1
+    d = a + (cols + 1)
+    c = d + 1
+    tris = np.stack((np.stack((b, c, a), -1), np.stack((c, d, a), -1)), axis=2)
+    return tris.reshape(-1, 3).astype(np.uint32)
+
+
+def _drop_degenerate(positions: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # Remove triangulos de area zero (ex.: polos da esfera, ponta do cone)
+    p = positions[indices]
+    area2 = np.linalg.norm(np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]), axis=1)
+    return indices[area2 > 1e-12]
+
+
+def _mesh(positions, normals, indices) -> TessellatedMesh:
+    return TessellatedMesh(
+        np.ascontiguousarray(positions, dtype=np.float32),
+        np.ascontiguousarray(normals, dtype=np.float32),
+        np.ascontiguousarray(indices, dtype=np.uint32),
+    )
+
+
+def _merge(*parts: TessellatedMesh) -> TessellatedMesh:
+    # Junta varias malhas em uma so, deslocando os indices de cada parte
+    offsets = np.cumsum([0] + [len(p.positions) for p in parts[:-1]])
+    return _mesh(
+        np.vstack([p.positions for p in parts]),
+        np.vstack([p.normals for p in parts]),
+        np.vstack([p.indices + np.uint32(o) for p, o in zip(parts, offsets)]),
+    )
+
+
+def sphere(radius: float, slices: int, stacks: int) -> TessellatedMesh:
+    # Equivalente a glutSolidSphere(radius, slices, stacks): polos em +Z e -Z
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1)      # longitude
+    phi = np.linspace(0.0, np.pi, stacks + 1)              # colatitude, 0 = polo +Z
+    phi, theta = np.meshgrid(phi, theta, indexing="ij")
+
+    normals = np.stack((
+        np.sin(phi) * np.cos(theta),
+        np.sin(phi) * np.sin(theta),
+        np.cos(phi),
+    ), axis=-1).reshape(-1, 3)
+    positions = normals * radius
+
+    # a grade percorre do polo +Z para o -Z, entao inverte a ordem para manter CCW
+    indices = _grid_indices(stacks, slices)[:, ::-1]
+    return _mesh(positions, normals, _drop_degenerate(positions, indices))
+
+
+def cylinder(radius: float, slices: int, stacks: int, height: float = 1.0,
+             caps: bool = True) -> TessellatedMesh:
+    # Equivalente a gluCylinder(radius, radius, height, slices, stacks)
+    # com as duas tampas (gluDisk) opcionais, de z = 0 ate z = height
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    z = np.linspace(0.0, height, stacks + 1)
+    z, theta = np.meshgrid(z, theta, indexing="ij")
+
+    ring = np.stack((np.cos(theta), np.sin(theta), np.zeros_like(theta)), axis=-1).reshape(-1, 3)
+    positions = ring * radius
+    positions[:, 2] = z.ravel()
+    wall = _mesh(positions, ring, _grid_indices(stacks, slices))
+
+    if not caps:
+        return wall
+
+    bottom = disk(radius, slices, 1, flip=True)
+    top = disk(radius, slices, 1)
+    top.positions[:, 2] = height
+    return _merge(wall, bottom, top)
+
+
+def cone(radius: float, slices: int, stacks: int, height: float = 1.0,
+         cap: bool = True) -> TessellatedMesh:
+    # Equivalente a gluCylinder(radius, 0, height, slices, stacks) + base opcional
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    t = np.linspace(0.0, 1.0, stacks + 1)
+    t, theta = np.meshgrid(t, theta, indexing="ij")
+
+    r = radius * (1.0 - t)
+    positions = np.stack((r * np.cos(theta), r * np.sin(theta), t * height), axis=-1).reshape(-1, 3)
+
+    # normal da superficie lateral: inclinada pelo angulo do cone
+    slant = np.hypot(radius, height)
+    normals = np.stack((
+        np.cos(theta) * height / slant,
+        np.sin(theta) * height / slant,
+        np.full_like(theta, radius / slant),
+    ), axis=-1).reshape(-1, 3)
+
+    indices = _drop_degenerate(positions, _grid_indices(stacks, slices))
+    side = _mesh(positions, normals, indices)
+    return _merge(side, disk(radius, slices, 1, flip=True)) if cap else side
+
+
+def disk(radius: float, slices: int, stacks: int, inner: float = 0.0,
+         flip: bool = False) -> TessellatedMesh:
+    # Equivalente a gluDisk(inner, radius, slices, loops = stacks), no plano z = 0.
+    # flip = True inverte a face (normal -Z), util para a tampa de baixo.
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    r = np.linspace(inner, radius, stacks + 1)
+    r, theta = np.meshgrid(r, theta, indexing="ij")
+
+    positions = np.stack((r * np.cos(theta), r * np.sin(theta), np.zeros_like(r)), axis=-1).reshape(-1, 3)
+    normals = np.zeros_like(positions)
+    normals[:, 2] = -1.0 if flip else 1.0
+
+    # a grade (raio x angulo) sai em sentido horario visto de +Z
+    indices = _drop_degenerate(positions, _grid_indices(stacks, slices))
+    if not flip:
+        indices = indices[:, ::-1]
+    return _mesh(positions, normals, indices)
+
+
+def torus(radius: float, slices: int, stacks: int, tube: float = 0.25) -> TessellatedMesh:
+    # Toro em volta do eixo Z: radius e o raio do anel, tube o raio do tubo.
+    # slices divide o anel e stacks divide a secao circular do tubo.
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1)   # ao longo do anel
+    phi = np.linspace(0.0, 2.0 * np.pi, stacks + 1)     # em volta do tubo
+    phi, theta = np.meshgrid(phi, theta, indexing="ij")
+
+    normals = np.stack((
+        np.cos(phi) * np.cos(theta),
+        np.cos(phi) * np.sin(theta),
+        np.sin(phi),
+    ), axis=-1).reshape(-1, 3)
+    centers = np.stack((
+        radius * np.cos(theta), radius * np.sin(theta), np.zeros_like(theta),
+    ), axis=-1).reshape(-1, 3)
+    positions = centers + tube * normals
+
+    return _mesh(positions, normals, _grid_indices(stacks, slices))
+
+
+GENERATORS: Dict[str, Callable[..., TessellatedMesh]] = {
+    "sphere": sphere,
+    "cylinder": cylinder,
+    "cone": cone,
+    "disk": disk,
+    "torus": torus,
+}
+
+
+# ---------------------------------------------------------------------------
+# Cache LRU com limite de memoria
+# ---------------------------------------------------------------------------
+
+class TessellationCache:
+    # Guarda malhas ja geradas, indexadas por (forma, raio, slices, stacks, extras).
+    # Quando o total de bytes passa de max_bytes, descarta as menos usadas.
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, TessellatedMesh]" = OrderedDict()
+
+    def get(self, shape: str, radius: float, slices: int, stacks: int, **extra) -> TessellatedMesh:
+        key = (shape, float(radius), int(slices), int(stacks), tuple(sorted(extra.items())))
+
+        mesh = self._entries.get(key)
+        if mesh is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return mesh
+
+        self.misses += 1
+        mesh = GENERATORS[shape](radius, slices, stacks, **extra)
+        # as malhas sao compartilhadas entre quem chama; protege contra alteracoes
+        for array in mesh:
+            array.flags.writeable = False
+        self._entries[key] = mesh
+        self.nbytes += mesh.nbytes
+
+        # mantem sempre a entrada recem criada, mesmo se ela sozinha passar do limite
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        return mesh
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Cache compartilhado usado por objects3d
+cache = TessellationCache()
+
+
+def get(shape: str, radius: float, slices: int, stacks: int, **extra) -> TessellatedMesh:
+    return cache.get(shape, radius, slices, stacks, **extra)
@@ -0,0 +1,178 @@
+import math
+from typing import Sequence
+
+import numpy as np
+
+# Matrizes 4x4 equivalentes as chamadas do pipeline fixo (gluLookAt,
+# gluPerspective, glOrtho, glTranslatef, glRotatef, glScalef), em NumPy.
+# Convencao matematica (vetor coluna): p' = M @ p. Para enviar ao OpenGL,
+# que espera ordem de colunas, use M.T (ou transpose = GL_TRUE).
+# scene.py monta camera, projecao e rotacoes da cena com estas funcoes (em
+# CachedMatrix, recalculadas so quando mudam) e carrega o resultado com
+# glLoadMatrixd; os shaders Phong recebem as mesmas matrizes como uniforms.
+
+
+def identity() -> np.ndarray:
+    return np.eye(4)
+
+
+def look_at(eye: Sequence[float], center: Sequence[float], up: Sequence[float]) -> np.ndarray:
+    eye = np.asarray(eye, dtype=np.float64)
+    f = np.asarray(center, dtype=np.float64) - eye
+    f /= np.linalg.norm(f)
+    s = np.cross(f, np.asarray(up, dtype=np.float64))
+    s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+
+    m = np.eye(4)
+    m[0, :3] = s
+    m[1, :3] = u
+    m[2, :3] = -f
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+def perspective(fovy: float, aspect: float, near: float, far: float) -> np.ndarray:
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    m = np.zeros((4, 4))
+    m[0, 0] = f / aspect
+    m[1, 1] = f
+    m[2, 2] = (far + near) / (near - far)
+    m[2, 3] = 2.0 * far * near / (near - far)
+    m[3, 2] = -1.0
+    return m
+
+
+def ortho(left: float, right: float, bottom: float, top: float, near: float, far: float) -> np.ndarray:
+    m = np.eye(4)
+    m[0, 0] = 2.0 / (right - left)
+    m[1, 1] = 2.0 / (top - bottom)
+    m[2, 2] = -2.0 / (far - near)
+    m[0, 3] = -(right + left) / (right - left)
+    m[1, 3] = -(top + bottom) / (top - bottom)
+    m[2, 3] = -(far + near) / (far - near)
+    return m
+
+
+def translate(x: float, y: float, z: float) -> np.ndarray:
+    m = np.eye(4)
+    m[:3, 3] = (x, y, z)
+    return m
+
+
+def scale(x: float, y: float, z: float) -> np.ndarray:
+    return np.diag((x, y, z, 1.0))
+
+
+def rotate(angle: float, x: float, y: float, z: float) -> np.ndarray:
+    # Mesma formula de glRotatef: angulo em graus em torno do eixo (x, y, z)
+    axis = np.array((x, y, z), dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    x, y, z = axis
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    t = 1.0 - c
+
+    m = np.eye(4)
+    m[:3, :3] = (
+        (t * x * x + c, t * x * y - s * z, t * x * z + s * y),
+        (t * x * y + s * z, t * y * y + c, t * y * z - s * x),
+        (t * x * z - s * y, t * y * z + s * x, t * z * z + c),
+    )
+    return m
+
+
+def normal_matrix(model_view: np.ndarray) -> np.ndarray:
+    # Equivalente a gl_NormalMatrix: inversa transposta da parte 3x3
+    return np.linalg.inv(model_view[:3, :3]).T
+
+
+def transform_points(m: np.ndarray, points: np.ndarray) -> np.ndarray:
+    # Aplica M a pontos (N, 3) e devolve coordenadas homogeneas (N, 4)
+    points = np.asarray(points, dtype=np.float64)
+    return points @ m[:, :3].T + m[:, 3]
+
+
+# -- lotes: N matrizes de uma vez, (N, 4, 4) --------------------------------
+# Usadas para montar as transformacoes de muitos objetos sem laco em Python
+# (ex.: scene_graph.demo_grid); compose() encadeia lotes e matrizes avulsas.
+
+def translate_many(offsets: np.ndarray) -> np.ndarray:
+    offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 3)
+    m = np.tile(np.eye(4), (len(offsets), 1, 1))
+    m[:, :3, 3] = offsets
+    return m
+
+
+def scale_many(factors: np.ndarray) -> np.ndarray:
+    # fatores (N,) uniformes ou (N, 3) por eixo
+    factors = np.asarray(factors, dtype=np.float64)
+    if factors.ndim == 1:
+        factors = np.repeat(factors[:, None], 3, axis=1)
+    m = np.zeros((len(factors), 4, 4))
+    m[:, [0, 1, 2], [0, 1, 2]] = factors
+    m[:, 3, 3] = 1.0
+    return m
+
+
+def rotate_many(angles: np.ndarray, axis: Sequence[float]) -> np.ndarray:
+    # Mesma formula de rotate() para N angulos (graus); eixo (3,) comum a todos
+    # ou (N, 3), um por matriz
+    angles = np.radians(np.asarray(angles, dtype=np.float64)).ravel()
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = np.broadcast_to(axis / np.linalg.norm(axis, axis=-1, keepdims=True), (len(angles), 3))
+    x, y, z = axis[:, 0], axis[:, 1], axis[:, 2]
+    c = np.cos(angles)
+    s = np.sin(angles)
+    t = 1.0 - c
+
+    m = np.zeros((len(angles), 4, 4))
+    m[:, 0, 0] = t * x * x + c
+    m[:, 0, 1] = t * x * y - s * z
+    m[:, 0, 2] = t * x * z + s * y
+    m[:, 1, 0] = t * x * y + s * z
+    m[:, 1, 1] = t * y * y + c
+    m[:, 1, 2] = t * y * z - s * x
+    m[:, 2, 0] = t * x * z - s * y
+    m[:, 2, 1] = t * y * z + s * x
+    m[:, 2, 2] = t * z * z + c
+    m[:, 3, 3] = 1.0
+    return m
+
+
+def compose(*matrices: np.ndarray) -> np.ndarray:
+    # Produto da esquerda para a direita (como glMultMatrix em sequencia);
+    # lotes (N, 4, 4) e matrizes (4, 4) se misturam por broadcasting
+    result = matrices[0]
+    for m in matrices[1:]:
+        result = result @ m
+    return result
+
+
+def normal_matrices(model_views: np.ndarray) -> np.ndarray:
+    # normal_matrix() para um lote (N, 4, 4) -> (N, 3, 3)
+    return np.linalg.inv(np.asarray(model_views, dtype=np.float64)[:, :3, :3]).transpose(0, 2, 1)
+
+
+class CachedMatrix:
+    # Matriz guardada junto com os parametros que a geraram: get() so chama
+    # builder(*params) quando algum parametro mudou desde a ultima chamada
+    # (a flag de sujeira e a propria comparacao). version aumenta a cada
+    # recalculo, para que matrizes derivadas (ex.: visualizacao @ modelo)
+    # usem as versoes das entradas como parametros e tambem fiquem em cache.
+
+    def __init__(self, builder) -> None:
+        self.builder = builder
+        self.matrix = None
+        self.version = 0
+        self._params = None
+
+    def get(self, *params) -> np.ndarray:
+        if self.matrix is None or params != self._params:
+            self.matrix = self.builder(*params)
+            self._params = params
+            self.version += 1
+        return self.matrix
+
+    def invalidate(self) -> None:
+        self.matrix = None
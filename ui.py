@@ -1,6 +1,10 @@
+from functools import lru_cache
 from typing import Tuple, Optional
 from OpenGL.GL import *
-from OpenGL import GLUT
+
+import font_atlas
+import glstate
+from framebuffer import Framebuffer
 
 # Quatro botoes para objetos
 OBJECT_BUTTONS = [
@@ -10,13 +14,25 @@ OBJECT_BUTTONS = [
     ("sphere", "Esfera"),
 ]
 
-# Tres botoes para modelo de iluminacao
+# Botoes para modelo de iluminacao (deferred: Phong resolvido a partir do G-buffer)
 SHADING_BUTTONS = [
     ("flat", "Flat"),
     ("gouraud", "Gouraud"),
     ("phong", "Phong"),
+    ("deferred", "Deferred"),
 ]
 
+# Altura da barra de botoes no topo da janela
+BAR_HEIGHT = 90
+
+# A barra e desenhada numa textura (FBO) e so e redesenhada quando muda a
+# chave (largura, altura, objeto, shading); nos outros frames basta um quad.
+_bar_fbo: Optional[Framebuffer] = None
+_bar_key: Optional[tuple] = None
+bar_rebuilds = 0
+
+# Os retangulos dependem so do tamanho da janela: guardados por (largura, altura)
+@lru_cache(maxsize=8)
 def _object_button_rects(width: int, height: int):
     margin = 10
     btn_w = 110
@@ -28,9 +44,10 @@ def _object_button_rects(width: int, height: int):
     for i, (oid, _) in enumerate(OBJECT_BUTTONS):
         x = margin + i * (btn_w + gap)
         rects.append((oid, x, y, x + btn_w, y + btn_h))
-    return rects
+    return tuple(rects)
 
 
+@lru_cache(maxsize=8)
 def _shading_button_rects(width: int, height: int):
     margin = 10
     btn_w = 110
@@ -42,23 +59,92 @@ def _shading_button_rects(width: int, height: int):
     for i, (sid, _) in enumerate(SHADING_BUTTONS):
         x = margin + i * (btn_w + gap)
         rects.append((sid, x, y, x + btn_w, y + btn_h))
-    return rects
+    return tuple(rects)
 
 
 def draw_ui(width: int, height: int, current_object: str, current_shading: str) -> None:
     # UI sempre desenhada com pipeline fixo
-    glUseProgram(0)
+    if width <= 0 or height <= 0:
+        return
+    glstate.use_program(0)
 
-    glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
-    glDisable(GL_LIGHTING)
-    glDisable(GL_DEPTH_TEST)
+    key = (width, height, current_object, current_shading)
+    if key != _bar_key:
+        _rebuild_bar(key)
 
-    glMatrixMode(GL_PROJECTION)
+    glstate.push_attrib(GL_ENABLE_BIT | GL_TEXTURE_BIT)
+    glstate.disable(GL_LIGHTING)
+    glstate.disable(GL_DEPTH_TEST)
+    glstate.enable(GL_TEXTURE_2D)
+    glBindTexture(GL_TEXTURE_2D, _bar_fbo.textures[0])
+    # a textura ja tem as cores finais (inclusive o alfa do fundo): copia direto
+    glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+
+    glstate.matrix_mode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
     glOrtho(0, width, 0, height, -1, 1)
 
-    glMatrixMode(GL_MODELVIEW)
+    glstate.matrix_mode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+    y0 = height - BAR_HEIGHT
+    glBegin(GL_QUADS)
+    glTexCoord2f(0.0, 0.0)
+    glVertex2f(0.0, y0)
+    glTexCoord2f(1.0, 0.0)
+    glVertex2f(width, y0)
+    glTexCoord2f(1.0, 1.0)
+    glVertex2f(width, height)
+    glTexCoord2f(0.0, 1.0)
+    glVertex2f(0.0, height)
+    glEnd()
+
+    glPopMatrix()
+    glstate.matrix_mode(GL_PROJECTION)
+    glPopMatrix()
+    glstate.matrix_mode(GL_MODELVIEW)
+
+    glstate.pop_attrib()
+
+
+def _rebuild_bar(key: tuple) -> None:
+    # Redesenha a barra na textura, com as mesmas coordenadas da janela
+    # (a textura cobre a faixa [altura - BAR_HEIGHT, altura] da tela)
+    global _bar_fbo, _bar_key, bar_rebuilds
+    width, height, current_object, current_shading = key
+
+    # criar/redimensionar o FBO tambem mexe no framebuffer ligado
+    previous_draw = int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+    previous_read = int(glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING))
+    viewport = glGetIntegerv(GL_VIEWPORT)
+
+    if _bar_fbo is None:
+        _bar_fbo = Framebuffer(width, BAR_HEIGHT, depth=False)
+    else:
+        _bar_fbo.resize(width, BAR_HEIGHT)
+    _bar_fbo.bind()
+    _draw_bar(width, height, current_object, current_shading)
+    glBindFramebuffer(GL_DRAW_FRAMEBUFFER, previous_draw)
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, previous_read)
+    glViewport(*viewport)
+
+    _bar_key = key
+    bar_rebuilds += 1
+
+
+def _draw_bar(width: int, height: int, current_object: str, current_shading: str) -> None:
+    glstate.push_attrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+    glstate.disable(GL_LIGHTING)
+    glstate.disable(GL_DEPTH_TEST)
+
+    glstate.matrix_mode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    glOrtho(0, width, height - BAR_HEIGHT, height, -1, 1)
+
+    glstate.matrix_mode(GL_MODELVIEW)
     glPushMatrix()
     glLoadIdentity()
 
@@ -67,10 +153,13 @@ def draw_ui(width: int, height: int, current_object: str, current_shading: str)
     glBegin(GL_QUADS)
     glVertex2f(0.0, height)
     glVertex2f(width, height)
-    glVertex2f(width, height - 90.0)
-    glVertex2f(0.0, height - 90.0)
+    glVertex2f(width, height - BAR_HEIGHT)
+    glVertex2f(0.0, height - BAR_HEIGHT)
     glEnd()
 
+    # rotulos dos botoes, desenhados juntos no fim com o atlas de glifos
+    labels = []
+
     # botoes de objeto
     for (oid, label), (_, x0, y0, x1, y1) in zip(OBJECT_BUTTONS, _object_button_rects(width, height)):
         if oid == current_object:
@@ -84,8 +173,7 @@ def draw_ui(width: int, height: int, current_object: str, current_shading: str)
         glVertex2f(x0, y1)
         glEnd()
 
-        glColor3f(1.0, 1.0, 1.0)
-        _draw_text(x0 + 8, y0 + 8, label)
+        labels.append((x0 + 8, y0 + 8, label))
 
     # botoes de modelo de iluminacao
     for (sid, label), (_, x0, y0, x1, y1) in zip(SHADING_BUTTONS, _shading_button_rects(width, height)):
@@ -100,21 +188,47 @@ def draw_ui(width: int, height: int, current_object: str, current_shading: str)
         glVertex2f(x0, y1)
         glEnd()
 
-        glColor3f(1.0, 1.0, 1.0)
-        _draw_text(x0 + 8, y0 + 8, label)
+        labels.append((x0 + 8, y0 + 8, label))
+
+    glColor3f(1.0, 1.0, 1.0)
+    font_atlas.draw_texts(labels)
 
     # restaura matrizes
     glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
+    glstate.matrix_mode(GL_PROJECTION)
     glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    glstate.matrix_mode(GL_MODELVIEW)
 
-    glPopAttrib()
+    glstate.pop_attrib()
 
-def _draw_text(x: float, y: float, text: str) -> None:
-    glRasterPos2f(x, y)
-    for ch in text:
-        GLUT.glutBitmapCharacter(GLUT.GLUT_BITMAP_HELVETICA_18, ord(ch))
+def draw_overlay(width: int, height: int, lines) -> None:
+    # Texto de diagnostico (ex.: tempos do profiler) no canto inferior esquerdo
+    glstate.use_program(0)
+
+    glstate.push_attrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+    glstate.disable(GL_LIGHTING)
+    glstate.disable(GL_DEPTH_TEST)
+
+    glstate.matrix_mode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    glOrtho(0, width, 0, height, -1, 1)
+
+    glstate.matrix_mode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+    glColor3f(1.0, 1.0, 0.6)
+    line_h = 22
+    font_atlas.draw_texts((10, 10 + (len(lines) - 1 - i) * line_h, line)
+                          for i, line in enumerate(lines))
+
+    glPopMatrix()
+    glstate.matrix_mode(GL_PROJECTION)
+    glPopMatrix()
+    glstate.matrix_mode(GL_MODELVIEW)
+
+    glstate.pop_attrib()
 
 def hit_test(x: int, y: int, width: int, height: int) -> Tuple[Optional[str], Optional[str]]:
     # Retorna ("object", id) ou ("shading", id) se clicou em algum botao
@@ -132,3 +246,12 @@ def hit_test(x: int, y: int, width: int, height: int) -> Tuple[Optional[str], Op
             return "shading", sid
 
     return None, None
+
+
+def release() -> None:
+    # Libera a textura da barra (usar antes de destruir o contexto OpenGL)
+    global _bar_fbo, _bar_key
+    if _bar_fbo is not None:
+        _bar_fbo.delete()
+    _bar_fbo = None
+    _bar_key = None
@@ -0,0 +1,257 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from geometry import FLOATS_PER_VERTEX
+
+# Formatos compactos de vertice (opcionais, escolhidos por malha).
+# O layout padrao (geometry.py) usa 36 bytes por vertice: posicao, normal e cor
+# em float32. Aqui cada atributo pode ser guardado de forma quantizada:
+# - posicao: "half" (float16) ou "snorm16" (int16 normalizado), ambos relativos
+#   a caixa envolvente da malha: o shader reconstroi offset + valor * escala;
+# - normal: "oct" (octaedrica, 2 x int16 normalizado) ou "int2_10_10_10"
+#   (GL_INT_2_10_10_10_REV, 10 bits por componente);
+# - cor: "unorm8" (4 x uint8 normalizado).
+# Os atributos ficam alinhados em 4 bytes (posicoes com w de enchimento).
+# encode()/decode() sao a referencia em CPU (sem OpenGL); o desenho usa os
+# programas de shading.py que decodificam no vertex shader, e report() mede
+# bytes economizados e o erro introduzido por cada formato.
+
+POSITION_FORMATS = ("float32", "half", "snorm16")
+NORMAL_FORMATS = ("float32", "oct", "int2_10_10_10")
+COLOR_FORMATS = ("float32", "unorm8")
+
+
+class VertexFormat(NamedTuple):
+    position: str = "float32"
+    normal: str = "float32"
+    color: str = "float32"
+
+
+# Combinacoes prontas (main.py --vertex-format)
+PRESETS: Dict[str, VertexFormat] = {
+    "float32": VertexFormat(),
+    "compact": VertexFormat("snorm16", "oct", "unorm8"),
+    "half": VertexFormat("half", "int2_10_10_10", "unorm8"),
+}
+
+FULL = PRESETS["float32"]
+
+
+class Attribute(NamedTuple):
+    name: str             # nome do atributo nos shaders de shading.py
+    components: int
+    type: str             # "float", "half", "short", "int_2_10_10_10_rev" ou "ubyte"
+    normalized: bool
+    offset: int           # em bytes dentro do vertice
+
+
+class EncodedVertices(NamedTuple):
+    data: Optional[np.ndarray]   # (N, stride) uint8; None depois do envio a GPU
+    stride: int
+    attributes: Tuple[Attribute, ...]
+    position_offset: np.ndarray  # (3,) posicao = offset + valor * escala
+    position_scale: np.ndarray   # (3,)
+    format: VertexFormat
+
+
+def parse_format(spec: str) -> VertexFormat:
+    # Nome de um preset ou "posicao,normal,cor" (ex.: "snorm16,oct,unorm8")
+    if spec in PRESETS:
+        return PRESETS[spec]
+    parts = spec.split(",")
+    if (len(parts) != 3 or parts[0] not in POSITION_FORMATS or parts[1] not in NORMAL_FORMATS
+            or parts[2] not in COLOR_FORMATS):
+        raise ValueError(f"Formato de vertice invalido: {spec}")
+    return VertexFormat(*parts)
+
+
+# -- codificacao dos atributos -------------------------------------------------
+
+def _snorm(values: np.ndarray, bits: int) -> np.ndarray:
+    # Regra do GL 4.2+: c = round(v * (2^(b-1) - 1)), decodificado como c / max
+    top = (1 << (bits - 1)) - 1
+    return np.round(np.clip(values, -1.0, 1.0) * top).astype(np.int64)
+
+
+def _unsnorm(codes: np.ndarray, bits: int) -> np.ndarray:
+    top = (1 << (bits - 1)) - 1
+    return np.maximum(codes / top, -1.0)
+
+
+def octahedral_encode(normals: np.ndarray) -> np.ndarray:
+    # Normais unitarias (N, 3) -> (N, 2) em [-1, 1]: projecao no octaedro
+    # |x| + |y| + |z| = 1, com o hemisferio inferior dobrado sobre o superior
+    n = np.asarray(normals, dtype=np.float64)
+    n = n / np.maximum(np.abs(n).sum(axis=1, keepdims=True), 1e-20)
+    xy = n[:, :2].copy()
+    lower = n[:, 2] < 0
+    folded = (1.0 - np.abs(n[lower][:, 1::-1])) * np.where(n[lower, :2] >= 0, 1.0, -1.0)
+    xy[lower] = folded
+    return xy
+
+
+def octahedral_decode(xy: np.ndarray) -> np.ndarray:
+    xy = np.asarray(xy, dtype=np.float64)
+    z = 1.0 - np.abs(xy).sum(axis=1)
+    t = np.clip(-z, 0.0, None)
+    n = np.column_stack((xy[:, 0] - np.where(xy[:, 0] >= 0, t, -t),
+                         xy[:, 1] - np.where(xy[:, 1] >= 0, t, -t), z))
+    return n / np.linalg.norm(n, axis=1, keepdims=True)
+
+
+def pack_2_10_10_10(values: np.ndarray) -> np.ndarray:
+    # (N, 3) em [-1, 1] -> uint32 no layout GL_INT_2_10_10_10_REV (x nos bits baixos, w = 0)
+    codes = _snorm(values, 10) & 0x3FF
+    return (codes[:, 0] | (codes[:, 1] << 10) | (codes[:, 2] << 20)).astype(np.uint32)
+
+
+def unpack_2_10_10_10(packed: np.ndarray) -> np.ndarray:
+    packed = np.asarray(packed, dtype=np.int64)
+    codes = np.stack([(packed >> shift) & 0x3FF for shift in (0, 10, 20)], axis=1)
+    codes = np.where(codes >= 512, codes - 1024, codes)
+    return _unsnorm(codes, 10)
+
+
+# -- vertices inteiros ----------------------------------------------------------
+
+_SIZES = {
+    "float32": 12, "half": 8, "snorm16": 8,
+    "oct": 4, "int2_10_10_10": 4, "unorm8": 4,
+}
+
+
+def vertex_size(fmt: VertexFormat) -> int:
+    return _SIZES[fmt.position] + _SIZES[fmt.normal] + _SIZES[fmt.color]
+
+
+def _layout(fmt: VertexFormat) -> Tuple[Attribute, ...]:
+    position = {"float32": (3, "float", False), "half": (4, "half", False),
+                "snorm16": (4, "short", True)}[fmt.position]
+    normal = {"float32": (3, "float", False), "oct": (2, "short", True),
+              "int2_10_10_10": (4, "int_2_10_10_10_rev", True)}[fmt.normal]
+    color = {"float32": (3, "float", False), "unorm8": (4, "ubyte", True)}[fmt.color]
+    attributes: List[Attribute] = []
+    offset = 0
+    for name, (components, kind, normalized), size in (
+            ("aPosition", position, _SIZES[fmt.position]),
+            ("aNormal", normal, _SIZES[fmt.normal]),
+            ("aColor", color, _SIZES[fmt.color])):
+        attributes.append(Attribute(name, components, kind, normalized, offset))
+        offset += size
+    return tuple(attributes)
+
+
+def encode(vertices: np.ndarray, fmt: VertexFormat) -> EncodedVertices:
+    # Array intercalado (N, FLOATS_PER_VERTEX) -> bytes no formato pedido
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+    positions = vertices[:, :3].astype(np.float64)
+    normals = vertices[:, 3:6].astype(np.float64)
+    colors = vertices[:, 6:9]
+    count = len(vertices)
+    stride = vertex_size(fmt)
+    data = np.zeros((count, stride), dtype=np.uint8)
+
+    # posicoes relativas a caixa da malha (float32 guarda os valores originais)
+    if fmt.position == "float32" or not count:
+        offset, scale = np.zeros(3), np.ones(3)
+    else:
+        lo, hi = positions.min(axis=0), positions.max(axis=0)
+        offset = (lo + hi) * 0.5
+        scale = np.where(hi > lo, (hi - lo) * 0.5, 1.0)
+    local = (positions - offset) / scale
+
+    columns = []
+    if fmt.position == "float32":
+        columns.append(positions.astype(np.float32))
+    elif fmt.position == "half":
+        columns.append(np.column_stack((local, np.zeros(count))).astype(np.float16))
+    else:
+        columns.append(np.column_stack((_snorm(local, 16), np.zeros(count))).astype(np.int16))
+
+    if fmt.normal == "float32":
+        columns.append(normals.astype(np.float32))
+    elif fmt.normal == "oct":
+        columns.append(_snorm(octahedral_encode(normals), 16).astype(np.int16))
+    else:
+        columns.append(pack_2_10_10_10(normals)[:, None])
+
+    if fmt.color == "float32":
+        columns.append(colors.astype(np.float32))
+    else:
+        rgba = np.column_stack((colors, np.ones(count)))
+        columns.append(np.round(np.clip(rgba, 0.0, 1.0) * 255.0).astype(np.uint8))
+
+    start = 0
+    for column in columns:
+        # largura explicita: com count == 0 o reshape nao consegue deduzir -1
+        width = column.itemsize * (column.shape[1] if column.ndim > 1 else 1)
+        raw = np.ascontiguousarray(column).view(np.uint8).reshape(count, width)
+        data[:, start:start + raw.shape[1]] = raw
+        start += raw.shape[1]
+
+    return EncodedVertices(data, stride, _layout(fmt), offset.astype(np.float32),
+                           scale.astype(np.float32), fmt)
+
+
+def decode(encoded: EncodedVertices) -> np.ndarray:
+    # Reconstroi o array intercalado float32 como o vertex shader faria
+    data, fmt = encoded.data, encoded.format
+    count = len(data)
+    position_attr, normal_attr, color_attr = encoded.attributes
+
+    def field(attr: Attribute, dtype, size: int) -> np.ndarray:
+        raw = np.ascontiguousarray(data[:, attr.offset:attr.offset + size])
+        return raw.view(dtype).reshape(count, size // np.dtype(dtype).itemsize)
+
+    if fmt.position == "float32":
+        positions = field(position_attr, np.float32, 12).astype(np.float64)
+    else:
+        raw = field(position_attr, np.float16 if fmt.position == "half" else np.int16, 8)[:, :3]
+        local = raw.astype(np.float64) if fmt.position == "half" else _unsnorm(raw, 16)
+        positions = encoded.position_offset + local * encoded.position_scale
+
+    if fmt.normal == "float32":
+        normals = field(normal_attr, np.float32, 12).astype(np.float64)
+    elif fmt.normal == "oct":
+        normals = octahedral_decode(_unsnorm(field(normal_attr, np.int16, 4), 16))
+    else:
+        normals = unpack_2_10_10_10(field(normal_attr, np.uint32, 4)[:, 0])
+
+    if fmt.color == "float32":
+        colors = field(color_attr, np.float32, 12)
+    else:
+        colors = field(color_attr, np.uint8, 4)[:, :3] / 255.0
+
+    return np.hstack((positions, normals, colors)).astype(np.float32)
+
+
+def report(vertices: np.ndarray, fmt: VertexFormat) -> Dict[str, float]:
+    # Bytes por vertice e erro introduzido (posicao em unidades do objeto e
+    # relativo a diagonal da caixa, normal em graus, cor em niveis de 0-255)
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, FLOATS_PER_VERTEX)
+    decoded = decode(encode(vertices, fmt))
+    position_error = np.linalg.norm(decoded[:, :3].astype(np.float64) - vertices[:, :3], axis=1)
+    diagonal = 1.0
+    if len(vertices):
+        diagonal = float(np.linalg.norm(vertices[:, :3].max(axis=0) - vertices[:, :3].min(axis=0))) or 1.0
+
+    original = vertices[:, 3:6].astype(np.float64)
+    original /= np.maximum(np.linalg.norm(original, axis=1, keepdims=True), 1e-20)
+    restored = decoded[:, 3:6].astype(np.float64)
+    restored /= np.maximum(np.linalg.norm(restored, axis=1, keepdims=True), 1e-20)
+    angle = np.degrees(np.arccos(np.clip((original * restored).sum(axis=1), -1.0, 1.0)))
+    color_error = np.abs(decoded[:, 6:9] - vertices[:, 6:9]) * 255.0
+
+    full = vertex_size(FULL)
+    size = vertex_size(fmt)
+    return {
+        "bytes_per_vertex": size,
+        "bytes_saved": full - size,
+        "saved_ratio": (full - size) / full,
+        "position_error_max": float(position_error.max(initial=0.0)),
+        "position_error_relative": float(position_error.max(initial=0.0)) / diagonal,
+        "normal_error_max_deg": float(angle.max(initial=0.0)),
+        "normal_error_mean_deg": float(angle.mean()) if len(angle) else 0.0,
+        "color_error_max": float(color_error.max(initial=0.0)),
+    }